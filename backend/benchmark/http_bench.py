@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""
+Benchmark the API routes.
+
+Optionally seeds the database with a synthetic bank of questions and categories, then drives every `/api` route
+registered by `create_app` through the flask test client and/or a threaded WSGI server, and reports the p50/p95/p99
+latency and throughput per route. Results may be saved as JSON, and two results files compared.
+
+WARNING: seeding deletes all existing questions and categories, so use a dedicated database, e.g.
+$ createdb trivia_bench
+$ cd /path/to/project/backend && DATABASE_URI=... flask db upgrade
+
+Usage:
+$ cd /path/to/project/backend/benchmark
+$ export PYTHONPATH=/path/to/project
+$ export DATABASE_URI=dbowner:password@localhost:5432/trivia_bench
+$ python -m http_bench --seed --questions 100000 --categories 50 --requests 500 --output results.json
+$ python -m http_bench --compare base.json results.json
+"""
+import argparse
+import http.client
+import json
+import logging
+import math
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import create_engine, select, delete, text
+from werkzeug.serving import make_server
+
+CLIENT_MODE = 'client'  # flask test client
+WSGI_MODE = 'wsgi'      # threaded werkzeug WSGI server
+MODES = [CLIENT_MODE, WSGI_MODE]
+
+SEED_CHUNK_SIZE = 10000
+BENCH_PASSWORD = 'benchmark'
+NUM_BENCH_USERS = 10
+
+WORDS = ['river', 'mountain', 'planet', 'painter', 'novel', 'empire', 'ocean', 'violin', 'desert', 'island', 'castle',
+         'comet', 'glacier', 'pharaoh', 'orbit', 'symphony', 'volcano', 'forest', 'emperor', 'galaxy', 'harbor', 'poet',
+         'temple', 'canyon', 'meteor', 'opera', 'sculptor', 'tundra', 'monsoon', 'lagoon', 'dynasty', 'nebula']
+
+
+
+class RawBody(NamedTuple):
+    """ Request body which is not json. """
+    data: bytes
+    content_type: str
+
+
+Request = Tuple[str, str, Optional[Union[dict, RawBody]]]   # method, path, json or raw body
+
+
+def synthetic_text(rng: random.Random, num_words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=num_words))
+
+
+def seed(engine, num_questions: int, num_categories: int, seed_value: int):
+    """
+    Replace the questions and categories with a synthetic bank.
+    :param engine:          database engine
+    :param num_questions:   number of questions
+    :param num_categories:  number of categories
+    :param seed_value:      random seed
+    """
+    from backend.flaskr.model import Question, Category
+    from backend.setup.load_initial_data import ensure_categories, synthetic_questions, load_questions, analyze
+
+    rng = random.Random(seed_value)
+    category_types = [f'Category {n}' for n in range(1, num_categories + 1)]
+
+    start = time.perf_counter()
+    # create the tables if required, e.g. in an in-memory sqlite database
+    Question.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(delete(Question.__table__))
+        conn.execute(delete(Category.__table__))
+        ensure_categories(conn, category_types)
+
+    load_questions(engine, synthetic_questions(num_questions, category_types, rng), chunk_size=SEED_CHUNK_SIZE)
+    analyze(engine)
+    print(f'seeded {num_questions} questions, {num_categories} categories in '
+          f'{time.perf_counter() - start:.1f}s', file=sys.stderr)
+
+
+class BenchContext(object):
+    """
+    Data used to generate route requests.
+    :param engine:  database engine
+    :param client:  flask test client, used for setup requests
+    :param rng:     random number generator
+    """
+
+    def __init__(self, engine, client, rng: random.Random):
+        from backend.flaskr.model import Question, Category
+
+        self.engine = engine
+        self.client = client
+        self.rng = rng
+        self.run_id = uuid.uuid4().hex[:8]
+        with engine.connect() as conn:
+            self.category_ids = conn.execute(select(Category.__table__.c.id)).scalars().all()
+            self.question_ids = conn.execute(
+                select(Question.__table__.c.id).order_by(Question.__table__.c.id).limit(10000)).scalars().all()
+        self.user_id = None
+        self.session_tokens = []
+        self.deletable_ids = []
+
+    def login_user(self, n: int) -> dict:
+        resp = self.client.post('/api/login', json={'username': f'bench-{n}', 'password': BENCH_PASSWORD})
+        return resp.get_json()['user']
+
+    def start_sessions(self, count: int):
+        self.session_tokens = [
+            self.client.post('/api/quizzes/sessions', json={'quiz_category': {'id': 0}}).get_json()['session']
+            for _ in range(count)
+        ]
+
+    def create_deletable(self, count: int, tag: str):
+        from backend.flaskr.model import Question
+
+        prefix = f'Benchmark delete {self.run_id} {tag}'
+        for n in range(count):
+            self.client.post('/api/questions', json={
+                'question': f'{prefix} {n}?', 'answer': 'Answer', 'category': self.rng.choice(self.category_ids),
+                'difficulty': 1
+            })
+        questions = Question.__table__
+        with self.engine.connect() as conn:
+            self.deletable_ids = conn.execute(
+                select(questions.c.id).where(questions.c.question.like(f'{prefix} %'))).scalars().all()
+
+
+class Scenario(object):
+    """
+    Request generator for a route.
+    :param make_request:    function taking the context and request number, and returning the request
+    :param setup:           function taking the context and number of requests, called before the requests
+    """
+
+    def __init__(self, make_request: Callable[[BenchContext, int], Request],
+                 setup: Callable[[BenchContext, int], None] = None):
+        self.make_request = make_request
+        self.setup = setup
+
+
+def _question_id(ctx: BenchContext) -> int:
+    return ctx.rng.choice(ctx.question_ids)
+
+
+def _category_id(ctx: BenchContext) -> int:
+    return ctx.rng.choice(ctx.category_ids)
+
+
+def _setup_user(ctx: BenchContext, count: int):
+    ctx.user_id = ctx.login_user(0)['id']
+
+
+def _import_body(ctx: BenchContext, n: int, num_questions: int = 10) -> RawBody:
+    # question text unique per run, so the questions don't conflict with those already imported
+    lines = [json.dumps({
+        'question': f'Benchmark import {ctx.run_id} {n}.{i}: {synthetic_text(ctx.rng, 5)}?',
+        'answer': synthetic_text(ctx.rng, 2), 'category': _category_id(ctx), 'difficulty': ctx.rng.randint(1, 5)
+    }) for i in range(num_questions)]
+    return RawBody('\n'.join(lines).encode(), 'application/x-ndjson')
+
+
+# Scenarios by endpoint and method.
+SCENARIOS: Dict[Tuple[str, str], Scenario] = {
+    ('all_categories', 'GET'): Scenario(lambda ctx, n: ('GET', '/api/categories', None)),
+    ('category_by_id', 'GET'): Scenario(lambda ctx, n: ('GET', f'/api/categories/{_category_id(ctx)}', None)),
+    ('questions_by_category_id', 'GET'): Scenario(
+        lambda ctx, n: ('GET', f'/api/categories/{_category_id(ctx)}/questions?page={ctx.rng.randint(1, 5)}', None)),
+    ('all_questions', 'GET'): Scenario(
+        lambda ctx, n: ('GET', f'/api/questions?page={ctx.rng.randint(1, 20)}', None)),
+    ('question_by_id', 'GET'): Scenario(lambda ctx, n: ('GET', f'/api/questions/{_question_id(ctx)}', None)),
+    ('questions_batch', 'POST'): Scenario(lambda ctx, n: ('POST', '/api/questions/batch', {
+        'ids': ctx.rng.sample(ctx.question_ids, min(20, len(ctx.question_ids)))
+    })),
+    ('create_question', 'POST'): Scenario(lambda ctx, n: ('POST', '/api/questions', {
+        'question': f'Benchmark create {ctx.run_id} {n}: {synthetic_text(ctx.rng, 5)}?',
+        'answer': synthetic_text(ctx.rng, 2), 'category': _category_id(ctx), 'difficulty': ctx.rng.randint(1, 5)
+    })),
+    ('import_questions', 'POST'): Scenario(lambda ctx, n: ('POST', '/api/questions/import', _import_body(ctx, n))),
+    ('export_questions', 'GET'): Scenario(lambda ctx, n: (
+        'GET', f'/api/questions/export?format={"csv" if n % 2 else "ndjson"}&category={_category_id(ctx)}', None)),
+    ('search_questions', 'POST'): Scenario(
+        lambda ctx, n: ('POST', '/api/questions/search', {'searchTerm': ctx.rng.choice(WORDS)})),
+    ('next_question', 'POST'): Scenario(lambda ctx, n: ('POST', '/api/quizzes', {
+        'previous_questions': ctx.rng.sample(ctx.question_ids, min(10, len(ctx.question_ids))),
+        'quiz_category': {'id': _category_id(ctx)}
+    })),
+    ('save_result', 'POST'): Scenario(lambda ctx, n: ('POST', '/api/quizzes/results', {
+        'user_id': ctx.user_id, 'num_correct': 1, 'num_questions': 2
+    }), setup=_setup_user),
+    ('start_quiz', 'POST'): Scenario(
+        lambda ctx, n: ('POST', '/api/quizzes/sessions', {'quiz_category': {'id': _category_id(ctx)}})),
+    ('quiz_session', 'POST'): Scenario(
+        lambda ctx, n: ('POST', f'/api/quizzes/sessions/{ctx.session_tokens[n % len(ctx.session_tokens)]}', None),
+        setup=lambda ctx, count: ctx.start_sessions(max(1, count // 10))),
+    ('quiz_session', 'DELETE'): Scenario(
+        lambda ctx, n: ('DELETE', f'/api/quizzes/sessions/{ctx.session_tokens[n]}', None),
+        setup=lambda ctx, count: ctx.start_sessions(count)),
+    ('login', 'POST'): Scenario(lambda ctx, n: ('POST', '/api/login', {
+        'username': f'bench-{n % NUM_BENCH_USERS}', 'password': BENCH_PASSWORD
+    }), setup=lambda ctx, count: [ctx.login_user(n) for n in range(NUM_BENCH_USERS)]),
+    ('metrics', 'GET'): Scenario(lambda ctx, n: ('GET', '/api/_metrics', None)),
+}
+# Scenarios which are run last, as they remove data.
+DESTRUCTIVE_SCENARIOS: Dict[Tuple[str, str], Scenario] = {
+    ('question_by_id', 'DELETE'): Scenario(
+        lambda ctx, n: ('DELETE', f'/api/questions/{ctx.deletable_ids[n]}', None),
+        setup=lambda ctx, count: ctx.create_deletable(count, f'{time.monotonic_ns()}')),
+}
+
+
+def api_routes(app) -> List[Tuple[str, str, str]]:
+    """
+    Get the api routes registered with the application.
+    :param app: flask application
+    :return: list of tuples of endpoint, method and rule
+    """
+    routes = []
+    for rule in app.url_map.iter_rules():
+        if rule.rule.startswith('/api'):
+            for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+                routes.append((rule.endpoint, method, rule.rule))
+    return routes
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """ Nearest-rank percentile of sorted values. """
+    return values[max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 3),
+        'throughput_rps': round(len(latencies) / elapsed, 1),
+    }
+
+
+def run_client(client, requests: List[Request]) -> Tuple[List[float], int, float]:
+    """
+    Run requests sequentially through the flask test client.
+    :return: tuple of latencies, number of errors and elapsed seconds
+    """
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    for method, path, body in requests:
+        request_start = time.perf_counter()
+        if isinstance(body, RawBody):
+            resp = client.open(path, method=method, data=body.data, content_type=body.content_type)
+        else:
+            resp = client.open(path, method=method, json=body)
+        resp.get_data()     # read a streamed response to the end
+        latencies.append(time.perf_counter() - request_start)
+        if resp.status_code >= 400:
+            errors = errors + 1
+    return latencies, errors, time.perf_counter() - start
+
+
+def run_wsgi(port: int, requests: List[Request], concurrency: int) -> Tuple[List[float], int, float]:
+    """
+    Run requests concurrently over http against the WSGI server.
+    :return: tuple of latencies, number of errors and elapsed seconds
+    """
+    local = threading.local()
+
+    def send(req: Request) -> Tuple[float, bool]:
+        method, path, body = req
+        if isinstance(body, RawBody):
+            data, headers = body.data, {'Content-Type': body.content_type}
+        elif body is not None:
+            data, headers = json.dumps(body).encode(), {'Content-Type': 'application/json'}
+        else:
+            data, headers = None, {}
+        request_start = time.perf_counter()
+        for attempt in range(2):
+            if getattr(local, 'conn', None) is None:
+                local.conn = http.client.HTTPConnection('127.0.0.1', port)
+            try:
+                local.conn.request(method, path, body=data, headers=headers)
+                resp = local.conn.getresponse()
+                resp.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                # server closed the connection, e.g. no keep-alive; reconnect
+                local.conn.close()
+                local.conn = None
+                if attempt > 0:
+                    raise
+        return time.perf_counter() - request_start, resp.status >= 400
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, requests))
+    elapsed = time.perf_counter() - start
+    return [result[0] for result in results], sum([1 for result in results if result[1]]), elapsed
+
+
+def run(app, engine, modes: List[str], num_requests: int, concurrency: int, warmup: int, seed_value: int) -> dict:
+    """
+    Benchmark all api routes.
+    :return: results by mode and route
+    """
+    client = app.test_client()
+    results = {mode: {} for mode in modes}
+    server = None
+    if WSGI_MODE in modes:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)     # no request logging
+        server = make_server('127.0.0.1', 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    routes = api_routes(app)
+    skipped = [f'{method} {rule}' for endpoint, method, rule in routes
+               if (endpoint, method) not in SCENARIOS and (endpoint, method) not in DESTRUCTIVE_SCENARIOS]
+    ordered = [(key, SCENARIOS) for key in SCENARIOS.keys()] + \
+              [(key, DESTRUCTIVE_SCENARIOS) for key in DESTRUCTIVE_SCENARIOS.keys()]
+    rules = {(endpoint, method): rule for endpoint, method, rule in routes}
+
+    try:
+        for mode in modes:
+            for key, scenarios in ordered:
+                if key not in rules:
+                    continue
+                ctx = BenchContext(engine, client, random.Random(seed_value))
+                scenario = scenarios[key]
+                if scenario.setup is not None:
+                    scenario.setup(ctx, warmup + num_requests)
+                requests = [scenario.make_request(ctx, n) for n in range(warmup + num_requests)]
+                if mode == CLIENT_MODE:
+                    run_client(client, requests[:warmup])
+                    latencies, errors, elapsed = run_client(client, requests[warmup:])
+                else:
+                    run_wsgi(server.server_port, requests[:warmup], concurrency)
+                    latencies, errors, elapsed = run_wsgi(server.server_port, requests[warmup:], concurrency)
+
+                name = f'{key[1]} {rules[key]}'
+                results[mode][name] = summarize(latencies, errors, elapsed)
+                print_result(mode, name, results[mode][name])
+    finally:
+        if server is not None:
+            server.shutdown()
+
+    for route in skipped:
+        print(f'no scenario for {route}, skipped', file=sys.stderr)
+    return results
+
+
+def print_header():
+    print(f'{"mode":<8}{"route":<46}{"p50 (ms)":>10}{"p95 (ms)":>10}{"p99 (ms)":>10}{"req/s":>10}{"errors":>8}')
+
+
+def print_result(mode: str, name: str, result: dict):
+    print(f'{mode:<8}{name:<46}{result["p50_ms"]:>10.2f}{result["p95_ms"]:>10.2f}{result["p99_ms"]:>10.2f}'
+          f'{result["throughput_rps"]:>10.1f}{result["errors"]:>8}')
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(base_file: str, new_file: str):
+    """
+    Compare two results files.
+    :param base_file:   baseline results
+    :param new_file:    new results
+    """
+    with open(base_file) as fhandle:
+        base = json.load(fhandle)
+    with open(new_file) as fhandle:
+        new = json.load(fhandle)
+
+    print(f'base: {base["meta"].get("commit")} {base["meta"]["timestamp"]}')
+    print(f'new:  {new["meta"].get("commit")} {new["meta"]["timestamp"]}')
+    print(f'{"mode":<8}{"route":<46}{"p50":>10}{"p95":>10}{"p99":>10}{"req/s":>10}')
+    for mode, routes in new['results'].items():
+        for name, result in routes.items():
+            base_result = base['results'].get(mode, {}).get(name)
+            if base_result is None:
+                print(f'{mode:<8}{name:<46}{"new":>10}')
+                continue
+            changes = [
+                f'{(result[stat] - base_result[stat]) / base_result[stat] * 100:+.1f}%'
+                if base_result[stat] else 'n/a'
+                for stat in ['p50_ms', 'p95_ms', 'p99_ms', 'throughput_rps']
+            ]
+            print(f'{mode:<8}{name:<46}' + ''.join([f'{change:>10}' for change in changes]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the api routes')
+    parser.add_argument('--seed', action='store_true',
+                        help='replace all questions and categories with synthetic data; USE A DEDICATED DATABASE')
+    parser.add_argument('--questions', type=int, default=10000, help='number of questions to seed')
+    parser.add_argument('--categories', type=int, default=20, help='number of categories to seed')
+    parser.add_argument('--mode', choices=MODES + ['all'], default='all', help='request mode')
+    parser.add_argument('--requests', type=int, default=200, help='number of requests per route')
+    parser.add_argument('--warmup', type=int, default=20, help='number of warmup requests per route')
+    parser.add_argument('--concurrency', type=int, default=4, help='number of concurrent clients in wsgi mode')
+    parser.add_argument('--random-seed', type=int, default=1, help='random seed')
+    parser.add_argument('--test-config', action='store_true', help='use the test configuration')
+    parser.add_argument('--output', help='file to save results to as json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'), help='compare two results files')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    from backend.flaskr import create_app
+    from backend.flaskr.model import sqlite_engine_options
+
+    if args.test_config:
+        from backend import test_config as app_config
+    else:
+        from backend import config as app_config
+    engine = create_engine(app_config.SQLALCHEMY_DATABASE_URI,
+                           **sqlite_engine_options(app_config.SQLALCHEMY_DATABASE_URI))
+    if args.seed:
+        seed(engine, args.questions, args.categories, args.random_seed)
+
+    # create the app after seeding, so the in-process caches and indices are loaded from the seeded data
+    app = create_app(test_config=app_config)
+    # the metrics route is one of the benchmarked routes
+    app.config['METRICS_ENABLED'] = True
+    modes = MODES if args.mode == 'all' else [args.mode]
+
+    print_header()
+    results = run(app, engine, modes, args.requests, args.concurrency, args.warmup, args.random_seed)
+
+    if args.output:
+        with engine.connect() as conn:
+            num_questions = conn.execute(text('SELECT count(*) FROM questions')).scalar()
+        output = {
+            'meta': {
+                'commit': git_commit(),
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': sys.version.split()[0],
+                'dialect': engine.dialect.name,
+                'questions': num_questions,
+                'requests': args.requests,
+                'concurrency': args.concurrency,
+                'config': 'test' if args.test_config else 'app',
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as fhandle:
+            json.dump(output, fhandle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark json serialization of an API response.
+
+Times `format()` to response bytes for a page of questions with the categories map, comparing the original path
+(merged dict copies and `jsonify`, with Flask's default sorted keys) with `paginated_success_result` using each
+available json encoder, with the categories map serialized per response or included as a pre-serialized fragment.
+
+Usage:
+$ cd /path/to/project/backend/benchmark
+$ export PYTHONPATH=/path/to/project
+$ export DATABASE_URI=dbowner:password@localhost:5432/trivia
+$ python -m json_bench --questions 50 --iterations 5000
+"""
+import argparse
+import random
+import time
+
+from flask import Flask, jsonify
+
+from backend.flaskr.model import Question
+from backend.flaskr.model.models import ANS_MATCH_SEPARATOR
+from backend.flaskr.util import (set_config, paginated_success_result, key_or_alias, get_json_encoder, JsonFragment,
+                                 QUESTION_RESPONSE_ALIASES, MIN_DIFFICULTY, MAX_DIFFICULTY
+                                 )
+from backend.flaskr.util.json_encoder import STDLIB_ENCODER, ORJSON_ENCODER
+
+WORDS = ['river', 'mountain', 'planet', 'painter', 'novel', 'empire', 'ocean', 'violin', 'desert', 'island', 'castle',
+         'comet', 'glacier', 'pharaoh', 'orbit', 'symphony', 'volcano', 'forest', 'emperor', 'galaxy', 'harbor', 'poet']
+
+
+def make_questions(num_questions: int, categories: dict, seed: int) -> list:
+    rng = random.Random(seed)
+    questions = []
+    for n in range(num_questions):
+        answer = " ".join(rng.choices(WORDS, k=rng.randint(1, 3)))
+        # specify the match, so nltk isn't required
+        question = Question(question=f"Question {n}: which {' '.join(rng.choices(WORDS, k=8))}?",
+                            answer=f'{answer.title()}{ANS_MATCH_SEPARATOR}{answer}',
+                            category=int(rng.choice(list(categories.keys()))),
+                            difficulty=rng.randint(MIN_DIFFICULTY, MAX_DIFFICULTY))
+        question.id = n + 1
+        questions.append(question)
+    return questions
+
+
+def original_result(questions: list, categories: dict):
+    """ The original paginated result, for comparison. """
+    def make_result(success: bool, **kwargs):
+        result = {'success': success}
+        result = {**result, **kwargs}
+        return jsonify(result)
+
+    aliases = QUESTION_RESPONSE_ALIASES
+    result = {
+        key_or_alias("data", aliases): [question.format() for question in questions],
+        key_or_alias("page", aliases): 1,
+        key_or_alias("per_page", aliases): len(questions),
+        key_or_alias("num_pages", aliases): 1,
+        key_or_alias("total", aliases): len(questions),
+        key_or_alias("offset", aliases): 0,
+        key_or_alias("limit", aliases): len(questions),
+    }
+    return make_result(True, **{**result, **{'categories': categories, 'categories_version': 1}})
+
+
+def result(questions: list, categories):
+    return paginated_success_result(
+        data=[question.format() for question in questions], page=1, per_page=len(questions), total=len(questions),
+        offset=0, limit=len(questions), aliases=QUESTION_RESPONSE_ALIASES, categories=categories, categories_version=1)
+
+
+def timed(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func().get_data()
+    return time.perf_counter() - start
+
+
+def run(num_questions: int, num_categories: int, iterations: int, seed: int):
+    app = Flask(__name__)
+    set_config(app.config)
+
+    categories = {str(n): f'Category {n}' for n in range(1, num_categories + 1)}
+    questions = make_questions(num_questions, categories, seed)
+
+    encoders = [STDLIB_ENCODER]
+    try:
+        import orjson   # noqa: F401
+        encoders.append(ORJSON_ENCODER)
+    except ImportError:
+        print('orjson not installed, skipping')
+
+    timings = []
+    with app.test_request_context():
+        app.config['JSON_SORT_KEYS'] = True     # flask default
+        expected = original_result(questions, categories).get_json()
+        timings.append(('original jsonify', timed(lambda: original_result(questions, categories), iterations)))
+
+        app.config['JSON_SORT_KEYS'] = False
+        for name in encoders:
+            app.config['JSON_ENCODER'] = name
+            fragment = JsonFragment(get_json_encoder().dumps(categories))
+            for label, value in [(name, categories), (f'{name} + fragment', fragment)]:
+                if result(questions, value).get_json() != expected:
+                    raise AssertionError(f'{label} result differs')
+                timings.append((label, timed(lambda: result(questions, value), iterations)))
+
+    print(f'{num_questions} questions, {num_categories} categories, {iterations} iterations')
+    print(f'{"method":<24}{"total (s)":>12}{"per response (us)":>20}{"speedup":>10}')
+    original_time = timings[0][1]
+    for name, elapsed in timings:
+        print(f'{name:<24}{elapsed:>12.4f}{elapsed / iterations * 1e6:>20.1f}{original_time / elapsed:>9.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark json serialization of a page of questions')
+    parser.add_argument('--questions', type=int, default=50, help='number of questions per page')
+    parser.add_argument('--categories', type=int, default=20, help='number of categories')
+    parser.add_argument('--iterations', type=int, default=5000, help='number of responses to serialize')
+    parser.add_argument('--seed', type=int, default=1, help='random seed')
+    args = parser.parse_args()
+
+    run(args.questions, args.categories, args.iterations, args.seed)
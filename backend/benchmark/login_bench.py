@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark password verification, i.e. the cost of a login for an existing user.
+
+Reports logins per second at each hash cost, with the verified credential cache disabled and enabled. With the cache
+enabled, each user logs in repeatedly, so only the first login per user is hashed.
+
+Usage:
+$ cd /path/to/project/backend/benchmark
+$ export PYTHONPATH=/path/to/project
+$ python -m login_bench --costs 1000 50000 260000 --users 20 --logins 5
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.flaskr.service.password_hasher import Pbkdf2Hasher, PasswordService, VerifiedCredentialCache
+
+
+def run_logins(service: PasswordService, credentials: list, num_logins: int, num_clients: int) -> float:
+    """
+    Run logins for all users.
+    :param service:     password service
+    :param credentials: list of tuples of username, password and stored hash
+    :param num_logins:  number of logins per user
+    :param num_clients: number of concurrent clients
+    :return: elapsed seconds
+    """
+    logins = [credential for _ in range(num_logins) for credential in credentials]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=num_clients) as executor:
+        results = list(executor.map(lambda credential: service.verify(*credential), logins))
+    elapsed = time.perf_counter() - start
+    if not all(results):
+        raise AssertionError('Password verification failed')
+    return elapsed
+
+
+def run(costs: list, num_users: int, num_logins: int, workers: int, num_clients: int):
+    print(f'{num_users} users, {num_logins} logins each, {workers} concurrent hashes, {num_clients} clients')
+    print(f'{"cost":>10}{"hash (ms)":>12}{"no cache (logins/s)":>22}{"cache (logins/s)":>20}')
+    for cost in costs:
+        hasher = Pbkdf2Hasher(cost)
+        start = time.perf_counter()
+        credentials = [(f'user{n}', f'password{n}', hasher.hash(f'password{n}')) for n in range(num_users)]
+        hash_time = (time.perf_counter() - start) / num_users
+
+        rates = []
+        for cache in [VerifiedCredentialCache(ttl=0), VerifiedCredentialCache(ttl=300)]:
+            service = PasswordService(hasher, workers=workers, max_pending=num_clients, cache=cache)
+            elapsed = run_logins(service, credentials, num_logins, num_clients)
+            rates.append(num_users * num_logins / elapsed)
+
+        print(f'{cost:>10}{hash_time * 1e3:>12.2f}{rates[0]:>22.1f}{rates[1]:>20.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark password verification')
+    parser.add_argument('--costs', type=int, nargs='+', default=[1000, 50000, 260000],
+                        help='hash costs, i.e. pbkdf2 iterations')
+    parser.add_argument('--users', type=int, default=20, help='number of users')
+    parser.add_argument('--logins', type=int, default=5, help='number of logins per user')
+    parser.add_argument('--workers', type=int, default=4, help='max number of concurrent hashes')
+    parser.add_argument('--clients', type=int, default=8, help='number of concurrent clients')
+    args = parser.parse_args()
+
+    run(args.costs, args.users, args.logins, args.workers, args.clients)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark answer match generation.
+
+Compares the original per-answer path (stopwords re-read from the corpus into a list for every answer) with
+`generate_match` (stopwords loaded once into a set, memoized matches) and the batch `generate_matches`.
+
+Usage:
+$ cd /path/to/project/backend/benchmark
+$ export PYTHONPATH=/path/to/project
+$ python -m match_bench --answers 5000 --distinct 1000
+"""
+import argparse
+import random
+import re
+import time
+from os import path
+
+import nltk
+from nltk import word_tokenize
+
+from backend.flaskr.model.match import generate_match, generate_matches, clear_match_cache
+
+NLTK_DATA_PATH = path.join(path.dirname(path.abspath(__file__)), '..', 'nltk_data')
+
+WORDS = ['the', 'palace', 'of', 'versailles', 'lake', 'victoria', 'george', 'washington', 'carver', 'a', 'mona',
+         'lisa', 'alexander', 'fleming', 'jackson', 'pollock', 'edward', 'scissorhands', 'in', 'apollo', '13',
+         "it's", 'one', 'blood', 'the', 'liver', 'uruguay', 'brazil', 'escher', 'agra', 'muhammad', 'ali']
+
+__NON_WS_REGEX__ = re.compile(r'\S+')
+__NON_WORD_REGEX__ = re.compile(r'^\W+|\W+$')
+
+
+def original_generate_match(answer_str: str) -> (str, str):
+    """ The original match generation, for comparison. """
+    stopwords = nltk.corpus.stopwords.words('english')
+
+    stripped = __NON_WS_REGEX__.sub(
+        lambda m: __NON_WORD_REGEX__.sub('', m.group()), answer_str)
+    tokenized_answer = word_tokenize(stripped.lower())
+    tokenized_no_stop = [token for token in tokenized_answer if token not in stopwords]
+
+    return answer_str, " ".join(tokenized_no_stop)
+
+
+def make_answers(num_answers: int, num_distinct: int, seed: int) -> list:
+    rng = random.Random(seed)
+    distinct = [" ".join(rng.choices(WORDS, k=rng.randint(1, 5))).title() for _ in range(num_distinct)]
+    return [rng.choice(distinct) for _ in range(num_answers)]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run(num_answers: int, num_distinct: int, seed: int):
+    answers = make_answers(num_answers, num_distinct, seed)
+
+    # warm up nltk, so the first timing doesn't include loading the tokenizer
+    original_generate_match(answers[0])
+
+    expected, original_time = timed(lambda: [original_generate_match(answer) for answer in answers])
+
+    clear_match_cache()
+    single, single_time = timed(lambda: [generate_match(answer) for answer in answers])
+
+    clear_match_cache()
+    batch, batch_time = timed(generate_matches, answers)
+
+    if expected != single or expected != batch:
+        raise AssertionError('Match generation results differ')
+
+    print(f'{num_answers} answers, {len(set(answers))} distinct')
+    print(f'{"method":<20}{"total (s)":>12}{"per answer (us)":>18}{"speedup":>10}')
+    for name, elapsed in [('original', original_time), ('generate_match', single_time),
+                          ('generate_matches', batch_time)]:
+        print(f'{name:<20}{elapsed:>12.4f}{elapsed / num_answers * 1e6:>18.1f}{original_time / elapsed:>9.1f}x')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark answer match generation')
+    parser.add_argument('--answers', type=int, default=5000, help='number of answers')
+    parser.add_argument('--distinct', type=int, default=1000, help='number of distinct answers')
+    parser.add_argument('--seed', type=int, default=1, help='random seed')
+    args = parser.parse_args()
+
+    nltk.data.path.append(NLTK_DATA_PATH)
+    run(args.answers, args.distinct, args.seed)
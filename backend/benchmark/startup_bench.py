@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Benchmark application startup, i.e. importing the application and calling `create_app`.
+
+Each run is made in a fresh interpreter. The 'eager nltk' runs import nltk before the application, as was the case
+when nltk was imported by the model module, for comparison.
+
+Usage:
+$ cd /path/to/project/backend/benchmark
+$ export PYTHONPATH=/path/to/project
+$ python -m startup_bench --runs 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+STARTUP_SCRIPT = '''
+import json
+import sys
+import time
+start = time.perf_counter()
+if {eager}:
+    import nltk
+from backend.flaskr import create_app
+from backend import test_config
+create_app(test_config=test_config)
+print(json.dumps({{"elapsed": time.perf_counter() - start, "nltk": "nltk" in sys.modules}}))
+'''
+
+
+def startup(eager: bool) -> dict:
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT.format(eager=eager)],
+                            check=True, capture_output=True, text=True).stdout
+    # the result is the last line, in case the application printed anything
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(num_runs: int):
+    print(f'{"mode":<14}{"median (s)":>12}{"min (s)":>10}{"nltk imported":>16}')
+    for name, eager in [('eager nltk', True), ('lazy nltk', False)]:
+        results = [startup(eager) for _ in range(num_runs)]
+        elapsed = [result['elapsed'] for result in results]
+        print(f'{name:<14}{statistics.median(elapsed):>12.3f}{min(elapsed):>10.3f}'
+              f'{str(any([result["nltk"] for result in results])):>16}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark application startup')
+    parser.add_argument('--runs', type=int, default=5, help='number of runs per mode')
+    args = parser.parse_args()
+
+    run(args.runs)
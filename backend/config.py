@@ -1,4 +1,5 @@
 import os
+import tempfile
 from . import FILE_CFG_AVAILABLE
 
 #
@@ -24,12 +25,50 @@ if db_info is None:
     raise ValueError(
         "Database credentials not configured: set using 'secrets.py' or environment variable 'DATABASE_URI'")
 
-SQLALCHEMY_DATABASE_URI = f'postgresql://{db_info}'
+# DATABASE_URI may be a database url, e.g. 'sqlite:////path/to/trivia.db', or postgresql credentials.
+SQLALCHEMY_DATABASE_URI = db_info if '://' in db_info else f'postgresql://{db_info}'
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False  # disable FSADeprecationWarning
 
+# Database connection pool; see https://docs.sqlalchemy.org/en/14/core/pooling.html
+# Set an option to None to use the SQLAlchemy default. Options set in SQLALCHEMY_ENGINE_OPTIONS take priority.
+# Note: each worker process has its own pool, so workers * (DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW) should be less than
+#       the postgresql max_connections.
+# Number of connections kept open in the pool.
+DB_POOL_SIZE = 5
+# Max number of connections opened in addition to DB_POOL_SIZE when all pooled connections are in use.
+DB_POOL_MAX_OVERFLOW = 10
+# Seconds to wait for a connection when the pool is exhausted, before failing with 503 Service Unavailable.
+DB_POOL_TIMEOUT = 30
+# Seconds after which a connection is replaced, e.g. to avoid server-side idle timeouts; set to -1 to never replace.
+DB_POOL_RECYCLE = 1800
+# Test connections for liveness on checkout, so connections dropped by the server are transparently replaced.
+DB_POOL_PRE_PING = True
+
+# Expose application metrics, e.g. connection pool metrics, at /api/_metrics.
+# Note: the endpoint is unauthenticated, so only enable it where it is not publicly accessible.
+METRICS_ENABLED = False
+
+# Collect per-request SQL statement statistics, reported in a 'Server-Timing' response header and logged.
+SQL_STATS_ENABLED = False
+# Log the per-request SQL statement statistics at info level; budget and N+1 warnings are always logged.
+SQL_STATS_LOG = True
+# Max number of SQL statements per request, above which a warning is logged; set to None for no limit.
+SQL_QUERY_BUDGET = None
+# Max number of SQL statements per request by endpoint name, e.g. {'all_questions': 2}; overrides SQL_QUERY_BUDGET.
+SQL_QUERY_BUDGETS = {}
+# Max number of executions of the same SQL statement per request, above which a possible N+1 query warning is logged;
+# set to None to disable.
+SQL_N_PLUS_ONE_THRESHOLD = 5
+
 # General
 
+# Json encoder for responses; 'orjson' (requires the orjson package), 'stdlib', or None to use orjson if installed and
+# the standard library json module otherwise.
+JSON_ENCODER = None
+# Sort the keys of json responses; unsorted is faster.
+JSON_SORT_KEYS = False
+
 # Max number of items per page.
 MAX_ITEMS_PER_PAGE = 50
 # Number of questions per page.
@@ -37,5 +76,81 @@ QUESTIONS_PER_PAGE = 10
 # Number of categories per page.
 CATEGORIES_PER_PAGE = 10
 
+# Seconds after which the in-process categories cache is reloaded from the database; set to None to never reload, or
+# 0 to disable caching.
+CATEGORIES_CACHE_TTL = 60
+
+# Response cache backend for the category and question GET endpoints; 'lru' for an in-process cache, 'sqlite' for a
+# cache shared by the worker processes on a host, or None to disable caching and ETags.
+# Note: with multiple worker processes, use 'sqlite' so changes made by any worker invalidate the cached responses;
+#       with 'lru', changes made by other workers are only seen once the cached responses expire.
+RESPONSE_CACHE = 'lru'
+# Max number of cached responses.
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+# Seconds after which a cached response expires, so changes made outside the application, e.g. by the data loader, are
+# seen; set to None to never expire.
+RESPONSE_CACHE_TTL = 60
+# Path of the 'sqlite' response cache database file; use a separate file per application database.
+RESPONSE_CACHE_PATH = os.path.join(tempfile.gettempdir(), 'trivia_response_cache.db')
+
+# Seconds after which the in-process question index is reloaded from the database; set to None to never reload.
+# Note: with multiple worker processes, questions added/deleted by other workers are only seen after a reload.
+QUESTION_INDEX_TTL = 300
+
+# Max number of cached questions, which are served by the question batch endpoint without reading the database; set to 0
+# to disable caching.
+QUESTION_CACHE_MAX_ENTRIES = 10000
+# Seconds after which a cached question expires; set to None to never expire.
+# Note: questions deleted by other worker processes are served from the cache until they expire.
+QUESTION_CACHE_TTL = 300
+# Max number of ids in a question batch request.
+QUESTION_BATCH_MAX_IDS = 500
+
+# Question search backend; 'database' to search in the database, 'index' to use an in-process inverted index, or None
+# to use the database on postgresql (which has the search indices) and the in-process index otherwise.
+# Note: the in-process index is reloaded as per QUESTION_INDEX_TTL.
+QUESTION_SEARCH_BACKEND = None
+
+# Number of questions inserted per transaction by a question import.
+QUESTION_IMPORT_CHUNK_SIZE = 1000
+# Max number of row errors reported by a question import.
+QUESTION_IMPORT_MAX_ERRORS = 100
+# Number of questions read from the database per batch by a question export.
+QUESTION_EXPORT_BATCH_SIZE = 1000
+
+# Max number of questions returned by a quiz request, e.g. to prefetch a quiz round; larger requests are limited to it.
+QUIZ_MAX_QUESTIONS = 50
+
+# Seconds of inactivity after which a quiz session expires; set to None to never expire.
+# Note: quiz sessions are held in-process, so requests for a session must be routed to the worker which created it.
+QUIZ_SESSION_TTL = 3600
+# Max number of quiz sessions held; the least recently used session is evicted when exceeded.
+QUIZ_SESSION_MAX = 10000
+# Max number of questions in a quiz session; set to None for all questions in the quiz category.
+QUIZ_SESSION_MAX_QUESTIONS = 500
+
+# Password hasher; 'pbkdf2' for PBKDF2-SHA256.
+PASSWORD_HASHER = 'pbkdf2'
+# Password hash cost; the number of iterations for 'pbkdf2'. Passwords hashed with a different cost are rehashed on login.
+PASSWORD_HASH_COST = 260000
+# Max number of concurrent password hash operations; further logins wait for one to complete.
+PASSWORD_HASH_WORKERS = 4
+# Max number of password hash operations running or waiting; further logins are rejected with 503 Service Unavailable.
+PASSWORD_HASH_MAX_PENDING = 64
+# Seconds for which a verified login is cached, so repeat logins skip the password hash; set to 0 to disable.
+PASSWORD_CACHE_TTL = 300
+# Max number of cached verified logins.
+PASSWORD_CACHE_MAX = 10000
+
+# Seconds between writes of buffered quiz results to the database; set to None to write quiz results immediately.
+# Note: buffered results are held in-process, and are written when the process exits normally.
+SCORE_FLUSH_INTERVAL = 1.0
+# Max number of users with buffered quiz results; results are written early when exceeded.
+SCORE_FLUSH_MAX_PENDING = 1000
+
+# Answer match tokenizer; 'nltk' to use the nltk tokenizer, or 'simple' to use a built-in whitespace tokenizer which
+# avoids importing nltk. Note: nltk is imported on first use in either case, not at startup.
+MATCH_TOKENIZER = 'nltk'
+
 # Additional path to ntlk data; set to None to use just the nltk installation default locations.
 NLTK_DATA_PATH = '../nltk_data'
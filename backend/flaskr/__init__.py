@@ -3,13 +3,14 @@ from http import HTTPStatus
 from flask import Flask
 from flask_cors import CORS
 
-from backend.flaskr.model import setup_db, Question, Category
+from backend.flaskr.model import setup_db, Question, Category, start_query_stats, report_query_stats
+from backend.flaskr.service import init_question_index
 from backend.flaskr.controller import (all_categories, category_by_id, questions_by_category_id, all_questions,
                                        question_by_id, create_question, search_questions, next_question, save_result,
-                                       login
+                                       login, start_quiz, quiz_session, metrics, import_questions,
+                                       export_questions, questions_batch
                                        )
 from backend.flaskr.util import *
-from backend import config
 
 
 def create_app(test_config=None):
@@ -18,20 +19,34 @@ def create_app(test_config=None):
     :param test_config:
     :return:
     """
+    if test_config is None:
+        # imported on demand, as the application configuration requires the database to be configured
+        from backend import config
+        test_config = config
+
     # create and configure the app
     app = Flask(__name__)
-    app.config.from_object(config if test_config is None else test_config)
+    app.config.from_object(test_config)
     set_config(app.config)
     setup_db(app)
 
+    with app.app_context():
+        init_question_index()
+
     cors = CORS(app, resources={r"/api/*": {"origins": "*"}})
 
+    @app.before_request
+    def before_request():
+        if app.config.get("SQL_STATS_ENABLED"):
+            start_query_stats()
+
     # CORS Headers
     @app.after_request
     def after_request(response):
         response.headers.add('Access-Control-Allow-Headers', 'Content-Type,Authorization,true')
         response.headers.add('Access-Control-Allow-Methods', 'GET,PATCH,POST,DELETE,OPTIONS')
-        return response
+        # SQL statement statistics, if enabled
+        return report_query_stats(response)
 
     # endpoint to handle GET requests for all available categories
     app.add_url_rule(CATEGORIES_URL, view_func=all_categories, methods=['GET'])
@@ -49,6 +64,14 @@ def create_app(test_config=None):
     # an endpoint to POST a new question
     app.add_url_rule(QUESTIONS_URL, view_func=create_question, methods=['POST'])
 
+    # POST endpoint to bulk import questions
+    app.add_url_rule(QUESTION_IMPORT_URL, view_func=import_questions, methods=['POST'])
+    # GET endpoint to stream an export of questions
+    app.add_url_rule(QUESTION_EXPORT_URL, view_func=export_questions, methods=['GET'])
+
+    # POST endpoint to get questions by id
+    app.add_url_rule(QUESTION_BATCH_URL, view_func=questions_batch, methods=['POST'])
+
     # POST endpoint to get questions based on a search term
     app.add_url_rule(QUESTION_SEARCH_URL, view_func=search_questions, methods=['POST'])
 
@@ -56,10 +79,17 @@ def create_app(test_config=None):
     app.add_url_rule(QUIZZES_URL, view_func=next_question, methods=['POST'])
     # endpoint to SAVE quiz results
     app.add_url_rule(QUIZ_RESULTS_URL, view_func=save_result, methods=['POST'])
+    # POST endpoint to start a quiz session
+    app.add_url_rule(QUIZ_SESSIONS_URL, view_func=start_quiz, methods=['POST'])
+    # endpoint to POST for next quiz session questions/DELETE a quiz session using a session token
+    app.add_url_rule(QUIZ_SESSION_URL, view_func=quiz_session, methods=['POST', 'DELETE'])
 
     # POST endpoint to login users
     app.add_url_rule(LOGIN_URL, view_func=login, methods=['POST'])
 
+    # GET endpoint to get application metrics
+    app.add_url_rule(METRICS_URL, view_func=metrics, methods=['GET'])
+
     # error handlers
     @app.errorhandler(HTTPStatus.BAD_REQUEST)
     def bad_request(error):
@@ -77,6 +107,10 @@ def create_app(test_config=None):
     def method_not_allowed(error):
         return http_error_result(HTTPStatus.METHOD_NOT_ALLOWED, error)
 
+    @app.errorhandler(HTTPStatus.UNSUPPORTED_MEDIA_TYPE)
+    def unsupported_media_type(error):
+        return http_error_result(HTTPStatus.UNSUPPORTED_MEDIA_TYPE, error)
+
     @app.errorhandler(HTTPStatus.UNPROCESSABLE_ENTITY)
     def unprocessable_entity(error):
         return http_error_result(HTTPStatus.UNPROCESSABLE_ENTITY, error)
@@ -1,7 +1,10 @@
 from .category_controller import all_categories, category_by_id, questions_by_category_id
-from .question_controller import all_questions, question_by_id, create_question, search_questions
+from .question_controller import (all_questions, question_by_id, create_question, search_questions,
+                                  import_questions, export_questions, questions_batch
+                                  )
 from .user_controller import login
-from .quiz_controller import next_question, save_result
+from .quiz_controller import next_question, save_result, start_quiz, quiz_session
+from .metrics_controller import metrics
 
 __all__ = [
     'all_categories',
@@ -12,9 +15,16 @@ __all__ = [
     'question_by_id',
     'create_question',
     'search_questions',
+    'import_questions',
+    'export_questions',
+    'questions_batch',
 
     'login',
 
     'next_question',
     'save_result',
+    'start_quiz',
+    'quiz_session',
+
+    'metrics',
 ]
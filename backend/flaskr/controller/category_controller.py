@@ -5,13 +5,15 @@ from flask_restful import abort
 from backend.flaskr.model import Category
 
 from backend.flaskr.util import (get_request_page, get_request_per_page, get_request_pagination, get_request_type,
-                                 pagination, success_result, key_or_alias,
+                                 page_offset, pagination, success_result, key_or_alias,
                                  paginated_success_result, categories_per_page, CATEGORY_RESPONSE_ALIASES, MAP_TYPE
                                  )
-from backend.flaskr.service import get_category_by_id, get_categories, QueryParam
+from backend.flaskr.service import get_category_by_id, get_categories, get_categories_version, QueryParam
 from .question_controller import qc_questions_by_category_id
+from .response_cache import cached_response
 
 
+@cached_response
 def all_categories():
     """
     Get all categories.
@@ -28,7 +30,12 @@ def all_categories():
     paginate = get_request_pagination()
     rsp_type = get_request_type()
 
-    total = get_categories(param=QueryParam.COUNT)
+    if paginate:
+        categories, total = get_categories(order_by=Category.id, offset=page_offset(page, per_page), limit=per_page,
+                                           param=QueryParam.GET_PAGE)
+    else:
+        categories = get_categories(order_by=Category.id, param=QueryParam.GET_ALL)
+        total = len(categories)
 
     if total > 0:
         if paginate:
@@ -43,10 +50,7 @@ def all_categories():
             per_page = None
             limit = total
 
-        categories = get_categories(order_by=Category.id, param=QueryParam.GET_ALL, offset=offset, limit=per_page)
-
     else:
-        categories = []
         offset = limit = 0
 
     if rsp_type == MAP_TYPE:
@@ -64,11 +68,14 @@ def all_categories():
             total=total,
             offset=offset,
             limit=limit,
-            aliases=CATEGORY_RESPONSE_ALIASES
+            aliases=CATEGORY_RESPONSE_ALIASES,
+            # additional elements
+            categories_version=get_categories_version()
         )
     else:
         result_args = {
-            key_or_alias("data", CATEGORY_RESPONSE_ALIASES): data
+            key_or_alias("data", CATEGORY_RESPONSE_ALIASES): data,
+            "categories_version": get_categories_version()
         }
         result = success_result(**result_args)
 
@@ -87,6 +94,7 @@ def _get_category_by_id(category_id: int):
     return category
 
 
+@cached_response
 def category_by_id(category_id: int):
     """
     Get a category.
@@ -97,6 +105,7 @@ def category_by_id(category_id: int):
     return success_result(category=category.format())
 
 
+@cached_response
 def questions_by_category_id(category_id: int):
     """
     Get questions for a category.
@@ -0,0 +1,17 @@
+from http import HTTPStatus
+
+from flask import abort
+
+from ..service import get_metrics
+from ..util import success_result, get_config
+
+
+def metrics():
+    """
+    Get the application metrics
+    :return:
+    """
+    if not get_config("METRICS_ENABLED"):
+        abort(HTTPStatus.NOT_FOUND.value)
+
+    return success_result(metrics=get_metrics())
@@ -1,19 +1,72 @@
+import io
 from http import HTTPStatus
+from itertools import chain
 
-from flask import request, make_response
+from flask import request, make_response, Response, stream_with_context
 from flask_restful import abort
 
 from ..model import Question, Category
 from ..service import (get_question_by_id, QueryParam, search_question_by_category_id, get_questions,
-                       get_categories_as_map, search_question_by_question_text, create_question as create_question_srvc,
-                       delete_question
+                       get_categories_as_map, get_categories_as_json, get_categories_version, find_questions,
+                       create_question as create_question_srvc, delete_question, get_questions_after,
+                       import_questions as import_questions_srvc, parse_ndjson, parse_csv,
+                       export_questions as export_questions_srvc, NDJSON_EXPORT, EXPORT_FORMATS,
+                       get_questions_by_ids
                        )
-from ..util import (get_request_page, get_request_per_page, pagination, success_result,
-                    paginated_success_result, questions_per_page, QUESTION_RESPONSE_ALIASES,
-                    QUESTION_SEARCH_TERM
+from ..util import (get_request_page, get_request_per_page, get_request_cursor, page_offset, pagination,
+                    success_result, paginated_success_result, cursor_success_result, encode_cursor,
+                    questions_per_page, QUESTION_RESPONSE_ALIASES, REQ_ARG_CURSOR,
+                    QUESTION_SEARCH_TERM, QUESTION_SEARCH_ANSWER, QUESTION_SEARCH_RANKED, NDJSON_MIMETYPES,
+                    CSV_MIMETYPES, REQ_ARG_FORMAT, REQ_ARG_CATEGORY, QUESTION_IDS, get_config
                     )
+from .response_cache import cached_response
 
 
+def _verify_pagination(page: int, per_page: int, total: int) -> (int, int):
+    """
+    Verify the requested page is valid.
+    :param page:        requested page
+    :param per_page:    items per page
+    :param total:       total number of items
+    :return: tuple of offset for start, limit for end, or abort if page is invalid
+    """
+    if total > 0:
+        offset, limit, code, msg = pagination(page, per_page, total)
+
+        if code != HTTPStatus.OK.value:
+            # pagination error
+            abort(code)
+    else:
+        offset = limit = 0
+
+    return offset, limit
+
+
+def _cursor_questions(after_id: int, per_page: int, category_id: int = None, **kwargs):
+    """
+    Get a page of questions using keyset pagination.
+    :param after_id:    id of the last question already returned, or 0 to start from the beginning
+    :param per_page:    number of entries per page
+    :param category_id: id of category, or None for all categories
+    :param kwargs:      optional additional entries to include
+    :return: cursor paginated list of questions
+    """
+    questions, more = get_questions_after(after_id, category_id=category_id, limit=per_page)
+
+    return cursor_success_result(
+        data=[question.format() for question in questions],
+        per_page=per_page,
+        cursor=request.args.get(REQ_ARG_CURSOR),
+        next_cursor=encode_cursor(questions[-1].id) if more else None,
+        aliases=QUESTION_RESPONSE_ALIASES,
+        # additional elements
+        categories=get_categories_as_json(),
+        categories_version=get_categories_version(),
+        **kwargs
+    )
+
+
+@cached_response
 def all_questions():
     """
     Get all questions.
@@ -24,24 +77,19 @@ def all_questions():
     Request arguments:
     page:       requested page number
     per_page:   number of entries per page
+    cursor:     cursor for keyset pagination; empty for the first page. Takes precedence over page
     """
-    page = get_request_page()
     per_page = get_request_per_page(questions_per_page())
+    after_id = get_request_cursor()
+    if after_id is not None:
+        return _cursor_questions(after_id, per_page)
 
-    total = get_questions(order_by=Question.id, param=QueryParam.COUNT)
-
-    if total > 0:
-        offset, limit, code, msg = pagination(page, per_page, total)
+    page = get_request_page()
 
-        if code != HTTPStatus.OK.value:
-            # pagination error
-            abort(code)
+    questions, total = get_questions(order_by=Question.id, offset=page_offset(page, per_page), limit=per_page,
+                                     param=QueryParam.GET_PAGE)
 
-        questions = get_questions(order_by=Question.id, param=QueryParam.GET_ALL, offset=offset, limit=per_page)
-
-    else:
-        questions = []
-        offset = limit = 0
+    offset, limit = _verify_pagination(page, per_page, total)
 
     return paginated_success_result(
         data=[question.format() for question in questions],
@@ -52,7 +100,8 @@ def all_questions():
         limit=limit,
         aliases=QUESTION_RESPONSE_ALIASES,
         # additional elements
-        categories=get_categories_as_map()
+        categories=get_categories_as_json(),
+        categories_version=get_categories_version()
     )
 
 
@@ -69,6 +118,7 @@ def _get_question_by_id(question_id: int):
     return question
 
 
+@cached_response
 def question_by_id(question_id: int):
     """
     Get a question.
@@ -98,25 +148,24 @@ def qc_questions_by_category_id(category: Category):
     Note: No category validity check is performed
     :param category:    category
     :return:
+
+    Request arguments:
+    page:       requested page number
+    per_page:   number of entries per page
+    cursor:     cursor for keyset pagination; empty for the first page. Takes precedence over page
     """
-    page = get_request_page()
     per_page = get_request_per_page(questions_per_page())
+    after_id = get_request_cursor()
+    if after_id is not None:
+        return _cursor_questions(after_id, per_page, category_id=category.id, current_category=category.id)
 
-    total = search_question_by_category_id(category.id, param=QueryParam.COUNT)
-
-    if total > 0:
-        offset, limit, code, msg = pagination(page, per_page, total)
+    page = get_request_page()
 
-        if code != HTTPStatus.OK.value:
-            # pagination error
-            abort(code)
+    questions, total = search_question_by_category_id(category.id, order_by=Question.id,
+                                                      offset=page_offset(page, per_page), limit=per_page,
+                                                      param=QueryParam.GET_PAGE)
 
-        questions = search_question_by_category_id(category.id, order_by=Question.id, offset=offset, limit=per_page,
-                                                   param=QueryParam.GET_ALL)
-
-    else:
-        questions = []
-        offset = limit = 0
+    offset, limit = _verify_pagination(page, per_page, total)
 
     return paginated_success_result(
         data=[question.format() for question in questions],
@@ -127,7 +176,8 @@ def qc_questions_by_category_id(category: Category):
         limit=limit,
         aliases=QUESTION_RESPONSE_ALIASES,
         # additional elements
-        categories=get_categories_as_map(),
+        categories=get_categories_as_json(),
+        categories_version=get_categories_version(),
         current_category=category.id
     )
 
@@ -144,6 +194,94 @@ def create_question():
         success_result(created=num_affected), HTTPStatus.CREATED)
 
 
+def import_questions():
+    """
+    Import questions.
+    :return: number of questions imported and failed, and row errors
+
+    Request body:
+    newline-delimited json (application/x-ndjson) with a question object per line, or
+    csv (text/csv) with a header row; each question has question, answer, category and difficulty fields, where
+    category is a category id or type
+    """
+    if request.mimetype in NDJSON_MIMETYPES:
+        parse = parse_ndjson
+    elif request.mimetype in CSV_MIMETYPES:
+        parse = parse_csv
+    else:
+        abort(HTTPStatus.UNSUPPORTED_MEDIA_TYPE.value,
+              detailed_message=f"Expected {', '.join(NDJSON_MIMETYPES + CSV_MIMETYPES)} content")
+
+    # the body is read as it is parsed, rather than being loaded into memory
+    stream = io.TextIOWrapper(request.stream, encoding=request.mimetype_params.get('charset', 'utf-8'),
+                              newline='' if parse == parse_csv else None)
+    try:
+        result = import_questions_srvc(parse(stream))
+    except UnicodeDecodeError:
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message="Invalid content encoding")
+
+    return success_result(**result)
+
+
+def export_questions():
+    """
+    Export questions.
+    The response is streamed as the questions are read from the database, so the whole question bank can be exported
+    without being held in memory.
+    :return: newline-delimited json with a question object per line, or csv with a header row
+
+    Request arguments:
+    format:         optional, 'ndjson' or 'csv'; default 'ndjson'
+    category:       optional, id of category to export
+    searchTerm:     optional, question search term
+    searchAnswer:   optional, also search answers; y/n, default n
+    """
+    export_format = request.args.get(REQ_ARG_FORMAT, NDJSON_EXPORT, type=str).lower()
+    if export_format not in EXPORT_FORMATS:
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f"Expected format of {', '.join(EXPORT_FORMATS)}")
+    category_id = request.args.get(REQ_ARG_CATEGORY, None, type=int)
+    if REQ_ARG_CATEGORY in request.args and category_id is None:
+        abort(HTTPStatus.BAD_REQUEST.value)
+    if category_id is not None and str(category_id) not in get_categories_as_map():
+        abort(HTTPStatus.NOT_FOUND.value)
+    search_term = request.args.get(QUESTION_SEARCH_TERM, None, type=str)
+    search_answer = request.args.get(QUESTION_SEARCH_ANSWER, 'n', type=str).lower() == 'y'
+
+    chunks = export_questions_srvc(export_format, category_id=category_id, search_term=search_term,
+                                   search_answer=search_answer)
+    # read the first batch before responding, so a database error is reported with an error status rather than
+    # as a truncated export
+    first = next(chunks, '')
+
+    mimetype = NDJSON_MIMETYPES[0] if export_format == NDJSON_EXPORT else CSV_MIMETYPES[0]
+    response = Response(stream_with_context(chain([first], chunks)), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=questions.{export_format}'
+    return response
+
+
+def questions_batch():
+    """
+    Get questions by id.
+    :return: list of questions in the requested order,
+             list of requested ids of questions which do not exist
+
+    Request body:
+    ids:    list of question ids; limited to QUESTION_BATCH_MAX_IDS ids
+    """
+    data = request.get_json()
+    ids = data.get(QUESTION_IDS) if isinstance(data, dict) else None
+    if not isinstance(ids, list) or \
+            not all([isinstance(question_id, int) and not isinstance(question_id, bool) for question_id in ids]):
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f"Expected {QUESTION_IDS} as a list of int")
+    max_ids = get_config("QUESTION_BATCH_MAX_IDS")
+    if len(ids) > max_ids:
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f"Too many {QUESTION_IDS}, max {max_ids}")
+
+    questions, missing = get_questions_by_ids(ids)
+
+    return success_result(questions=questions, missing=missing)
+
+
 def search_questions():
     """
     Search for questions.
@@ -157,29 +295,22 @@ def search_questions():
     per_page:   number of entries per page
 
     Request form:
-    searchTerm: question search term
+    searchTerm:     question search term
+    searchAnswer:   optional, also search answers; default false
+    ranked:         optional, order results by relevance; default false
     """
     page = get_request_page()
     per_page = get_request_per_page(questions_per_page())
 
     data = request.get_json()
     search_term = data[QUESTION_SEARCH_TERM] if QUESTION_SEARCH_TERM in data else ''
+    search_answer = data.get(QUESTION_SEARCH_ANSWER, False) is True
+    ranked = data.get(QUESTION_SEARCH_RANKED, False) is True
 
-    total = search_question_by_question_text(search_term, param=QueryParam.COUNT)
+    questions, total = find_questions(search_term, search_answer=search_answer, ranked=ranked,
+                                      offset=page_offset(page, per_page), limit=per_page)
 
-    if total > 0:
-        offset, limit, code, msg = pagination(page, per_page, total)
-
-        if code != HTTPStatus.OK.value:
-            # pagination error
-            abort(code)
-
-        questions = search_question_by_question_text(search_term, order_by=Question.id, offset=offset, limit=per_page,
-                                                     param=QueryParam.GET_ALL)
-
-    else:
-        questions = []
-        offset = limit = 0
+    offset, limit = _verify_pagination(page, per_page, total)
 
     return paginated_success_result(
         data=[question.format() for question in questions],
@@ -190,7 +321,8 @@ def search_questions():
         limit=limit,
         aliases=QUESTION_RESPONSE_ALIASES,
         # additional elements
-        categories=get_categories_as_map()
+        categories=get_categories_as_json(),
+        categories_version=get_categories_version()
     )
 
 
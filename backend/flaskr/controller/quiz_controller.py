@@ -1,52 +1,205 @@
 from http import HTTPStatus
+from typing import Optional, List
 
-from flask import request
+from flask import request, make_response
 from flask_restful import abort
-from sqlalchemy import and_, not_
 
-from ..model import Question, M_ID, M_PASSWORD
-from ..service import (QueryParam, get_random_questions, update_user_by_id
+from ..model import M_ID, M_PASSWORD, M_QUESTION, M_ANSWER, M_MATCH, M_NUM_CORRECT, M_NUM_QUESTIONS
+from ..service import (pick_quiz_round, add_user_score, start_quiz_session, get_quiz_session,
+                       end_quiz_session, next_session_questions, adaptive_difficulty, get_user_score
                        )
-from ..util import (get_request_arg, success_result, PREVIOUS_QUESTIONS, QUIZ_CATEGORY, REQ_ARG_NUM, USER_ID,
-                    NUM_CORRECT, NUM_QUESTIONS
+from ..util import (get_request_arg, get_config, success_result, PREVIOUS_QUESTIONS, QUIZ_CATEGORY, REQ_ARG_NUM,
+                    REQ_ARG_FORMAT, USER_ID, NUM_CORRECT, NUM_QUESTIONS, QUIZ_FULL_FORMAT, QUIZ_COMPACT_FORMAT,
+                    QUIZ_FORMATS, QUIZ_ADAPTIVE, QUIZ_SEED
                     )
 
+# Question fields in the compact format; those required to play a quiz.
+COMPACT_FIELDS = [M_ID, M_QUESTION, M_ANSWER, M_MATCH]
+
 
 def next_question():
     """
     Get next quiz question.
     :return: question
 
+    Request arguments:
+    num:    number of questions to return, e.g. a quiz round to prefetch; limited to QUIZ_MAX_QUESTIONS
+    format: optional, 'full' or 'compact'; default 'full'
+
     Request body:
     previous_questions: list of id's of previous questions
     quiz_category:      category id for quiz
+    adaptive:           optional, select the difficulty from the player's accuracy; default false
+    num_correct:        optional, number of questions the player answered correctly, for an adaptive selection
+    num_questions:      optional, number of questions the player answered, for an adaptive selection
+    user_id:            optional, id of user whose score is the player's accuracy, if num_correct and num_questions
+                        are not specified
+    seed:               optional, random seed for a repeatable selection
     """
     data = request.get_json()
-    num = get_request_arg(REQ_ARG_NUM, 1)
-    previous_questions = data[PREVIOUS_QUESTIONS] if PREVIOUS_QUESTIONS in data else []
+    num = _request_num()
+    compact = _request_compact()
+    previous_questions = _previous_questions(data)
     quiz_category = data[QUIZ_CATEGORY] if QUIZ_CATEGORY in data else None
+    seed = data.get(QUIZ_SEED)
+    if seed is not None and (not isinstance(seed, int) or isinstance(seed, bool)):
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f'Expected {QUIZ_SEED} data as int')
+    difficulty = _adaptive_difficulty(data) if data.get(QUIZ_ADAPTIVE, False) is True else None
+
+    selection = pick_quiz_round(category=_quiz_category_id(quiz_category), exclude=previous_questions, pick=num,
+                                difficulty=difficulty, seed=seed)
+
+    result = _selection_result(selection, num > 1, compact)
+    if difficulty is not None:
+        result['difficulty'] = difficulty
+    return success_result(**result)
+
+
+def _previous_questions(data: dict) -> List[int]:
+    """
+    Get the ids of the previous questions.
+    :param data:    request body
+    :return: list of ids, or abort if the ids are invalid
+    """
+    previous_questions = data.get(PREVIOUS_QUESTIONS)
+    if previous_questions is None:
+        return []
+    error = f'Expected {PREVIOUS_QUESTIONS} data as list of int'
+    if not isinstance(previous_questions, list):
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message=error)
+
+    ids = []
+    for question_id in previous_questions:
+        if isinstance(question_id, str) and question_id.isnumeric():
+            question_id = int(question_id)
+        if not isinstance(question_id, int) or isinstance(question_id, bool):
+            abort(HTTPStatus.BAD_REQUEST.value, detailed_message=error)
+        ids.append(question_id)
+    return ids
+
+
+def _adaptive_difficulty(data: dict) -> int:
+    """
+    Get the difficulty for an adaptive quiz selection.
+    :param data:    request body
+    :return: difficulty, or abort if the player's score is invalid
+    """
+    if NUM_CORRECT in data or NUM_QUESTIONS in data:
+        num_correct = data.get(NUM_CORRECT)
+        num_questions = data.get(NUM_QUESTIONS)
+    elif data.get(USER_ID) is not None:
+        user = get_user_score(data[USER_ID])
+        if user is None:
+            abort(HTTPStatus.NOT_FOUND.value)
+        num_correct = user[M_NUM_CORRECT]
+        num_questions = user[M_NUM_QUESTIONS]
+    else:
+        num_correct = num_questions = 0
+
+    for key, value in [(NUM_CORRECT, num_correct), (NUM_QUESTIONS, num_questions)]:
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f'Expected {key} data as non-negative int')
+    if num_correct > num_questions:
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f'{NUM_CORRECT} exceeds {NUM_QUESTIONS}')
+
+    return adaptive_difficulty(num_correct, num_questions)
+
+
+def _request_num() -> int:
+    """
+    Get the number of questions from the request arguments.
+    :return: number of questions, limited to QUIZ_MAX_QUESTIONS
+    """
+    return min(get_request_arg(REQ_ARG_NUM, 1), get_config("QUIZ_MAX_QUESTIONS"))
+
+
+def _request_compact() -> bool:
+    """
+    Get the compact format flag from the request arguments.
+    :return: True if the compact format was requested, or abort if the format is invalid
+    """
+    quiz_format = request.args.get(REQ_ARG_FORMAT, QUIZ_FULL_FORMAT, type=str).lower()
+    if quiz_format not in QUIZ_FORMATS:
+        abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f"Expected format of {', '.join(QUIZ_FORMATS)}")
+    return quiz_format == QUIZ_COMPACT_FORMAT
 
-    multi_sel = (num > 1)
 
-    # generate criteria list
-    criteria = [not_(Question.id.in_(previous_questions))]
+def _quiz_category_id(quiz_category: Optional[dict]) -> Optional[int]:
+    """
+    Get the category id for a quiz.
+    :param quiz_category:   category entity for quiz
+    :return: category id or None for all categories
+    """
+    category = None
     if quiz_category is not None and int(quiz_category[M_ID]) > 0:
-        criteria.append(Question.category == quiz_category[M_ID])
+        category = int(quiz_category[M_ID])
+    return category
 
-    selection = get_random_questions(
-        criteria=and_(*criteria) if len(criteria) > 1 else criteria[0],
-        pick=num, param=QueryParam.GET_ALL if multi_sel else QueryParam.GET_FIRST
-    )
 
-    if selection is not None:
+def _selection_result(selection: List[dict], multi_sel: bool, compact: bool) -> dict:
+    """
+    Generate the result entries for a selection of quiz questions.
+    :param selection:   selected formatted questions
+    :param multi_sel:   multiple selection flag
+    :param compact:     compact format flag; a list per field in COMPACT_FIELDS, rather than a list of questions
+    :return: result entries
+    """
+    if compact:
+        result = {'round': {field: [q[field] for q in selection] for field in COMPACT_FIELDS}}
+    elif len(selection) > 0:
         if multi_sel:
-            result = {'questions': [q.format() for q in selection]}
+            result = {'questions': selection}
         else:
-            result = {'question': selection[0].format()}
+            result = {'question': selection[0]}
     else:
+        # no more questions available
         result = dict()
+    return result
 
-    return success_result(**result)
+
+def start_quiz():
+    """
+    Start a quiz session.
+    :return: session token and number of questions in quiz
+
+    Request body:
+    quiz_category:      optional, category for quiz
+    """
+    data = request.get_json(silent=True)
+    quiz_category = data[QUIZ_CATEGORY] if data is not None and QUIZ_CATEGORY in data else None
+
+    session = start_quiz_session(category=_quiz_category_id(quiz_category))
+
+    return make_response(
+        success_result(session=session.token, total=session.total), HTTPStatus.CREATED)
+
+
+def quiz_session(token: str):
+    """
+    Get next quiz session question, or end a quiz session.
+    :param token:   session token
+    :return: question(s) or number of sessions ended
+
+    Request arguments:
+    num:    number of questions to return; limited to QUIZ_MAX_QUESTIONS
+    format: optional, 'full' or 'compact'; default 'full'
+    """
+    if request.method == 'DELETE':
+        if not end_quiz_session(token):
+            abort(HTTPStatus.NOT_FOUND.value)
+        response = success_result(deleted=1)
+    else:
+        session = get_quiz_session(token)
+        if session is None:
+            abort(HTTPStatus.NOT_FOUND.value)
+        num = _request_num()
+        compact = _request_compact()
+
+        selection = [question.format() for question in next_session_questions(session, num=num)]
+
+        response = success_result(remaining=session.remaining(), **_selection_result(selection, num > 1, compact))
+
+    return response
 
 
 def save_result():
@@ -67,10 +220,7 @@ def save_result():
     if user_id is None or num_correct is None or num_questions is None:
         abort(HTTPStatus.BAD_REQUEST.value, detailed_message="Invalid request")
 
-    user = update_user_by_id(user_id, {
-        NUM_CORRECT: num_correct,
-        NUM_QUESTIONS: num_questions
-    })
+    user = add_user_score(user_id, num_correct, num_questions)
     result = {
         'user': {k: v for k, v in user.items() if k != M_PASSWORD}
     }
@@ -0,0 +1,57 @@
+import hashlib
+from functools import wraps
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from flask import request, make_response, Response
+
+from ..service import get_response_cache, get_categories_version, CachedResponse
+
+
+def _cache_key() -> str:
+    # route and query arguments, in a canonical order
+    return f'{request.path}?{urlencode(sorted(request.args.items(multi=True)))}'
+
+
+def _etag(body: bytes) -> str:
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def cached_response(view):
+    """
+    Decorator to cache the successful GET responses of a view, and answer conditional requests.
+    The ETag is a digest of the response body, so a request with a current ETag in If-None-Match is answered with
+    304 Not Modified; from the cache without generating the response, if the response is cached.
+    :param view: view function
+    :return: decorated view function
+    """
+    @wraps(view)
+    def cached_view(*args, **kwargs):
+        cache = get_response_cache()
+        if cache is None or request.method != 'GET':
+            return view(*args, **kwargs)
+
+        # read the version before generating the response, so data changed meanwhile is stored as stale
+        version = cache.version()
+        key = f'{_cache_key()}#{get_categories_version()}'
+        cached = cache.get(key, version)
+        if cached is not None:
+            cache.count('hits')
+            response = Response(cached.body, mimetype=cached.mimetype)
+        else:
+            cache.count('misses')
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != HTTPStatus.OK.value or response.is_streamed:
+                return response
+            cache.set(key, version, CachedResponse(response.get_data(), response.mimetype))
+
+        etag = _etag(response.get_data())
+        if etag in request.if_none_match:
+            cache.count('not_modified')
+            response = Response(status=HTTPStatus.NOT_MODIFIED.value)
+        response.set_etag(etag)
+        # clients may store the response, but must revalidate it before use
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    return cached_view
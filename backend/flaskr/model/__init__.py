@@ -1,8 +1,12 @@
 from .models import (setup_db, Question, Category, User, AnyModel,
-                     M_ID, M_QUESTION, M_ANSWER, M_CATEGORY, M_DIFFICULTY, M_TYPE,
+                     M_ID, M_QUESTION, M_ANSWER, M_MATCH, M_CATEGORY, M_DIFFICULTY, M_TYPE,
                      M_USERNAME, M_PASSWORD, M_NUM_QUESTIONS, M_NUM_CORRECT,
                      QUESTION_FIELDS, CATEGORY_FIELDS, USER_FIELDS
                      )
+from .match import generate_match, generate_matches, ANS_MATCH_SEPARATOR
+from .pool import get_pool_metrics, PoolMetrics, TimedQueuePool
+from .query_stats import start_query_stats, get_query_stats, report_query_stats
+from .sqlite import sqlite_engine_options, is_sqlite, is_memory_sqlite
 
 __all__ = [
     "setup_db",
@@ -13,6 +17,7 @@ __all__ = [
     "M_ID",
     "M_QUESTION",
     "M_ANSWER",
+    "M_MATCH",
     "M_CATEGORY",
     "M_DIFFICULTY",
     "M_TYPE",
@@ -23,4 +28,16 @@ __all__ = [
     "QUESTION_FIELDS",
     "CATEGORY_FIELDS",
     "USER_FIELDS",
+    "generate_match",
+    "generate_matches",
+    "ANS_MATCH_SEPARATOR",
+    "get_pool_metrics",
+    "PoolMetrics",
+    "TimedQueuePool",
+    "start_query_stats",
+    "get_query_stats",
+    "report_query_stats",
+    "sqlite_engine_options",
+    "is_sqlite",
+    "is_memory_sqlite",
 ]
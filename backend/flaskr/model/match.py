@@ -0,0 +1,155 @@
+import re
+from functools import lru_cache
+from os import path
+from typing import Iterable, List, Tuple, FrozenSet, Optional
+
+ANS_MATCH_SEPARATOR = '%%%'
+__ANS_MATCH_SEP_REGEX__ = re.compile(rf'(.*){ANS_MATCH_SEPARATOR}(.*)')
+__NON_WS_REGEX__ = re.compile(r'\S+')           # any character which is not a whitespace character
+__NON_WORD_REGEX__ = re.compile(r'^\W+|\W+$')   # any leading/trailing character which is not a word character
+__CONTRACTION_REGEX__ = re.compile(r"^(.+?)('s|'re|'ve|'ll|'d|'m|n't)$")   # contraction split as per nltk
+
+STOPWORDS_LANGUAGE = 'english'
+# Max number of distinct answers whose match is memoized.
+MATCH_CACHE_SIZE = 4096
+
+# Tokenizers.
+NLTK_TOKENIZER = 'nltk'         # nltk word_tokenize
+SIMPLE_TOKENIZER = 'simple'     # built-in whitespace tokenizer, which doesn't require nltk to be imported
+
+__TOKENIZER__ = NLTK_TOKENIZER
+__NLTK_DATA_PATHS__ = []        # additional nltk data paths
+__NLTK__ = None                 # nltk module, imported on first use
+
+
+def configure_match(tokenizer: str = None, nltk_data_path: str = None):
+    """
+    Configure match generation.
+    :param tokenizer:       tokenizer to use; 'nltk' or 'simple'
+    :param nltk_data_path:  additional path to nltk data
+    """
+    global __TOKENIZER__
+
+    if nltk_data_path is not None and nltk_data_path not in __NLTK_DATA_PATHS__:
+        __NLTK_DATA_PATHS__.append(nltk_data_path)
+        if __NLTK__ is not None:
+            __NLTK__.data.path.append(nltk_data_path)
+
+    if tokenizer is not None:
+        if tokenizer not in [NLTK_TOKENIZER, SIMPLE_TOKENIZER]:
+            raise ValueError(f'Unknown match tokenizer: {tokenizer}')
+        if tokenizer != __TOKENIZER__:
+            __TOKENIZER__ = tokenizer
+            clear_match_cache()
+
+
+def _nltk():
+    """
+    Get the nltk module, importing it on first use as importing it is slow.
+    :return: nltk module
+    """
+    global __NLTK__
+
+    if __NLTK__ is None:
+        # https://github.com/nltk/nltk/wiki/Frequently-Asked-Questions-(Stackoverflow-Edition)#how-to-config-nltk-data-directory-from-code
+        import nltk
+        for data_path in __NLTK_DATA_PATHS__:
+            if data_path not in nltk.data.path:
+                nltk.data.path.append(data_path)
+        __NLTK__ = nltk
+    return __NLTK__
+
+
+def _read_stopwords() -> Optional[List[str]]:
+    # read the stopwords corpus file directly, if available, rather than importing nltk
+    for data_path in __NLTK_DATA_PATHS__:
+        filename = path.join(data_path, 'corpora', 'stopwords', STOPWORDS_LANGUAGE)
+        if path.isfile(filename):
+            with open(filename, encoding='utf-8') as fhandle:
+                return [line.strip() for line in fhandle if len(line.strip()) > 0]
+    return None
+
+
+def simple_tokenize(text: str) -> List[str]:
+    """
+    Split text into words on whitespace, splitting off contractions.
+    Note: nltk word_tokenize also splits off punctuation within words, so results may differ for such text.
+    :param text: text to tokenize
+    :return: list of tokens
+    """
+    tokens = []
+    for word in text.split():
+        contraction = __CONTRACTION_REGEX__.match(word)
+        tokens.extend(contraction.groups() if contraction else [word])
+    return tokens
+
+
+@lru_cache(maxsize=None)
+def get_stopwords() -> FrozenSet[str]:
+    """
+    Get the stopwords, which are read from the corpus on first use.
+    :return: set of stopwords
+    """
+    stopwords = _read_stopwords() if __TOKENIZER__ == SIMPLE_TOKENIZER else None
+    if stopwords is None:
+        stopwords = _nltk().corpus.stopwords.words(STOPWORDS_LANGUAGE)
+    return frozenset(stopwords)
+
+
+@lru_cache(maxsize=MATCH_CACHE_SIZE)
+def _match_words(answer_str: str) -> str:
+    """
+    Generate the match list for an answer, i.e. its words in lowercase, without punctuation or stopwords.
+    :param answer_str: answer to generate match list for
+    :return: space-separated list of words
+    """
+    stopwords = get_stopwords()
+
+    stripped = __NON_WS_REGEX__.sub(
+        lambda m: __NON_WORD_REGEX__.sub('', m.group()), answer_str)    # just words, no punctuation
+    tokenized_answer = simple_tokenize(stripped.lower()) if __TOKENIZER__ == SIMPLE_TOKENIZER else \
+        _nltk().word_tokenize(stripped.lower())
+
+    return " ".join([token for token in tokenized_answer if token not in stopwords])
+
+
+def generate_match(answer_str: str) -> (str, str):
+    """
+    Generate a match list for an answer.
+    (Based on https://github.com/nltk/nltk/wiki/Frequently-Asked-Questions-(Stackoverflow-Edition)#how-to-remove-stopwords-with-nltk)
+    :param answer_str: answer to generate match list for
+    :return: tuple of answer and match list
+    """
+    regex_match = __ANS_MATCH_SEP_REGEX__.match(answer_str)
+    if regex_match:
+        # use specified answer & match
+        answer = regex_match.group(1)
+        match = regex_match.group(2)
+    else:
+        # generate match
+        answer = answer_str
+        match = _match_words(answer_str)
+
+    return answer, match
+
+
+def generate_matches(answers: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Generate match lists for a batch of answers.
+    Each distinct answer is only processed once, regardless of the memoization cache size.
+    :param answers: answers to generate match lists for
+    :return: list of tuples of answer and match list, in the same order as `answers`
+    """
+    generated = {}
+    result = []
+    for answer_str in answers:
+        if answer_str not in generated:
+            generated[answer_str] = generate_match(answer_str)
+        result.append(generated[answer_str])
+    return result
+
+
+def clear_match_cache():
+    """ Clear the memoized stopwords and match lists. """
+    get_stopwords.cache_clear()
+    _match_words.cache_clear()
@@ -1,4 +1,3 @@
-import re
 from typing import NewType, Union
 
 from flask import Flask
@@ -6,11 +5,13 @@ from sqlalchemy import Column, String, Integer, ForeignKey, CheckConstraint
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
-import nltk
-from nltk import word_tokenize
-
 from backend.flaskr.util import MIN_DIFFICULTY, MAX_DIFFICULTY
 
+from .match import generate_match, configure_match, ANS_MATCH_SEPARATOR
+from .pool import pool_engine_options, get_pool_metrics
+from .sqlite import sqlite_engine_options, is_sqlite
+from .query_stats import instrument_queries
+
 db = SQLAlchemy()
 
 QUESTIONS_TABLE = 'questions'
@@ -36,10 +37,9 @@ QUESTION_FIELDS = [M_ID, M_QUESTION, M_ANSWER, M_MATCH, M_CATEGORY, M_DIFFICULTY
 CATEGORY_FIELDS = [M_ID, M_TYPE]
 USER_FIELDS = [M_ID, M_USERNAME, M_PASSWORD, M_NUM_QUESTIONS, M_NUM_CORRECT]
 
-ANS_MATCH_SEPARATOR = '%%%'
-__ANS_MATCH_SEP_REGEX__ = re.compile(rf'(.*){ANS_MATCH_SEPARATOR}(.*)')
-__NON_WS_REGEX__ = re.compile(r'\S+')           # any character which is not a whitespace character
-__NON_WORD_REGEX__ = re.compile(r'^\W+|\W+$')   # any leading/trailing character which is not a word character
+# question difficulty check constraint
+DIFFICULTY_CONSTRAINT = 'ck_questions_difficulty'
+DIFFICULTY_CHECK = f'{M_DIFFICULTY}>={MIN_DIFFICULTY} AND {M_DIFFICULTY}<={MAX_DIFFICULTY}'
 
 
 def setup_db(app: Flask, config: dict = None):
@@ -55,41 +55,27 @@ def setup_db(app: Flask, config: dict = None):
     if 'SQLALCHEMY_DATABASE_URI' not in app.config.keys() and 'SQLALCHEMY_BINDS' not in app.config.keys():
         raise EnvironmentError('Database not configured')
 
+    # explicit engine options take priority over the pool configuration options
+    engine_options = pool_engine_options(app.config)
+    engine_options.update(sqlite_engine_options(app.config.get('SQLALCHEMY_DATABASE_URI', '')))
+    engine_options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options
+
     db.app = app
     db.init_app(app)
 
-    # db.create_all()
-    migrate = Migrate(app, db)
-
-    # https://github.com/nltk/nltk/wiki/Frequently-Asked-Questions-(Stackoverflow-Edition)#how-to-config-nltk-data-directory-from-code
-    if app.config["NLTK_DATA_PATH"] is not None:
-        nltk.data.path.append(app.config["NLTK_DATA_PATH"])
-
+    # the app's engine is replaced if setup_db is called again, so instrument the current engine
+    with app.app_context():
+        get_pool_metrics().instrument(db.engine)
+    if app.config.get("SQL_STATS_ENABLED"):
+        instrument_queries()
 
-def generate_match(answer_str: str) -> (str, str):
-    """
-    Generate a match list for an answer.
-    (Based on https://github.com/nltk/nltk/wiki/Frequently-Asked-Questions-(Stackoverflow-Edition)#how-to-remove-stopwords-with-nltk)
-    :param answer_str: answer to generate match list for
-    """
-    regex_match = __ANS_MATCH_SEP_REGEX__.match(answer_str)
-    if regex_match:
-        # use specified answer & match
-        answer = regex_match.group(1)
-        match = regex_match.group(2)
-    else:
-        # generate match
-        stopwords = nltk.corpus.stopwords.words('english')
-
-        stripped = __NON_WS_REGEX__.sub(
-            lambda m: __NON_WORD_REGEX__.sub('', m.group()), answer_str)    # just words, no punctuation
-        tokenized_answer = word_tokenize(stripped.lower())
-        tokenized_no_stop = [token for token in tokenized_answer if token not in stopwords]
-
-        answer = answer_str
-        match = " ".join(tokenized_no_stop)
+    # db.create_all()
+    # sqlite can't alter constraints, so migrations recreate the table instead
+    migrate = Migrate(app, db, render_as_batch=is_sqlite(app.config.get('SQLALCHEMY_DATABASE_URI', '')))
 
-    return answer, match
+    # nltk is imported on first use, so just record the configuration
+    configure_match(tokenizer=app.config.get("MATCH_TOKENIZER"), nltk_data_path=app.config["NLTK_DATA_PATH"])
 
 
 class Question(db.Model):
@@ -109,7 +95,7 @@ class Question(db.Model):
     match = Column(String, nullable=False)
     category = Column(Integer, ForeignKey(f"{CATEGORIES_TABLE}.id"), nullable=False)
     category_info = db.relationship('Category')
-    difficulty = Column(Integer, CheckConstraint(f'{M_DIFFICULTY}>={MIN_DIFFICULTY} AND {M_DIFFICULTY}<={MAX_DIFFICULTY}'))
+    difficulty = Column(Integer, CheckConstraint(DIFFICULTY_CHECK, name=DIFFICULTY_CONSTRAINT))
 
     def __init__(self, question, answer, category, difficulty):
         self.question = question
@@ -0,0 +1,213 @@
+import time
+from bisect import bisect_left
+from threading import Lock
+from typing import List, Optional
+from weakref import WeakSet
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool, QueuePool
+
+# Upper bounds, in seconds, of the connection wait and hold time histogram buckets.
+TIME_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Mapping of configuration options to engine pool options.
+POOL_CONFIG_OPTIONS = {
+    'DB_POOL_SIZE': 'pool_size',
+    'DB_POOL_MAX_OVERFLOW': 'max_overflow',
+    'DB_POOL_TIMEOUT': 'pool_timeout',
+    'DB_POOL_RECYCLE': 'pool_recycle',
+    'DB_POOL_PRE_PING': 'pool_pre_ping',
+}
+# Pool options which only apply to a queue pool.
+QUEUE_POOL_OPTIONS = ['pool_size', 'max_overflow', 'pool_timeout']
+
+__CHECKOUT_START__ = 'checkout_start'   # connection record info key for the checkout time
+
+
+class Histogram(object):
+    """
+    Histogram of durations.
+    :param buckets: bucket upper bounds, in ascending order
+    """
+
+    def __init__(self, buckets: List[float] = None):
+        self.buckets = buckets if buckets is not None else TIME_BUCKETS
+        self._counts = [0] * (len(self.buckets) + 1)    # last bucket is overflow
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = Lock()
+
+    def observe(self, value: float):
+        """
+        Add an observation.
+        :param value: duration in seconds
+        """
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] = self._counts[index] + 1
+            self._sum = self._sum + value
+            self._max = max(self._max, value)
+
+    def snapshot(self) -> dict:
+        """
+        Get the current state of the histogram.
+        :return: dict with cumulative counts per bucket upper bound ('+Inf' for all), count, sum and max
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+            max_value = self._max
+        cumulative = 0
+        buckets = []
+        for upper, count in zip([str(bucket) for bucket in self.buckets] + ['+Inf'], counts):
+            cumulative = cumulative + count
+            buckets.append({'le': upper, 'count': cumulative})
+        return {
+            'buckets': buckets,
+            'count': cumulative,
+            'sum': round(total_sum, 6),
+            'max': round(max_value, 6),
+        }
+
+
+class PoolMetrics(object):
+    """
+    Connection pool metrics, collected via pool events.
+    """
+    COUNTERS = ['checkouts', 'checkins', 'timeouts', 'connects', 'closes', 'invalidations']
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counters = {counter: 0 for counter in PoolMetrics.COUNTERS}
+        self.wait_time = Histogram()    # time waiting to check out a connection
+        self.hold_time = Histogram()    # time a connection is checked out
+        self._engines = WeakSet()       # instrumented engines
+
+    def increment(self, counter: str):
+        with self._lock:
+            self._counters[counter] = self._counters[counter] + 1
+
+    def instrument(self, engine: Engine):
+        """
+        Collect metrics for an engine's pool.
+        Note: only the application's engine is instrumented, so the metrics are consistent with its pool status, and
+              other engines in the process, e.g. of scripts, are excluded.
+        :param engine: engine to instrument
+        """
+        with self._lock:
+            if engine in self._engines:
+                return
+            self._engines.add(engine)
+
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.metrics = self
+
+        # the listeners are retained when the pool is recreated
+        event.listen(engine, 'connect', self._on_connect)
+        event.listen(engine, 'close', self._on_close)
+        event.listen(engine, 'checkout', self._on_checkout)
+        event.listen(engine, 'checkin', self._on_checkin)
+        event.listen(engine, 'invalidate', self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.increment('connects')
+
+    def _on_close(self, dbapi_connection, connection_record):
+        self.increment('closes')
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.increment('checkouts')
+        connection_record.info[__CHECKOUT_START__] = time.perf_counter()
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.increment('checkins')
+        start = connection_record.info.pop(__CHECKOUT_START__, None)
+        if start is not None:
+            self.hold_time.observe(time.perf_counter() - start)
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        self.increment('invalidations')
+
+    def snapshot(self, pool: Pool = None) -> dict:
+        """
+        Get the current metrics.
+        :param pool: pool to include the current status of
+        :return: dict of metrics
+        """
+        with self._lock:
+            metrics = dict(self._counters)
+        # connection churn; connections opened and closed over the lifetime of the process
+        metrics['open_connections'] = metrics['connects'] - metrics['closes']
+        metrics['wait_time'] = self.wait_time.snapshot()
+        metrics['hold_time'] = self.hold_time.snapshot()
+        if isinstance(pool, QueuePool):
+            metrics['status'] = {
+                'size': pool.size(),
+                'checked_in': pool.checkedin(),
+                'checked_out': pool.checkedout(),
+                'overflow': pool.overflow(),
+                'max_overflow': pool._max_overflow,
+                'timeout': pool.timeout(),
+            }
+        elif pool is not None:
+            metrics['status'] = {
+                'pool': type(pool).__name__,
+            }
+        return metrics
+
+
+class TimedQueuePool(QueuePool):
+    """
+    Queue pool which records the time spent waiting to check out a connection.
+    """
+    metrics: Optional[PoolMetrics] = None
+    # log as a sqlalchemy pool, rather than under the application logger
+    _sqla_logger_namespace = 'sqlalchemy.pool.impl.QueuePool'
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.increment('timeouts')
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.wait_time.observe(time.perf_counter() - start)
+
+    def recreate(self):
+        # a pool is recreated on dispose, e.g. after the database restarts
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_engine_options(config: dict) -> dict:
+    """
+    Get the engine pool options from the configuration.
+    :param config:  application configuration
+    :return: engine options
+    """
+    options = {
+        option: config.get(name) for name, option in POOL_CONFIG_OPTIONS.items() if config.get(name) is not None
+    }
+    if str(config.get('SQLALCHEMY_DATABASE_URI', '')).startswith('sqlite'):
+        # sqlite uses a null pool, or a single connection pool for an in-memory database (see sqlite_engine_options),
+        # so the queue options don't apply
+        options = {option: value for option, value in options.items() if option not in QUEUE_POOL_OPTIONS}
+    else:
+        options['poolclass'] = TimedQueuePool
+    return options
+
+
+__POOL_METRICS__ = PoolMetrics()
+
+
+def get_pool_metrics() -> PoolMetrics:
+    """
+    Get the connection pool metrics.
+    :return: pool metrics
+    """
+    return __POOL_METRICS__
@@ -0,0 +1,132 @@
+import json
+import time
+from collections import Counter
+from typing import Optional
+
+from flask import g, has_app_context, current_app, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+__QUERY_STATS__ = '_query_stats'        # flask g attribute for the request statistics
+__STATEMENT_START__ = '_stats_start'    # execution context attribute for the statement start time
+
+# Savepoint statements aren't counted, as they are transaction control rather than queries; e.g. the tests run each
+# test in a savepoint, which is restarted whenever the application commits.
+SAVEPOINT_STATEMENTS = ('SAVEPOINT ', 'RELEASE SAVEPOINT ', 'ROLLBACK TO SAVEPOINT ')
+
+__INSTRUMENTED__ = False
+
+
+class QueryStats(object):
+    """
+    SQL statement statistics for a request.
+    """
+
+    def __init__(self):
+        self.statements = 0
+        self.duration = 0.0             # seconds executing statements
+        self.repeats = Counter()        # statement text -> number of executions
+
+    def add(self, statement: str, duration: float):
+        self.statements = self.statements + 1
+        self.duration = self.duration + duration
+        self.repeats[statement] = self.repeats[statement] + 1
+
+    def most_repeated(self) -> (Optional[str], int):
+        """
+        Get the most repeated statement.
+        :return: tuple of statement and number of executions
+        """
+        common = self.repeats.most_common(1)
+        return common[0] if len(common) > 0 else (None, 0)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and has_app_context() and g.get(__QUERY_STATS__) is not None and \
+            not statement.startswith(SAVEPOINT_STATEMENTS):
+        setattr(context, __STATEMENT_START__, time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, __STATEMENT_START__, None)
+    if start is not None and has_app_context():
+        stats = g.get(__QUERY_STATS__)
+        if stats is not None:
+            stats.add(statement, time.perf_counter() - start)
+
+
+def instrument_queries():
+    """
+    Collect per-request SQL statement statistics for all engines.
+    """
+    global __INSTRUMENTED__
+
+    if not __INSTRUMENTED__:
+        __INSTRUMENTED__ = True
+        # listen on the engine class, so any engine created for the application is included
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def start_query_stats():
+    """ Start collecting SQL statement statistics for the current request. """
+    setattr(g, __QUERY_STATS__, QueryStats())
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    """
+    Get the SQL statement statistics for the current request.
+    :return: statistics, or None if not being collected
+    """
+    return g.get(__QUERY_STATS__) if has_app_context() else None
+
+
+def query_budget(endpoint: Optional[str]) -> Optional[int]:
+    """
+    Get the max number of SQL statements for an endpoint.
+    :param endpoint: name of endpoint
+    :return: budget, or None if unlimited
+    """
+    budgets = current_app.config.get("SQL_QUERY_BUDGETS") or {}
+    return budgets.get(endpoint, current_app.config.get("SQL_QUERY_BUDGET"))
+
+
+def report_query_stats(response: Response) -> Response:
+    """
+    Report the SQL statement statistics for the current request, as a Server-Timing header and optionally a log line.
+    A warning is logged if the endpoint's query budget is exceeded, or a statement is repeated more than the
+    N+1 threshold.
+    :param response: response to the request
+    :return: response
+    """
+    stats = get_query_stats()
+    if stats is None:
+        return response
+
+    duration_ms = round(stats.duration * 1000, 3)
+    response.headers.add('Server-Timing', f'db;dur={duration_ms};desc="{stats.statements} statements"')
+
+    statement, repeats = stats.most_repeated()
+    record = {
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'statements': stats.statements,
+        'db_ms': duration_ms,
+        'max_repeats': repeats,
+    }
+    if current_app.config.get("SQL_STATS_LOG"):
+        current_app.logger.info(f'sql {json.dumps(record)}')
+
+    budget = query_budget(request.endpoint)
+    if budget is not None and stats.statements > budget:
+        current_app.logger.warning(
+            f'sql query budget exceeded {json.dumps({**record, "budget": budget})}')
+
+    threshold = current_app.config.get("SQL_N_PLUS_ONE_THRESHOLD")
+    if threshold is not None and repeats > threshold:
+        current_app.logger.warning(
+            f'sql possible N+1 {json.dumps({**record, "statement": " ".join(statement.split())})}')
+
+    return response
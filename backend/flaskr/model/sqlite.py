@@ -0,0 +1,112 @@
+import sqlite3
+from threading import Lock
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+
+from .pool import TimedQueuePool
+
+SQLITE_DIALECT = 'sqlite'
+# Seconds a connection waits for a lock held by another connection to a file database, before failing.
+SQLITE_BUSY_TIMEOUT = 30
+
+
+class MemoryConnection(sqlite3.Connection):
+    """
+    Connection to a process-wide in-memory database.
+    The connection is shared by all the engines using the database, e.g. the engine of each application instance
+    created by the tests, so it is not closed when an engine's pool is disposed or recycles connections.
+    """
+
+    def close(self):
+        pass
+
+
+__MEMORY_CONNECTIONS__: Dict[str, MemoryConnection] = {}
+__MEMORY_LOCK__ = Lock()
+
+__PRAGMAS_LISTENING__ = False
+__PRAGMAS_LOCK__ = Lock()
+
+
+def is_sqlite(uri: str) -> bool:
+    """
+    Check if a database uri is for sqlite.
+    :param uri: database uri
+    :return: True if sqlite
+    """
+    return make_url(str(uri)).get_backend_name() == SQLITE_DIALECT
+
+
+def is_memory_sqlite(uri: str) -> bool:
+    """
+    Check if a database uri is for an in-memory sqlite database, i.e. 'sqlite://' or 'sqlite:///:memory:'.
+    :param uri: database uri
+    :return: True if in-memory sqlite
+    """
+    url = make_url(str(uri))
+    return url.get_backend_name() == SQLITE_DIALECT and url.database in (None, '', ':memory:')
+
+
+def _memory_connection(uri: str) -> MemoryConnection:
+    with __MEMORY_LOCK__:
+        connection = __MEMORY_CONNECTIONS__.get(uri)
+        if connection is None:
+            connection = sqlite3.connect(':memory:', factory=MemoryConnection, check_same_thread=False)
+            __MEMORY_CONNECTIONS__[uri] = connection
+    return connection
+
+
+def _set_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+
+    cursor = dbapi_connection.cursor()
+    try:
+        # foreign keys are not enforced by default
+        cursor.execute('PRAGMA foreign_keys=ON')
+        if not isinstance(dbapi_connection, MemoryConnection):
+            # readers don't block the writer, and vice versa
+            cursor.execute('PRAGMA journal_mode=WAL')
+            cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT * 1000}')
+    finally:
+        cursor.close()
+
+
+def _listen_pragmas():
+    global __PRAGMAS_LISTENING__
+
+    with __PRAGMAS_LOCK__:
+        if not __PRAGMAS_LISTENING__:
+            # listen on the engine class, so connections of any engine are included
+            event.listen(Engine, 'connect', _set_pragmas)
+            __PRAGMAS_LISTENING__ = True
+
+
+def sqlite_engine_options(uri: str) -> dict:
+    """
+    Get the engine options for a sqlite database; for other databases there are no options.
+    All connections enforce foreign keys, and file database connections use write-ahead logging so requests reading
+    the database are not blocked by a request writing it.
+    An in-memory database lives for the lifetime of the process, and is shared by all the engines using it via a
+    single connection, so concurrent requests are serialized; use a file database for concurrent load tests.
+    :param uri: database uri
+    :return: engine options
+    """
+    if not is_sqlite(uri):
+        return {}
+
+    _listen_pragmas()
+
+    options = {}
+    if is_memory_sqlite(uri):
+        # one connection, which is checked out by one thread at a time
+        options['creator'] = lambda: _memory_connection(str(uri))
+        options['poolclass'] = TimedQueuePool
+        options['pool_size'] = 1
+        options['max_overflow'] = 0
+        # the connection is never replaced
+        options['pool_recycle'] = -1
+        options['pool_pre_ping'] = False
+    return options
@@ -1,8 +1,22 @@
-from .category_service import get_category_by_id, search_category_by_name, get_categories, get_categories_as_map
+from .category_service import (get_category_by_id, search_category_by_name, get_categories, get_categories_as_map,
+                               get_categories_as_json, get_categories_version, invalidate_categories
+                               )
 from .question_service import (get_question_by_id, get_questions, create_question, search_question_by_category_id,
-                               search_question_by_question_text, delete_question, get_random_questions
+                               search_question_by_question_text, delete_question,
+                               get_questions_after, find_questions, get_questions_by_ids,
+                               pick_quiz_round, adaptive_difficulty
                                )
-from .user_service import login_or_register_user, get_user_by_id, update_user_by_id
+from .question_cache import get_question_cache
+from .question_index import init_question_index
+from .question_import import import_questions, parse_ndjson, parse_csv
+from .question_export import export_questions, NDJSON_EXPORT, CSV_EXPORT, EXPORT_FORMATS
+from .quiz_session import start_quiz_session, get_quiz_session, end_quiz_session, next_session_questions
+from .user_service import login_or_register_user, get_user_by_id, update_user_by_id, add_user_score, get_user_score
+from .score_aggregator import shutdown_score_aggregator
+from .metrics_service import get_metrics
+from .response_cache import (get_response_cache, invalidate_responses, register_response_cache_backend, ResponseCache,
+                             CachedResponse
+                             )
 from .misc import QueryParam
 
 __all__ = [
@@ -10,18 +24,50 @@ __all__ = [
     'search_category_by_name',
     'get_categories',
     'get_categories_as_map',
+    'get_categories_as_json',
+    'get_categories_version',
+    'invalidate_categories',
 
     'get_question_by_id',
     'get_questions',
+    'get_questions_after',
+    'get_questions_by_ids',
     'create_question',
     'search_question_by_category_id',
     'search_question_by_question_text',
+    'find_questions',
     'delete_question',
-    'get_random_questions',
+    'pick_quiz_round',
+    'adaptive_difficulty',
+    'init_question_index',
+    'get_question_cache',
+    'import_questions',
+    'parse_ndjson',
+    'parse_csv',
+    'export_questions',
+    'NDJSON_EXPORT',
+    'CSV_EXPORT',
+    'EXPORT_FORMATS',
+
+    'start_quiz_session',
+    'get_quiz_session',
+    'end_quiz_session',
+    'next_session_questions',
 
     'login_or_register_user',
     'get_user_by_id',
     'update_user_by_id',
+    'add_user_score',
+    'get_user_score',
+    'shutdown_score_aggregator',
+
+    'get_metrics',
+
+    'get_response_cache',
+    'invalidate_responses',
+    'register_response_cache_backend',
+    'ResponseCache',
+    'CachedResponse',
 
     'QueryParam',
 ]
@@ -1,5 +1,6 @@
-from typing import Union, List, Optional
+from typing import Union, List, Optional, Tuple, Iterator
 
+from sqlalchemy import func, update, bindparam, insert, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from werkzeug.exceptions import ServiceUnavailable
@@ -7,9 +8,18 @@ from werkzeug.exceptions import ServiceUnavailable
 from .misc import QueryParam
 from .session_scope import SessionScope
 from ..model import AnyModel
+from ..model.models import db
 from ..util import print_exc_info
 
 
+def get_dialect_name() -> str:
+    """
+    Get the name of the database dialect, e.g. 'postgresql'.
+    :return: dialect name
+    """
+    return db.engine.dialect.name
+
+
 def get_by_id(model: AnyModel, entity_id: int) -> Optional[AnyModel]:
     """
     Get an entity from the database
@@ -30,17 +40,17 @@ def get_by_id(model: AnyModel, entity_id: int) -> Optional[AnyModel]:
 
 def get_entities(model: AnyModel, criteria=None, order_by=None, offset: int = 0, limit: int = None,
                  with_entities=None,
-                 param: QueryParam = QueryParam.GET_ALL) -> Union[AnyModel, List[AnyModel], int]:
+                 param: QueryParam = QueryParam.GET_ALL) -> Union[AnyModel, List[AnyModel], int, Tuple[List, int]]:
     """
     Search for entities.
     :param model:       SQLAlchemy model
     :param criteria:    orm criteria
-    :param order_by:
+    :param order_by:    order by criteria or list of criteria
     :param offset:      num records to skip
     :param limit:       max num records to return
-    :param with_entities:   entities to return
+    :param with_entities:   entity or list of entities to return
     :param param:       query result to return
-    :return: list of entities, entity, or count
+    :return: list of entities, entity, count, or tuple of list of entities and total count
     """
     # Do some sanity checks.
     if limit is not None and limit <= 0:
@@ -56,6 +66,8 @@ def get_entities(model: AnyModel, criteria=None, order_by=None, offset: int = 0,
         result = []
     elif param == QueryParam.COUNT:
         result = 0
+    elif param == QueryParam.GET_PAGE:
+        result = [], 0
     else:
         raise ValueError(f'QueryParam not supported: {param}')
 
@@ -63,11 +75,18 @@ def get_entities(model: AnyModel, criteria=None, order_by=None, offset: int = 0,
         query = model.query
 
         if with_entities is not None:
-            query = query.with_entities(with_entities)
+            query = query.with_entities(*with_entities) if isinstance(with_entities, (list, tuple)) \
+                else query.with_entities(with_entities)
         if criteria is not None:
             query = query.filter(criteria)
+
+        count_query = query
+
+        if param == QueryParam.GET_PAGE:
+            # count all matching records alongside each record, so the page and total are read in one query
+            query = query.add_columns(func.count().over())
         if order_by is not None:
-            query = query.order_by(order_by)
+            query = query.order_by(*order_by) if isinstance(order_by, (list, tuple)) else query.order_by(order_by)
         if offset > 0:
             query = query.offset(offset)
         if limit is not None:
@@ -79,6 +98,14 @@ def get_entities(model: AnyModel, criteria=None, order_by=None, offset: int = 0,
             result = query.all()
         elif param == QueryParam.COUNT:
             result = query.count()
+        elif param == QueryParam.GET_PAGE:
+            rows = query.all()
+            if len(rows) > 0:
+                result = [row[0] for row in rows] if with_entities is None else [row[:-1] for row in rows], \
+                         rows[0][-1]
+            elif offset > 0:
+                # past the end of the results, so no records to carry the total
+                result = [], count_query.count()
 
     except SQLAlchemyError:
         print_exc_info()
@@ -87,6 +114,85 @@ def get_entities(model: AnyModel, criteria=None, order_by=None, offset: int = 0,
     return result
 
 
+def get_entities_after(model: AnyModel, after_id: int, criteria=None, limit: int = None) -> Tuple[List, bool]:
+    """
+    Search for entities using keyset pagination, i.e. entities with an id greater than the last id already returned.
+    Unlike an offset, the database seeks directly to the start of the page using the primary key index, so late
+    pages are as fast as the first.
+    :param model:       SQLAlchemy model
+    :param after_id:    id of the last entity already returned, or 0 to start from the beginning
+    :param criteria:    orm criteria
+    :param limit:       max num records to return
+    :return: tuple of list of entities in id order, and flag indicating if more entities are available
+    """
+    # Do some sanity checks.
+    if limit is not None and limit <= 0:
+        raise ValueError(f'Invalid query limit: {limit}')
+    if after_id is None or after_id < 0:
+        raise ValueError(f'Invalid query after id: {after_id}')
+
+    try:
+        query = model.query.filter(model.id > after_id)
+
+        if criteria is not None:
+            query = query.filter(criteria)
+        query = query.order_by(model.id)
+        if limit is not None:
+            # read one extra record to see if there is another page
+            query = query.limit(limit + 1)
+
+        entities = query.all()
+
+    except SQLAlchemyError:
+        print_exc_info()
+        raise ServiceUnavailable()
+
+    more = limit is not None and len(entities) > limit
+    return entities[:limit] if more else entities, more
+
+
+def stream_entities(model: AnyModel, criteria=None, order_by=None, with_entities=None,
+                    batch_size: int = 1000) -> Iterator[List]:
+    """
+    Stream entities in batches.
+    The query uses a server-side cursor where the database supports it, so only a batch of records is held in memory
+    at a time, regardless of the number of matching records.
+    Note: the connection is held until the iterator is exhausted or closed.
+    :param model:       SQLAlchemy model
+    :param criteria:    orm criteria
+    :param order_by:    order by criteria or list of criteria
+    :param with_entities:   entity or list of entities to return
+    :param batch_size:  num records per batch
+    :return: iterator of lists of entities
+    """
+    if batch_size is None or batch_size <= 0:
+        raise ValueError(f'Invalid batch size: {batch_size}')
+
+    try:
+        query = model.query
+
+        if with_entities is not None:
+            query = query.with_entities(*with_entities) if isinstance(with_entities, (list, tuple)) \
+                else query.with_entities(with_entities)
+        if criteria is not None:
+            query = query.filter(criteria)
+        if order_by is not None:
+            query = query.order_by(*order_by) if isinstance(order_by, (list, tuple)) else query.order_by(order_by)
+
+        batch = []
+        for entity in query.yield_per(batch_size):
+            batch.append(entity)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if len(batch) > 0:
+            yield batch
+
+    except SQLAlchemyError:
+        print_exc_info()
+        raise ServiceUnavailable()
+
+
 def create_entity(model: AnyModel, session_scope: SessionScope = None) -> int:
     """
     Create an entity
@@ -103,6 +209,65 @@ def create_entity(model: AnyModel, session_scope: SessionScope = None) -> int:
     return session_scope.op_result()
 
 
+def _insert_entities(model: AnyModel, session: Session, rows: List[dict], returning: List[str] = None,
+                     lookup: str = None) -> List[dict]:
+    """
+    Insert a batch of entities
+    :param model:       SQLAlchemy model
+    :param rows:        list of dicts of field values, all with the same fields
+    :param returning:   names of fields to return for the inserted entities
+    :param lookup:      name of unique field used to read back the inserted entities, if RETURNING is not supported
+    :return: list of inserted entities as field name/value dicts of the `returning` fields
+    """
+    table = model.__table__
+    if returning is None:
+        # one statement executed with many parameter sets
+        session.execute(insert(table), rows)
+        return []
+
+    columns = [table.c[field] for field in returning]
+    if session.bind.dialect.full_returning:
+        # single multi-row statement, single round trip
+        result = session.execute(insert(table).values(rows).returning(*columns)).all()
+    else:
+        # read back in the same transaction
+        session.execute(insert(table), rows)
+        result = session.execute(
+            select(*columns).where(table.c[lookup].in_([row[lookup] for row in rows]))).all()
+
+    return [dict(row._mapping) for row in result]
+
+
+def insert_entities(model: AnyModel, rows: List[dict], returning: List[str] = None, lookup: str = None,
+                    session_scope: SessionScope = None) -> List[dict]:
+    """
+    Insert a batch of entities, in a single transaction
+    :param model:       SQLAlchemy model
+    :param rows:        list of dicts of field values, all with the same fields
+    :param returning:   names of fields to return for the inserted entities
+    :param lookup:      name of unique field used to read back the inserted entities, if RETURNING is not supported
+    :param session_scope:   scoped session
+    :return: list of inserted entities as field name/value dicts of the `returning` fields
+    """
+    if len(rows) == 0:
+        return []
+
+    session_scope = SessionScope.select_scope(session_scope)
+    if session_scope.is_single_use():
+        # Just for this operation, so create a scope.
+        with session_scope.scope() as session:
+            session_scope.add_result(
+                _insert_entities(model, session, rows, returning=returning, lookup=lookup)
+            )
+    else:
+        # Already scoped, use existing.
+        session_scope.add_result(
+            _insert_entities(model, session_scope.session(), rows, returning=returning, lookup=lookup)
+        )
+
+    return session_scope.op_result()
+
+
 def _get_entity(model: AnyModel, session: Session, criteria=None,
                 param: QueryParam = QueryParam.GET_ALL) -> Union[AnyModel, List, int]:
     """
@@ -197,6 +362,117 @@ def update_entity(model: AnyModel, updates: dict, criteria=None, session_scope:
     return session_scope.op_result()
 
 
+def _increment_entity(model: AnyModel, session: Session, increments: dict, criteria=None,
+                      updates: dict = None) -> List[dict]:
+    """
+    Atomically increment numeric fields of entities
+    :param model:       SQLAlchemy model
+    :param increments:  amounts to add to fields, as field name/amount pairs
+    :param criteria:    entity filter criteria
+    :param updates:     optional values to set, as field name/value pairs
+    :return: list of updated entities as field name/value dicts
+    """
+    # the increment is evaluated by the database, so concurrent increments are never lost
+    values = {**(updates if updates is not None else {}),
+              **{key: getattr(model, key) + amount for key, amount in increments.items()}}
+    statement = update(model).values(**values).execution_options(synchronize_session=False)
+    if criteria is not None:
+        statement = statement.where(criteria)
+
+    if session.bind.dialect.full_returning:
+        # single round trip
+        result = [dict(row._mapping) for row in
+                  session.execute(statement.returning(*model.__table__.columns)).all()]
+    else:
+        # read back in the same transaction
+        session.execute(statement)
+        select_query = session.query(*model.__table__.columns)
+        if criteria is not None:
+            select_query = select_query.filter(criteria)
+        result = [dict(row._mapping) for row in select_query.all()]
+
+    return result
+
+
+def increment_entity(model: AnyModel, increments: dict, criteria=None, updates: dict = None,
+                     session_scope: SessionScope = None) -> List[dict]:
+    """
+    Atomically increment numeric fields of entities, i.e. UPDATE ... SET field = field + amount ... RETURNING
+    :param model:       SQLAlchemy model
+    :param increments:  amounts to add to fields, as field name/amount pairs
+    :param criteria:    entity filter criteria
+    :param updates:     optional values to set, as field name/value pairs
+    :param session_scope:   scoped session
+    :return: list of updated entities as field name/value dicts
+    """
+    session_scope = SessionScope.select_scope(session_scope)
+    if session_scope.is_single_use():
+        # Just for this operation, so create a scope.
+        with session_scope.scope() as session:
+            session_scope.add_result(
+                _increment_entity(model, session, increments, criteria=criteria, updates=updates)
+            )
+    else:
+        # Already scoped, use existing.
+        session_scope.add_result(
+            _increment_entity(model, session_scope.session(), increments, criteria=criteria, updates=updates)
+        )
+
+    return session_scope.op_result()
+
+
+def _increment_entities(model: AnyModel, session: Session, increments: List[dict], key: str = 'id') -> int:
+    """
+    Atomically increment numeric fields of a batch of entities
+    :param model:       SQLAlchemy model
+    :param increments:  list of dicts of key field value and amounts to add to fields, all with the same fields
+    :param key:         name of key field identifying entities
+    :return: number of entities in batch
+    """
+    fields = [field for field in increments[0].keys() if field != key]
+    for entry in increments:
+        if entry.keys() != increments[0].keys():
+            raise ValueError(f'Inconsistent increment fields: {list(entry.keys())}')
+
+    # one statement executed with many parameter sets; bind names must differ from the column names
+    table = model.__table__
+    statement = update(table) \
+        .where(table.c[key] == bindparam(f'b_{key}')) \
+        .values(**{field: table.c[field] + bindparam(f'b_{field}') for field in fields})
+    session.execute(statement, [{f'b_{field}': value for field, value in entry.items()} for entry in increments])
+
+    return len(increments)
+
+
+def increment_entities(model: AnyModel, increments: List[dict], key: str = 'id',
+                       session_scope: SessionScope = None) -> int:
+    """
+    Atomically increment numeric fields of a batch of entities, in a single transaction
+    :param model:       SQLAlchemy model
+    :param increments:  list of dicts of key field value and amounts to add to fields, all with the same fields
+    :param key:         name of key field identifying entities
+    :param session_scope:   scoped session
+    :return: number of entities in batch
+    """
+    if len(increments) == 0:
+        return 0
+
+    session_scope = SessionScope.select_scope(session_scope)
+    if session_scope.is_single_use():
+        # Just for this operation, so create a scope.
+        with session_scope.scope() as session:
+            session_scope.add_result(
+                _increment_entities(model, session, increments, key=key)
+            )
+    else:
+        # Already scoped, use existing.
+        session_scope.add_result(
+            _increment_entities(model, session_scope.session(), increments, key=key)
+        )
+
+    return session_scope.op_result()
+
+
 def _delete_entity(model: AnyModel, session: Session) -> int:
     """
     Delete an entity.
@@ -0,0 +1,108 @@
+import time
+from threading import Lock
+from typing import Optional
+
+from backend.flaskr.model import Category
+from backend.flaskr.util import get_config, is_configured, get_json_encoder, JsonFragment
+
+from .base_service import get_entities
+from .misc import QueryParam
+
+
+class CategoriesCache(object):
+    """
+    In-process cache of all categories.
+    The cache version is incremented whenever a reload finds the categories have changed.
+    :param ttl: seconds after which the cache is reloaded from the database, None to never reload, or 0 to disable
+                caching
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self.version = 0
+        self._lock = Lock()
+        self._categories = {}   # id -> detached category
+        self._map = {}          # str(id) -> type
+        self._json = None       # serialized map
+        self._loaded_at = None
+
+    def is_enabled(self) -> bool:
+        return self.ttl is None or self.ttl > 0
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or \
+            (self.ttl is not None and time.monotonic() - self._loaded_at > self.ttl)
+
+    def load(self):
+        """
+        Load the cache from the database.
+        :return:
+        """
+        categories = {}
+        for category in get_entities(Category, order_by=Category.id, param=QueryParam.GET_ALL):
+            # copies are not bound to a session, so are unaffected by session commits/closes
+            copy = Category(category.type)
+            copy.id = category.id
+            categories[copy.id] = copy
+        category_map = {k: v for k, v in [category.map_kv() for category in categories.values()]}
+
+        with self._lock:
+            if category_map != self._map:
+                self.version = self.version + 1
+            self._categories = categories
+            self._map = category_map
+            self._json = None
+            self._loaded_at = time.monotonic()
+
+    def ensure_loaded(self):
+        """ Load the cache if it has not been loaded or is stale. """
+        if self.is_stale():
+            self.load()
+
+    def invalidate(self):
+        """ Invalidate the cache, so it will be reloaded on next use. """
+        with self._lock:
+            self._loaded_at = None
+
+    def get(self, category_id: int) -> Optional[Category]:
+        """
+        Get a category.
+        :param category_id: id of category
+        :return: category or None if category does not exist
+        """
+        self.ensure_loaded()
+        return self._categories.get(category_id)
+
+    def as_map(self) -> dict:
+        """
+        Get all categories as a map with id as the key.
+        Note: the map is shared, and must not be modified.
+        :return: map of categories
+        """
+        self.ensure_loaded()
+        return self._map
+
+    def as_json(self) -> JsonFragment:
+        """
+        Get all categories as a serialized map with id as the key.
+        The map is serialized once per load, rather than for every response which includes it.
+        :return: json fragment
+        """
+        self.ensure_loaded()
+        with self._lock:
+            if self._json is None:
+                self._json = JsonFragment(get_json_encoder().dumps(self._map))
+            return self._json
+
+
+__CATEGORIES_CACHE__: CategoriesCache = CategoriesCache()
+
+
+def get_categories_cache() -> CategoriesCache:
+    """
+    Get the categories cache.
+    :return: categories cache
+    """
+    if is_configured():
+        __CATEGORIES_CACHE__.ttl = get_config("CATEGORIES_CACHE_TTL")
+    return __CATEGORIES_CACHE__
@@ -1,6 +1,9 @@
 from backend.flaskr.model import Category
+from backend.flaskr.util import JsonFragment, get_json_encoder
 from .base_service import get_by_id, get_entities
+from .category_cache import get_categories_cache
 from .misc import QueryParam
+from .response_cache import invalidate_responses
 
 
 def get_category_by_id(category_id: int):
@@ -9,7 +12,8 @@ def get_category_by_id(category_id: int):
     :param category_id: id of category
     :return: category or None if category does not exist
     """
-    return get_by_id(Category, category_id)
+    cache = get_categories_cache()
+    return cache.get(category_id) if cache.is_enabled() else get_by_id(Category, category_id)
 
 
 def get_categories(criteria=None, order_by=None, offset: int = 0, limit: int = None,
@@ -29,10 +33,49 @@ def get_categories(criteria=None, order_by=None, offset: int = 0, limit: int = N
 def get_categories_as_map():
     """
     Get all categories as a map with id as the key.
+    Note: the map may be shared, and must not be modified.
     :return: map of categories
     """
-    categories = get_entities(Category)
-    return {k: v for k, v in [category.map_kv() for category in categories]}
+    cache = get_categories_cache()
+    if cache.is_enabled():
+        category_map = cache.as_map()
+    else:
+        categories = get_entities(Category)
+        category_map = {k: v for k, v in [category.map_kv() for category in categories]}
+    return category_map
+
+
+def get_categories_as_json() -> JsonFragment:
+    """
+    Get all categories as a serialized map with id as the key, for inclusion in a result.
+    :return: json fragment
+    """
+    cache = get_categories_cache()
+    if cache.is_enabled():
+        fragment = cache.as_json()
+    else:
+        fragment = JsonFragment(get_json_encoder().dumps(get_categories_as_map()))
+    return fragment
+
+
+def get_categories_version() -> int:
+    """
+    Get the categories version, which changes whenever the categories change.
+    :return: version
+    """
+    cache = get_categories_cache()
+    if cache.is_enabled():
+        cache.ensure_loaded()
+    return cache.version
+
+
+def invalidate_categories():
+    """
+    Invalidate any cached categories; required following changes to the categories.
+    :return:
+    """
+    get_categories_cache().invalidate()
+    invalidate_responses()
 
 
 def search_category_by_name(category_name: str):
@@ -0,0 +1,17 @@
+from ..model import get_pool_metrics
+from ..model.models import db
+from .question_cache import get_question_cache
+from .response_cache import get_response_cache
+
+
+def get_metrics() -> dict:
+    """
+    Get the application metrics.
+    :return: dict of metrics
+    """
+    cache = get_response_cache()
+    return {
+        'pool': get_pool_metrics().snapshot(db.engine.pool),
+        'response_cache': cache.stats() if cache is not None else None,
+        'question_cache': get_question_cache().stats(),
+    }
@@ -5,6 +5,7 @@ class QueryParam(Enum):
     GET_FIRST = 1
     GET_ALL = 2
     COUNT = 3
+    GET_PAGE = 6    # Get a page of results and the total count of all results.
 
     UPDATE_SET = 4  # Set values during an update.
     UPDATE_ADD = 5  # Add to existing values during an update.
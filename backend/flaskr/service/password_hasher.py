@@ -0,0 +1,251 @@
+import abc
+import hashlib
+import inspect
+import hmac
+import secrets
+import time
+from collections import OrderedDict
+from threading import Lock, BoundedSemaphore
+from typing import Optional, Callable, Dict
+
+from werkzeug.exceptions import ServiceUnavailable
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from backend.flaskr.util import get_config, is_configured
+
+
+class PasswordHasher(abc.ABC):
+    """
+    Password hasher interface.
+    """
+
+    @abc.abstractmethod
+    def hash(self, password: str) -> str:
+        """
+        Hash a password.
+        :param password:    password
+        :return: hashed password, including the hash parameters and salt
+        """
+
+    @abc.abstractmethod
+    def verify(self, password: str, hashed: str) -> bool:
+        """
+        Verify a password.
+        :param password:    password
+        :param hashed:      hashed password
+        :return: True if the password matches
+        """
+
+    @abc.abstractmethod
+    def is_hash(self, value: str) -> bool:
+        """
+        Check if a stored value was hashed by this hasher.
+        :param value:   stored value
+        :return: True if value is a hash
+        """
+
+    @abc.abstractmethod
+    def needs_rehash(self, hashed: str) -> bool:
+        """
+        Check if a hashed password was hashed with different parameters, e.g. a lower cost.
+        :param hashed:  hashed password
+        :return: True if the password should be rehashed
+        """
+
+
+class Pbkdf2Hasher(PasswordHasher):
+    """
+    PBKDF2-SHA256 password hasher.
+    :param iterations:  number of iterations, i.e. the cost
+    """
+    METHOD = 'pbkdf2:sha256'
+
+    def __init__(self, iterations: int = 260000):
+        self.iterations = iterations
+
+    def hash(self, password: str) -> str:
+        return generate_password_hash(password, method=f'{self.METHOD}:{self.iterations}', salt_length=16)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return check_password_hash(hashed, password)
+
+    def is_hash(self, value: str) -> bool:
+        return value.startswith(f'{self.METHOD}:') and value.count('$') == 2
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return not hashed.startswith(f'{self.METHOD}:{self.iterations}$')
+
+
+# Password hashers by name; the factories take the configured cost.
+__PASSWORD_HASHERS__: Dict[str, Callable[[int], PasswordHasher]] = {
+    'pbkdf2': Pbkdf2Hasher,
+}
+
+
+def register_password_hasher(name: str, factory: Callable[[int], PasswordHasher]):
+    """
+    Register a password hasher.
+    :param name:    name of hasher
+    :param factory: function taking the cost and returning a hasher
+    """
+    if inspect.isclass(factory) and inspect.isabstract(factory):
+        raise TypeError(f'Password hasher {factory.__name__} does not implement {PasswordHasher.__name__}')
+    __PASSWORD_HASHERS__[name] = factory
+
+
+class VerifiedCredentialCache(object):
+    """
+    Short-lived cache of verified credentials, so repeated logins don't repeat the slow password hash.
+    Entries are keyed by username, and hold a keyed digest of the password and stored hash rather than the password.
+    The digest key is random per process, so the digests are of no use outside the process.
+    :param ttl:         seconds for which a verified credential is cached
+    :param max_entries: max number of entries; the least recently used entry is evicted when exceeded
+    """
+
+    def __init__(self, ttl: float = 300, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._key = secrets.token_bytes(32)
+        self._lock = Lock()
+        self._entries = OrderedDict()   # username -> (digest, verified at)
+
+    def _digest(self, username: str, password: str, hashed: str) -> bytes:
+        # the stored hash is included, so a password change invalidates the entry
+        return hmac.new(self._key, '\0'.join([username, password, hashed]).encode(), hashlib.sha256).digest()
+
+    def is_verified(self, username: str, password: str, hashed: str) -> bool:
+        """
+        Check if a credential was recently verified.
+        :param username:    username
+        :param password:    password
+        :param hashed:      stored hashed password
+        :return: True if verified
+        """
+        if self.ttl is None or self.ttl <= 0:
+            return False
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is None:
+                return False
+            if time.monotonic() - entry[1] > self.ttl:
+                del self._entries[username]
+                return False
+        return hmac.compare_digest(entry[0], self._digest(username, password, hashed))
+
+    def add(self, username: str, password: str, hashed: str):
+        """
+        Add a verified credential.
+        :param username:    username
+        :param password:    password
+        :param hashed:      stored hashed password
+        """
+        if self.ttl is None or self.ttl <= 0:
+            return
+        digest = self._digest(username, password, hashed)
+        with self._lock:
+            self._entries[username] = (digest, time.monotonic())
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class PasswordService(object):
+    """
+    Password hashing and verification, with the number of concurrent slow hash operations bounded.
+    Note: the hash runs in the request thread, which waits for it; the hash functions release the GIL, so other
+          requests continue meanwhile, and the bound stops concurrent logins from starving them of CPU.
+    :param hasher:      password hasher
+    :param workers:     max number of concurrent hash operations; further operations wait
+    :param max_pending: max number of hash operations running or waiting; further requests are rejected
+    :param cache:       verified credential cache
+    """
+
+    def __init__(self, hasher: PasswordHasher, workers: int = 4, max_pending: int = 64,
+                 cache: VerifiedCredentialCache = None):
+        self.hasher = hasher
+        self.cache = cache if cache is not None else VerifiedCredentialCache(ttl=0)
+        self._running = BoundedSemaphore(workers)
+        self._pending = BoundedSemaphore(max_pending)
+        self.config = None      # configuration the service was created from
+
+    def _run(self, func: Callable, *args):
+        if not self._pending.acquire(blocking=False):
+            raise ServiceUnavailable(description='Too many pending logins')
+        try:
+            with self._running:
+                return func(*args)
+        finally:
+            self._pending.release()
+
+    def hash(self, password: str) -> str:
+        """
+        Hash a password.
+        :param password:    password
+        :return: hashed password
+        """
+        return self._run(self.hasher.hash, password)
+
+    def is_hash(self, value: str) -> bool:
+        return self.hasher.is_hash(value)
+
+    def needs_rehash(self, hashed: str) -> bool:
+        return not self.hasher.is_hash(hashed) or self.hasher.needs_rehash(hashed)
+
+    def verify(self, username: str, password: str, stored: str) -> bool:
+        """
+        Verify a password.
+        :param username:    username
+        :param password:    password
+        :param stored:      stored password; a hash or, for rows not yet migrated, plaintext
+        :return: True if the password matches
+        """
+        if not self.hasher.is_hash(stored):
+            # legacy plaintext
+            return hmac.compare_digest(stored.encode(), password.encode())
+
+        if self.cache.is_verified(username, password, stored):
+            return True
+        verified = self._run(self.hasher.verify, password, stored)
+        if verified:
+            self.cache.add(username, password, stored)
+        return verified
+
+
+__PASSWORD_SERVICE__: Optional[PasswordService] = None
+__PASSWORD_SERVICE_LOCK__ = Lock()
+
+
+def _password_config() -> tuple:
+    if is_configured():
+        config = (get_config("PASSWORD_HASHER"), get_config("PASSWORD_HASH_COST"), get_config("PASSWORD_HASH_WORKERS"),
+                  get_config("PASSWORD_HASH_MAX_PENDING"), get_config("PASSWORD_CACHE_TTL"),
+                  get_config("PASSWORD_CACHE_MAX"))
+    else:
+        config = ('pbkdf2', 260000, 4, 64, 300, 10000)
+    return config
+
+
+def get_password_service() -> PasswordService:
+    """
+    Get the password service, creating it from the application configuration if required.
+    :return: password service
+    """
+    global __PASSWORD_SERVICE__
+
+    config = _password_config()
+    with __PASSWORD_SERVICE_LOCK__:
+        if __PASSWORD_SERVICE__ is None or __PASSWORD_SERVICE__.config != config:
+            name, cost, workers, max_pending, cache_ttl, cache_max = config
+            if name not in __PASSWORD_HASHERS__:
+                raise ValueError(f'Unknown password hasher: {name}')
+            __PASSWORD_SERVICE__ = PasswordService(__PASSWORD_HASHERS__[name](cost), workers=workers,
+                                                   max_pending=max_pending,
+                                                   cache=VerifiedCredentialCache(ttl=cache_ttl, max_entries=cache_max))
+            __PASSWORD_SERVICE__.config = config
+        service = __PASSWORD_SERVICE__
+
+    return service
@@ -0,0 +1,109 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Iterable, Dict
+
+from backend.flaskr.model import M_ID
+from backend.flaskr.util import get_config, is_configured
+
+
+class QuestionCache(object):
+    """
+    In-process least recently used cache of formatted questions, by id.
+    Entries are removed when a question is deleted by this process; questions changed by other processes are only
+    seen once the entries expire.
+    Note: the cached questions are shared, so must not be modified.
+    :param max_entries: max number of entries; the least recently used entry is evicted when exceeded, 0 to disable
+                        caching
+    :param ttl:         seconds after which an entry expires, or None to never expire
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()   # id -> (time added, formatted question)
+        self._stats = {'hits': 0, 'misses': 0}
+
+    def is_enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get_many(self, ids: Iterable[int]) -> Dict[int, dict]:
+        """
+        Get cached questions.
+        :param ids: ids of questions
+        :return: dict of id to formatted question, for the questions which are cached
+        """
+        result = {}
+        if not self.is_enabled():
+            return result
+
+        now = time.monotonic()
+        with self._lock:
+            for question_id in ids:
+                entry = self._entries.get(question_id)
+                if entry is not None and self.ttl is not None and now - entry[0] > self.ttl:
+                    del self._entries[question_id]
+                    entry = None
+                if entry is None:
+                    self._stats['misses'] = self._stats['misses'] + 1
+                else:
+                    self._stats['hits'] = self._stats['hits'] + 1
+                    self._entries.move_to_end(question_id)
+                    result[question_id] = entry[1]
+        return result
+
+    def set_many(self, questions: Iterable[dict]):
+        """
+        Add questions.
+        :param questions: formatted questions
+        """
+        if not self.is_enabled():
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for question in questions:
+                question_id = question[M_ID]
+                self._entries[question_id] = (now, question)
+                self._entries.move_to_end(question_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, question_id: int):
+        """
+        Remove a question, if present.
+        :param question_id: id of question
+        """
+        with self._lock:
+            self._entries.pop(question_id, None)
+
+    def clear(self):
+        """ Remove all entries. """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """
+        Get the cache statistics for this process.
+        :return: dict of hits, misses and number of entries
+        """
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+
+
+__QUESTION_CACHE__: QuestionCache = QuestionCache()
+
+
+def get_question_cache() -> QuestionCache:
+    """
+    Get the question cache, configured from the application configuration.
+    :return: question cache
+    """
+    if is_configured():
+        __QUESTION_CACHE__.max_entries = get_config("QUESTION_CACHE_MAX_ENTRIES")
+        __QUESTION_CACHE__.ttl = get_config("QUESTION_CACHE_TTL")
+    return __QUESTION_CACHE__
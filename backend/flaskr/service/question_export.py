@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+from typing import Iterator, List
+
+from sqlalchemy import and_
+
+from backend.flaskr.model import Question, M_ID, M_QUESTION, M_ANSWER, M_MATCH, M_CATEGORY, M_DIFFICULTY
+from backend.flaskr.util import get_config, is_configured
+
+from .base_service import stream_entities
+from .question_service import question_search_criteria
+
+# Default number of rows read from the database per batch.
+EXPORT_BATCH_SIZE = 1000
+
+NDJSON_EXPORT = 'ndjson'
+CSV_EXPORT = 'csv'
+EXPORT_FORMATS = [NDJSON_EXPORT, CSV_EXPORT]
+
+# Exported fields, in csv column order; an export is a valid import.
+EXPORT_FIELDS = [M_ID, M_QUESTION, M_ANSWER, M_MATCH, M_CATEGORY, M_DIFFICULTY]
+
+
+def _format_ndjson(rows: List[tuple], header: bool) -> str:
+    return ''.join([json.dumps(dict(zip(EXPORT_FIELDS, row))) + '\n' for row in rows])
+
+
+def _format_csv(rows: List[tuple], header: bool) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def export_questions(export_format: str = NDJSON_EXPORT, category_id: int = None, search_term: str = None,
+                     search_answer: bool = False, batch_size: int = None) -> Iterator[str]:
+    """
+    Export questions, in id order.
+    The questions are read from the database in batches using a server-side cursor, and each batch is formatted as it
+    is read, so memory use is independent of the number of questions exported.
+    :param export_format:   'ndjson' or 'csv'
+    :param category_id:     id of category, or None for all categories
+    :param search_term:     text to be included in question text, or None for all questions
+    :param search_answer:   also match search term against answer text
+    :param batch_size:      num records read per batch
+    :return: iterator of formatted text, one chunk per batch
+    """
+    if export_format == NDJSON_EXPORT:
+        format_rows = _format_ndjson
+    elif export_format == CSV_EXPORT:
+        format_rows = _format_csv
+    else:
+        raise ValueError(f'Export format not supported: {export_format}')
+    if batch_size is None:
+        batch_size = get_config("QUESTION_EXPORT_BATCH_SIZE") if is_configured() else EXPORT_BATCH_SIZE
+
+    criteria = []
+    if category_id is not None:
+        criteria.append(Question.category == category_id)
+    if search_term is not None and len(search_term) > 0:
+        criteria.append(question_search_criteria(search_term, search_answer=search_answer))
+
+    header = True
+    for rows in stream_entities(Question, criteria=and_(*criteria) if len(criteria) > 0 else None,
+                                order_by=Question.id,
+                                with_entities=[getattr(Question, field) for field in EXPORT_FIELDS],
+                                batch_size=batch_size):
+        yield format_rows(rows, header)
+        header = False
+
+    if header and format_rows == _format_csv:
+        # no questions, but still a valid csv file
+        yield format_rows([], header)
@@ -0,0 +1,206 @@
+import csv
+import json
+from typing import Iterable, Iterator, List, Tuple, Union, TextIO, Dict
+
+from werkzeug.exceptions import UnprocessableEntity
+
+from backend.flaskr.model import (Question, generate_matches, M_ID, M_QUESTION, M_ANSWER, M_MATCH, M_CATEGORY,
+                                  M_DIFFICULTY
+                                  )
+from backend.flaskr.util import get_config, is_configured
+
+from .base_service import get_entities, insert_entities
+from .category_service import get_categories_as_map
+from .misc import QueryParam
+from .question_index import get_question_index
+from .question_search import get_question_search_index
+from .question_service import validate_question
+from .response_cache import invalidate_responses
+
+# Default number of rows inserted per transaction.
+IMPORT_CHUNK_SIZE = 1000
+# Default max number of row errors reported.
+IMPORT_MAX_ERRORS = 100
+
+CONFLICT_ERROR = 'Conflicts with existing entry'
+
+ImportRow = Tuple[int, Union[dict, str]]    # row number, and row or error message
+
+
+def parse_ndjson(stream: TextIO) -> Iterator[ImportRow]:
+    """
+    Parse newline-delimited json questions, one object per line.
+    :param stream:  text stream
+    :return: iterator of row number, and question dict or error message
+    """
+    for line_num, line in enumerate(stream, start=1):
+        if len(line.strip()) == 0:
+            continue
+        try:
+            yield line_num, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_num, f'Invalid JSON: {e.msg}'
+
+
+def parse_csv(stream: TextIO) -> Iterator[ImportRow]:
+    """
+    Parse csv questions, with a header row of field names.
+    :param stream:  text stream
+    :return: iterator of row number, and question dict or error message
+    """
+    reader = csv.DictReader(stream)
+    try:
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items() if k is not None}
+    except csv.Error as e:
+        # can't resync the stream, so stop
+        yield reader.line_num, f'Invalid CSV: {e}'
+
+
+class ImportResult(object):
+    """
+    Result of a question import.
+    :param max_errors:  max number of row errors to report
+    """
+
+    def __init__(self, max_errors: int):
+        self.max_errors = max_errors
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+
+    def add_error(self, row_num: int, error: str):
+        self.failed = self.failed + 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'row': row_num, 'error': error})
+
+    def to_dict(self) -> dict:
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+        }
+
+
+def _category_lookup() -> Dict[str, int]:
+    """
+    Get a map of category id and lowercase type to category id.
+    :return: map
+    """
+    lookup = {}
+    for category_id, category_type in get_categories_as_map().items():
+        lookup[category_type.lower()] = int(category_id)
+        lookup[str(category_id)] = int(category_id)
+    return lookup
+
+
+def _insert_chunk(chunk: List[Tuple[int, dict]], result: ImportResult):
+    """
+    Insert a chunk of validated questions.
+    :param chunk:   list of row number and question field values
+    :param result:  import result
+    """
+    texts = [row[M_QUESTION] for _, row in chunk]
+    existing = set([question_text for question_text, in get_entities(
+        Question, with_entities=[Question.question], criteria=Question.question.in_(texts), param=QueryParam.GET_ALL)])
+    rows = []
+    for row_num, row in chunk:
+        if row[M_QUESTION] in existing:
+            result.add_error(row_num, CONFLICT_ERROR)
+        else:
+            rows.append((row_num, row))
+
+    try:
+        inserted = insert_entities(Question, [row for _, row in rows], returning=[M_ID, M_QUESTION], lookup=M_QUESTION)
+    except UnprocessableEntity:
+        # conflict with a concurrently added entry; insert row by row to identify the failed rows
+        inserted = []
+        for row_num, row in rows:
+            try:
+                inserted.extend(insert_entities(Question, [row], returning=[M_ID, M_QUESTION], lookup=M_QUESTION))
+            except UnprocessableEntity:
+                result.add_error(row_num, CONFLICT_ERROR)
+
+    result.imported = result.imported + len(inserted)
+
+    index = get_question_index()
+    search_index = get_question_search_index(load=False)
+    values = {row[M_QUESTION]: row for _, row in rows}
+    for entry in inserted:
+        row = values[entry[M_QUESTION]]
+        index.add(entry[M_ID], row[M_CATEGORY], row[M_DIFFICULTY])
+        if search_index.is_loaded():
+            search_index.add(entry[M_ID], row[M_QUESTION], row[M_ANSWER])
+    if len(inserted) > 0:
+        invalidate_responses()
+
+
+def import_questions(rows: Iterable[ImportRow], chunk_size: int = None, max_errors: int = None) -> dict:
+    """
+    Import questions.
+    Rows are validated as they are read, and valid rows are inserted in chunks, one transaction per chunk. Invalid rows
+    are reported without affecting the other rows.
+    :param rows:        iterator of row number, and question dict or error message
+    :param chunk_size:  number of rows inserted per transaction
+    :param max_errors:  max number of row errors to report
+    :return: dict of number of questions imported and failed, and row errors
+    """
+    if chunk_size is None:
+        chunk_size = get_config("QUESTION_IMPORT_CHUNK_SIZE") if is_configured() else IMPORT_CHUNK_SIZE
+    if max_errors is None:
+        max_errors = get_config("QUESTION_IMPORT_MAX_ERRORS") if is_configured() else IMPORT_MAX_ERRORS
+
+    result = ImportResult(max_errors)
+    categories = _category_lookup()
+    seen = set()
+    pending = []
+
+    def flush():
+        # generate the matches for the chunk in a batch, so repeated answers are only processed once
+        matches = generate_matches([row[M_ANSWER] for _, row in pending])
+        for (_, row), (answer, match) in zip(pending, matches):
+            row[M_ANSWER] = answer
+            row[M_MATCH] = match
+        _insert_chunk(pending, result)
+        pending.clear()
+
+    for row_num, question in rows:
+        if isinstance(question, str):
+            result.add_error(row_num, question)
+            continue
+
+        error = None
+        if isinstance(question, dict) and isinstance(question.get(M_CATEGORY), str) and \
+                not question[M_CATEGORY].isnumeric():
+            # category by name
+            category = categories.get(question[M_CATEGORY].strip().lower())
+            if category is None:
+                error = 'Unknown category'
+            else:
+                question[M_CATEGORY] = category
+
+        if error is None:
+            error = validate_question(question)
+        if error is None and str(int(question[M_CATEGORY])) not in categories:
+            error = 'Unknown category'
+        if error is None and question[M_QUESTION].strip() in seen:
+            error = 'Duplicate question in import'
+        if error is not None:
+            result.add_error(row_num, error)
+            continue
+
+        question_text = question[M_QUESTION].strip()
+        seen.add(question_text)
+        pending.append((row_num, {
+            M_QUESTION: question_text,
+            M_ANSWER: question[M_ANSWER].strip(),
+            M_CATEGORY: int(question[M_CATEGORY]),
+            M_DIFFICULTY: int(question[M_DIFFICULTY]),
+        }))
+        if len(pending) >= chunk_size:
+            flush()
+
+    if len(pending) > 0:
+        flush()
+
+    return result.to_dict()
@@ -0,0 +1,251 @@
+import random
+import time
+from array import array
+from threading import Lock
+from typing import Optional, Iterable, List
+
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.exceptions import ServiceUnavailable
+
+from backend.flaskr.model import Question
+from backend.flaskr.util import get_config, is_configured, MIN_DIFFICULTY, MAX_DIFFICULTY
+
+from .base_service import get_entities
+from .misc import QueryParam
+
+# Max number of random draws per pick when sampling with rejection, before falling back to filtering the pool.
+SAMPLE_ATTEMPTS_FACTOR = 8
+
+
+class QuestionIndex(object):
+    """
+    In-process index of question ids, bucketed by category and difficulty.
+    Allows random question selection without querying the database; only the selected questions need to be read.
+    :param ttl: seconds after which the index is reloaded from the database, or None to never reload
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = Lock()
+        self._buckets = {}      # (category, difficulty) -> array of question ids
+        self._locations = {}    # question id -> (category, difficulty)
+        self._loaded_at = None
+
+    def load(self):
+        """
+        Load the index from the database.
+        :return:
+        """
+        rows = get_entities(Question, with_entities=[Question.id, Question.category, Question.difficulty],
+                            order_by=Question.id, param=QueryParam.GET_ALL)
+        buckets = {}
+        locations = {}
+        for question_id, category, difficulty in rows:
+            key = (category, difficulty)
+            if key not in buckets:
+                buckets[key] = array('l')
+            buckets[key].append(question_id)
+            locations[question_id] = key
+
+        with self._lock:
+            self._buckets = buckets
+            self._locations = locations
+            self._loaded_at = time.monotonic()
+
+    def reset(self):
+        """ Clear the index, so it will be reloaded on next use. """
+        with self._lock:
+            self._buckets = {}
+            self._locations = {}
+            self._loaded_at = None
+
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        return not self.is_loaded() or \
+            (self.ttl is not None and time.monotonic() - self._loaded_at > self.ttl)
+
+    def ensure_loaded(self):
+        """ Load the index if it has not been loaded or is stale. """
+        if self.is_stale():
+            self.load()
+
+    def add(self, question_id: int, category: int, difficulty: Optional[int]):
+        """
+        Add a question to the index.
+        :param question_id: id of question
+        :param category:    id of question category
+        :param difficulty:  question difficulty
+        """
+        with self._lock:
+            if question_id in self._locations:
+                self._remove(question_id)
+            key = (category, difficulty)
+            if key not in self._buckets:
+                self._buckets[key] = array('l')
+            self._buckets[key].append(question_id)
+            self._locations[question_id] = key
+
+    def discard(self, question_id: int):
+        """
+        Remove a question from the index, if present.
+        :param question_id: id of question
+        """
+        with self._lock:
+            if question_id in self._locations:
+                self._remove(question_id)
+
+    def _remove(self, question_id: int):
+        key = self._locations.pop(question_id)
+        bucket = self._buckets[key]
+        bucket.remove(question_id)
+        if len(bucket) == 0:
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._locations)
+
+    def __contains__(self, question_id: int):
+        return question_id in self._locations
+
+    def _select_keys(self, category: Optional[int], difficulty: Optional[int]) -> List[tuple]:
+        if category is not None and difficulty is not None:
+            # a single bucket, so no need to check them all
+            return [(category, difficulty)] if (category, difficulty) in self._buckets else []
+        return [
+            (bucket_category, bucket_difficulty) for bucket_category, bucket_difficulty in self._buckets.keys()
+            if (category is None or bucket_category == category) and
+               (difficulty is None or bucket_difficulty == difficulty)
+        ]
+
+    def _select_buckets(self, category: Optional[int], difficulty: Optional[int]) -> List[array]:
+        return [self._buckets[key] for key in self._select_keys(category, difficulty)]
+
+    def count(self, category: int = None, difficulty: int = None) -> int:
+        """
+        Count the questions matching the specified criteria.
+        :param category:    id of category, or None for all categories
+        :param difficulty:  difficulty, or None for all difficulties
+        :return: number of questions
+        """
+        with self._lock:
+            return sum([len(bucket) for bucket in self._select_buckets(category, difficulty)])
+
+    def pick(self, category: int = None, difficulty: int = None, exclude: Iterable[int] = None, pick: int = 1,
+             rng: random.Random = None) -> List[int]:
+        """
+        Randomly pick question ids.
+        :param category:    id of category, or None for all categories
+        :param difficulty:  difficulty, or None for all difficulties
+        :param exclude:     ids of questions to exclude
+        :param pick:        number of ids to pick
+        :param rng:         random number generator to use
+        :return: list of ids in random order, which may be shorter than requested if insufficient ids are available
+        """
+        if rng is None:
+            rng = random
+        exclude = set(exclude) if exclude is not None else set()
+
+        with self._lock:
+            keys = self._select_keys(category, difficulty)
+            buckets = [self._buckets[key] for key in keys]
+            total = sum([len(bucket) for bucket in buckets])
+            # only excluded ids in the selected buckets reduce the pool
+            selected = set(keys)
+            num_excluded = len([question_id for question_id in exclude
+                                if self._locations.get(question_id) in selected])
+
+            picked = []
+            if pick > 0 and total > 0 and num_excluded < total // 2:
+                # sample with rejection; cheap when most of the pool is still available
+                chosen = set()
+                attempts = SAMPLE_ATTEMPTS_FACTOR * pick
+                while len(picked) < pick and attempts > 0:
+                    attempts = attempts - 1
+                    index = rng.randrange(total)
+                    for bucket in buckets:
+                        if index < len(bucket):
+                            break
+                        index = index - len(bucket)
+                    question_id = bucket[index]
+                    if question_id not in exclude and question_id not in chosen:
+                        chosen.add(question_id)
+                        picked.append(question_id)
+
+            if len(picked) < pick and total > 0:
+                # too many rejections, so filter the pool and sample what's left
+                available = [question_id for bucket in buckets for question_id in bucket
+                             if question_id not in exclude]
+                picked = rng.sample(available, min(pick, len(available)))
+
+        return picked
+
+    def pick_nearest(self, difficulty: int, category: int = None, exclude: Iterable[int] = None, pick: int = 1,
+                     rng: random.Random = None) -> List[int]:
+        """
+        Randomly pick question ids of a difficulty, or of the nearest difficulties if there are insufficient questions
+        of the difficulty; of two difficulties equally near, the easier is preferred.
+        :param difficulty:  difficulty
+        :param category:    id of category, or None for all categories
+        :param exclude:     ids of questions to exclude
+        :param pick:        number of ids to pick
+        :param rng:         random number generator to use
+        :return: list of ids, in random order within each difficulty
+        """
+        exclude = set(exclude) if exclude is not None else set()
+        picked = []
+        for nearest in nearest_difficulties(difficulty):
+            if len(picked) >= pick:
+                break
+            ids = self.pick(category=category, difficulty=nearest, exclude=exclude, pick=pick - len(picked), rng=rng)
+            picked.extend(ids)
+            exclude.update(ids)
+
+        if len(picked) < pick:
+            # questions without a difficulty
+            picked.extend(self.pick(category=category, exclude=exclude, pick=pick - len(picked), rng=rng))
+
+        return picked
+
+
+def nearest_difficulties(difficulty: int) -> List[int]:
+    """
+    Get all the difficulties, in order of distance from a difficulty; of two difficulties equally near, the easier is
+    first.
+    :param difficulty:  difficulty
+    :return: list of difficulties
+    """
+    return sorted(range(MIN_DIFFICULTY, MAX_DIFFICULTY + 1), key=lambda other: (abs(other - difficulty), other))
+
+
+__QUESTION_INDEX__: QuestionIndex = QuestionIndex()
+
+
+def _configured_index() -> QuestionIndex:
+    if is_configured():
+        __QUESTION_INDEX__.ttl = get_config("QUESTION_INDEX_TTL")
+    return __QUESTION_INDEX__
+
+
+def get_question_index() -> QuestionIndex:
+    """
+    Get the question index, loading it if required.
+    :return: question index
+    """
+    index = _configured_index()
+    index.ensure_loaded()
+    return index
+
+
+def init_question_index():
+    """
+    Load the question index at application startup.
+    Note: requires an application context. If the database is not available, loading is deferred until first use.
+    :return:
+    """
+    index = _configured_index()
+    try:
+        index.load()
+    except (SQLAlchemyError, ServiceUnavailable):
+        index.reset()
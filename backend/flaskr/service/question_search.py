@@ -0,0 +1,206 @@
+import time
+from threading import Lock
+from typing import Optional, List, Tuple, Set, Iterable
+
+from backend.flaskr.model import Question
+from backend.flaskr.util import get_config, is_configured
+
+from .base_service import get_entities
+from .misc import QueryParam
+
+# Search backends.
+DATABASE_SEARCH = 'database'    # database search, using trigram/full text indices on postgresql
+INDEX_SEARCH = 'index'          # in-process inverted index search
+
+TRIGRAM_LEN = 3
+
+
+def _trigrams(text: str) -> Set[str]:
+    return set([text[i:i + TRIGRAM_LEN] for i in range(len(text) - TRIGRAM_LEN + 1)])
+
+
+class QuestionSearchIndex(object):
+    """
+    In-process trigram inverted index of question and answer text, for engines without database search indices.
+    Matching is case-insensitive substring matching, the same as the database search.
+    :param ttl: seconds after which the index is reloaded from the database, or None to never reload
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl
+        self._lock = Lock()
+        self._texts = {}                # question id -> (lowercase question, lowercase answer)
+        self._question_postings = {}    # trigram -> set of question ids with trigram in question
+        self._answer_postings = {}      # trigram -> set of question ids with trigram in answer
+        self._loaded_at = None
+
+    def load(self):
+        """
+        Load the index from the database.
+        :return:
+        """
+        rows = get_entities(Question, with_entities=[Question.id, Question.question, Question.answer],
+                            order_by=Question.id, param=QueryParam.GET_ALL)
+        texts = {}
+        question_postings = {}
+        answer_postings = {}
+        for question_id, question, answer in rows:
+            self._index(question_id, question, answer, texts, question_postings, answer_postings)
+
+        with self._lock:
+            self._texts = texts
+            self._question_postings = question_postings
+            self._answer_postings = answer_postings
+            self._loaded_at = time.monotonic()
+
+    @staticmethod
+    def _index(question_id: int, question: str, answer: str, texts: dict, question_postings: dict,
+               answer_postings: dict):
+        question = question.lower()
+        answer = answer.lower()
+        texts[question_id] = (question, answer)
+        for text, postings in [(question, question_postings), (answer, answer_postings)]:
+            for trigram in _trigrams(text):
+                if trigram not in postings:
+                    postings[trigram] = set()
+                postings[trigram].add(question_id)
+
+    def reset(self):
+        """ Clear the index, so it will be reloaded on next use. """
+        with self._lock:
+            self._texts = {}
+            self._question_postings = {}
+            self._answer_postings = {}
+            self._loaded_at = None
+
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        return not self.is_loaded() or \
+            (self.ttl is not None and time.monotonic() - self._loaded_at > self.ttl)
+
+    def ensure_loaded(self):
+        """ Load the index if it has not been loaded or is stale. """
+        if self.is_stale():
+            self.load()
+
+    def add(self, question_id: int, question: str, answer: str):
+        """
+        Add a question to the index.
+        :param question_id: id of question
+        :param question:    question text
+        :param answer:      answer text
+        """
+        with self._lock:
+            if question_id in self._texts:
+                self._remove(question_id)
+            self._index(question_id, question, answer, self._texts, self._question_postings, self._answer_postings)
+
+    def discard(self, question_id: int):
+        """
+        Remove a question from the index, if present.
+        :param question_id: id of question
+        """
+        with self._lock:
+            if question_id in self._texts:
+                self._remove(question_id)
+
+    def _remove(self, question_id: int):
+        question, answer = self._texts.pop(question_id)
+        for text, postings in [(question, self._question_postings), (answer, self._answer_postings)]:
+            for trigram in _trigrams(text):
+                ids = postings[trigram]
+                ids.discard(question_id)
+                if len(ids) == 0:
+                    del postings[trigram]
+
+    def __len__(self):
+        return len(self._texts)
+
+    def _candidates(self, term: str, postings: dict) -> Iterable[int]:
+        trigrams = _trigrams(term)
+        if len(trigrams) == 0:
+            # too short to use the index, so check everything
+            return self._texts.keys()
+
+        # intersect smallest first, so the working set only shrinks
+        candidates = None
+        for ids in sorted([postings.get(trigram, set()) for trigram in trigrams], key=len):
+            candidates = set(ids) if candidates is None else candidates & ids
+            if len(candidates) == 0:
+                break
+        return candidates
+
+    @staticmethod
+    def _rank(term_words: List[str], question: str, answer: str) -> int:
+        # whole word matches score highest, question matches score higher than answer matches
+        question_words = question.split()
+        answer_words = answer.split()
+        return sum([(2 * question_words.count(word)) + answer_words.count(word) for word in term_words])
+
+    def search(self, term: str, search_answer: bool = False, ranked: bool = False, offset: int = 0,
+               limit: int = None) -> Tuple[List[int], int]:
+        """
+        Search for questions containing the search term.
+        :param term:            text to be included in question text
+        :param search_answer:   also match against answer text
+        :param ranked:          order results by relevance rather than id
+        :param offset:          num results to skip
+        :param limit:           max num results to return
+        :return: tuple of list of ids of matching questions, and total number of matching questions
+        """
+        term = term.lower()
+
+        with self._lock:
+            matches = set([question_id for question_id in self._candidates(term, self._question_postings)
+                           if term in self._texts[question_id][0]])
+            if search_answer:
+                matches.update([question_id for question_id in self._candidates(term, self._answer_postings)
+                                if term in self._texts[question_id][1]])
+
+            if ranked:
+                term_words = term.split()
+                ids = sorted(matches,
+                             key=lambda question_id: (-self._rank(term_words, *self._texts[question_id]), question_id))
+            else:
+                ids = sorted(matches)
+
+        end = offset + limit if limit is not None else None
+        return ids[offset:end], len(ids)
+
+
+__QUESTION_SEARCH_INDEX__: QuestionSearchIndex = QuestionSearchIndex()
+
+
+def _configured_index() -> QuestionSearchIndex:
+    if is_configured():
+        __QUESTION_SEARCH_INDEX__.ttl = get_config("QUESTION_INDEX_TTL")
+    return __QUESTION_SEARCH_INDEX__
+
+
+def get_question_search_index(load: bool = True) -> QuestionSearchIndex:
+    """
+    Get the question search index.
+    :param load:    load the index if required
+    :return: question search index
+    """
+    index = _configured_index()
+    if load:
+        index.ensure_loaded()
+    return index
+
+
+def question_search_backend(dialect: str) -> str:
+    """
+    Get the question search backend.
+    :param dialect: database dialect name
+    :return: search backend
+    """
+    backend = get_config("QUESTION_SEARCH_BACKEND") if is_configured() else None
+    if backend is None:
+        # only postgresql has the search indices
+        backend = DATABASE_SEARCH if dialect == 'postgresql' else INDEX_SEARCH
+    elif backend not in [DATABASE_SEARCH, INDEX_SEARCH]:
+        raise ValueError(f'Unknown question search backend: {backend}')
+    return backend
@@ -1,17 +1,29 @@
 import random
 from http import HTTPStatus
-from typing import Union, List
+from typing import Union, List, Iterable, Tuple, Optional
 
 from flask_restful import abort
-from sqlalchemy import and_
+from sqlalchemy import inspect, or_, desc, func
 
 from backend.flaskr.model import Question, M_ID, M_QUESTION, M_ANSWER, M_CATEGORY, M_DIFFICULTY, M_TYPE
 
 from backend.flaskr.util import MIN_DIFFICULTY, MAX_DIFFICULTY
 
-from .base_service import get_by_id, get_entities, create_entity, delete_entity
+from .base_service import (get_by_id, get_entities, get_entities_after, create_entity,
+                           delete_entity, get_dialect_name
+                           )
 from .category_service import get_category_by_id
 from .misc import QueryParam
+from .question_cache import get_question_cache
+from .question_index import get_question_index, QuestionIndex
+from .question_search import get_question_search_index, question_search_backend, INDEX_SEARCH
+from .response_cache import invalidate_responses
+
+# full text search configuration used for ranking
+TEXT_SEARCH_CONFIG = 'english'
+
+# question, list of questions, count, or tuple of a page of questions and the total count
+QuestionsResult = Union[Question, List[Question], int, Tuple[List[Question], int]]
 
 
 def get_question_by_id(question_id: int) -> Question:
@@ -25,7 +37,7 @@ def get_question_by_id(question_id: int) -> Question:
 
 def get_questions(criteria=None, order_by=None, offset: int = 0, limit: int = None,
                   with_entities=None,
-                  param: QueryParam = QueryParam.GET_ALL) -> Union[Question, List[Question], int]:
+                  param: QueryParam = QueryParam.GET_ALL) -> QuestionsResult:
     """
     Search for questions.
     :param criteria:    orm criteria
@@ -34,14 +46,14 @@ def get_questions(criteria=None, order_by=None, offset: int = 0, limit: int = No
     :param limit:       max num records to return
     :param with_entities:   entities to return
     :param param:       query result to return
-    :return: list of questions, or count
+    :return: list of questions, count, or tuple of list of questions and total count
     """
     return get_entities(Question, criteria=criteria, order_by=order_by, offset=offset, limit=limit,
                         with_entities=with_entities, param=param)
 
 
 def search_question_by_category_id(category_id: int, order_by=None, offset: int = 0, limit: int = None,
-                                   param: QueryParam = QueryParam.GET_ALL) -> Union[Question, List[Question], int]:
+                                   param: QueryParam = QueryParam.GET_ALL) -> QuestionsResult:
     """
     Get questions for a category.
     Note: No category validity check is performed
@@ -50,14 +62,14 @@ def search_question_by_category_id(category_id: int, order_by=None, offset: int
     :param offset:      num records to skip
     :param limit:       max num records to return
     :param param:       query result to return
-    :return: list of questions, or count
+    :return: list of questions, count, or tuple of list of questions and total count
     """
     return get_questions(criteria=Question.category == category_id,
                          order_by=order_by, offset=offset, limit=limit, param=param)
 
 
 def search_question_by_question_text(question_text: str, order_by=None, offset: int = 0, limit: int = None,
-                                     param: QueryParam = QueryParam.GET_ALL) -> Union[Question, List[Question], int]:
+                                     param: QueryParam = QueryParam.GET_ALL) -> QuestionsResult:
     """
     Search for questions.
     :param question_text: text to be included in question text
@@ -65,74 +77,174 @@ def search_question_by_question_text(question_text: str, order_by=None, offset:
     :param offset:      num records to skip
     :param limit:       max num records to return
     :param param:       query result to return
-    :return: list of questions, or count
+    :return: list of questions, count, or tuple of list of questions and total count
     """
     return get_questions(criteria=Question.question.ilike("%" + question_text + "%"),
                          order_by=order_by, offset=offset, limit=limit, param=param)
 
 
-def get_random_questions(criteria=None, offset: int = 0, limit: int = None, pick: int = 0,
-                         param: QueryParam = QueryParam.GET_ALL) -> Union[Question, List[Question], int]:
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def question_search_criteria(search_term: str, search_answer: bool = False):
     """
-    Search for questions.
-    :param criteria:    orm criteria
-    :param offset:      num records to skip
+    Get the database criteria for questions containing the search term.
+    :param search_term:     text to be included in question text
+    :param search_answer:   also match against answer text
+    :return: orm criteria
+    """
+    pattern = f'%{_escape_like(search_term)}%'
+    criteria = Question.question.ilike(pattern, escape='\\')
+    if search_answer:
+        criteria = or_(criteria, Question.answer.ilike(pattern, escape='\\'))
+    return criteria
+
+
+def find_questions(search_term: str, search_answer: bool = False, ranked: bool = False, offset: int = 0,
+                   limit: int = None) -> Tuple[List[Question], int]:
+    """
+    Search for questions containing the search term.
+    On postgresql the database search uses the trigram indices on the question and answer text, otherwise an
+    in-process inverted index is used.
+    :param search_term:     text to be included in question text
+    :param search_answer:   also match against answer text
+    :param ranked:          order results by relevance rather than id
+    :param offset:          num records to skip
+    :param limit:           max num records to return
+    :return: tuple of list of questions, and total number of matching questions
+    """
+    dialect = get_dialect_name()
+    if question_search_backend(dialect) == INDEX_SEARCH:
+        ids, total = get_question_search_index().search(search_term, search_answer=search_answer, ranked=ranked,
+                                                        offset=offset, limit=limit)
+        return get_questions_in_order(ids), total
+
+    criteria = question_search_criteria(search_term, search_answer=search_answer)
+
+    order_by = Question.id
+    if ranked and dialect == 'postgresql':
+        document = Question.question if not search_answer else \
+            func.concat_ws(' ', Question.question, Question.answer)
+        rank = func.ts_rank(func.to_tsvector(TEXT_SEARCH_CONFIG, document),
+                            func.plainto_tsquery(TEXT_SEARCH_CONFIG, search_term))
+        order_by = [desc(rank), Question.id]
+
+    return get_questions(criteria=criteria, order_by=order_by, offset=offset, limit=limit,
+                         param=QueryParam.GET_PAGE)
+
+
+def get_questions_after(after_id: int, category_id: int = None, limit: int = None) -> Tuple[List[Question], bool]:
+    """
+    Get questions using keyset pagination.
+    :param after_id:    id of the last question already returned, or 0 to start from the beginning
+    :param category_id: id of category, or None for all categories
     :param limit:       max num records to return
-    :param pick:        number of random picks to make from records
-    :param param:       query result to return
-    :return: list of questions
-    """
-    # get all the ids, pick randomly from those and get the corresponding questions
-    query_result = get_questions(criteria=criteria, offset=offset, limit=limit, with_entities=Question.id,
-                                 param=QueryParam.GET_ALL)
-
-    if len(query_result) > 0:
-        if param == QueryParam.GET_FIRST:   # same as pick=1
-            indices = [
-                # element 0 (i.e. id) of tuple at random index
-                query_result[random.randrange(0, len(query_result))][0]
-            ]
-        elif param == QueryParam.GET_ALL:
-            indices = []
-            if pick < len(query_result):
-                # pick random
-                picked = 0
-                while picked < pick:
-                    index = random.randrange(0, len(query_result))
-                    if index not in indices:
-                        indices.append(index)
-                        picked = picked + 1
-            else:
-                # return all
-                indices = list(range(len(query_result)))
+    :return: tuple of list of questions in id order, and flag indicating if more questions are available
+    """
+    return get_entities_after(Question, after_id,
+                              criteria=Question.category == category_id if category_id is not None else None,
+                              limit=limit)
 
-            indices = [
-                # element 0 (i.e. id) of tuple at random index
-                query_result[index][0] for index in indices
-            ]
-        else:
-            raise ValueError(f'QueryParam not supported: {param}')
 
-        pick_criteria = and_(
-            Question.id.in_(indices),
-            criteria
-        ) if criteria is not None else Question.id.in_(indices)
+def adaptive_difficulty(num_correct: int, num_questions: int) -> int:
+    """
+    Get the difficulty of the next question for a player, from their running accuracy; the more accurate the player,
+    the harder the question.
+    :param num_correct:     number of questions answered correctly
+    :param num_questions:   number of questions answered
+    :return: difficulty; the middle difficulty if no questions have been answered
+    """
+    if num_questions <= 0:
+        return (MIN_DIFFICULTY + MAX_DIFFICULTY) // 2
+    accuracy = min(max(num_correct / num_questions, 0.0), 1.0)
+    return MIN_DIFFICULTY + int(accuracy * (MAX_DIFFICULTY - MIN_DIFFICULTY) + 0.5)
 
-        result = get_questions(criteria=pick_criteria, offset=offset, limit=limit, param=QueryParam.GET_ALL)
 
+def pick_quiz_round(category: int = None, exclude: Iterable[int] = None, pick: int = 1, difficulty: int = None,
+                    seed: int = None) -> List[dict]:
+    """
+    Randomly select a round of quiz questions using the question index.
+    The questions are read using the question cache, so a round of cached questions doesn't query the database.
+    :param category:    id of category, or None for all categories
+    :param exclude:     ids of questions to exclude
+    :param pick:        number of random picks to make
+    :param difficulty:  difficulty of questions, topped up with the nearest difficulties if there are insufficient
+                        questions, or None for any difficulty
+    :param seed:        random seed for a repeatable selection, or None; the seed is combined with the number of
+                        excluded questions, so each turn of a replayed quiz selects the same questions
+    :return: list of formatted questions in random order
+    """
+    index = get_question_index()
+    exclude = set([int(question_id) for question_id in exclude]) if exclude is not None else set()
+    rng = random.Random(f'{seed}:{len(exclude)}') if seed is not None else None
+    if difficulty is None:
+        ids = index.pick(category=category, exclude=exclude, pick=pick, rng=rng)
+    else:
+        ids = index.pick_nearest(difficulty, category=category, exclude=exclude, pick=pick, rng=rng)
+
+    questions, missing = get_questions_by_ids(ids)
+    for question_id in missing:
+        # deleted elsewhere (e.g. by another worker process)
+        index.discard(question_id)
+
+    return questions
+
+
+def get_questions_in_order(ids: List[int], index: QuestionIndex = None) -> List[Question]:
+    """
+    Get questions in the order of the specified ids.
+    :param ids:     ids of questions
+    :param index:   question index to remove any ids of questions which no longer exist from
+    :return: list of questions; questions which no longer exist are omitted
+    """
+    if len(ids) > 0:
+        questions = {
+            question.id: question
+            for question in get_questions(criteria=Question.id.in_(ids), param=QueryParam.GET_ALL)
+        }
+        if index is not None and len(questions) < len(ids):
+            # deleted elsewhere (e.g. by another worker process)
+            for question_id in ids:
+                if question_id not in questions:
+                    index.discard(question_id)
+
+        result = [questions[question_id] for question_id in ids if question_id in questions]
     else:
         result = []
 
     return result
 
 
-def create_question(question: dict) -> int:
+def get_questions_by_ids(ids: List[int]) -> Tuple[List[dict], List[int]]:
     """
-    Create a question.
+    Get questions in the order of the specified ids.
+    Questions held in the question cache are served from it, and the rest are read in one query and cached.
+    :param ids: ids of questions; repeated ids are ignored
+    :return: tuple of list of formatted questions in the order of the ids, and list of ids of questions which do not
+             exist
+    """
+    ids = list(dict.fromkeys(ids))      # unique, in order
+    cache = get_question_cache()
+    questions = cache.get_many(ids)
+
+    uncached = [question_id for question_id in ids if question_id not in questions]
+    if len(uncached) > 0:
+        read = [question.format()
+                for question in get_questions(criteria=Question.id.in_(uncached), param=QueryParam.GET_ALL)]
+        cache.set_many(read)
+        questions.update({question[M_ID]: question for question in read})
+
+    return [questions[question_id] for question_id in ids if question_id in questions], \
+        [question_id for question_id in ids if question_id not in questions]
+
+
+def validate_question(question: dict) -> Optional[str]:
+    """
+    Validate a question to create.
     :param question:    question to create
-    :return: number of affected entities
+    :return: error message, or None if valid
     """
-    # validate input
     error = None
     if isinstance(question, dict):
         for key in [M_QUESTION, M_ANSWER, M_DIFFICULTY, M_CATEGORY]:
@@ -142,16 +254,18 @@ def create_question(question: dict) -> int:
                 value = question[key]
 
                 if key in [M_QUESTION, M_ANSWER]:
-                    if len(value.strip()) == 0:
+                    if not isinstance(value, str):
+                        error = f'Expected {key} data as str'
+                    elif len(value.strip()) == 0:
                         error = f'Empty {key} data'
                 elif key in [M_DIFFICULTY, M_CATEGORY]:
                     if isinstance(value, str):
                         if not value.isnumeric():
                             error = f'Expected {key} data as int'
-                    elif not isinstance(value, int):
+                    elif not isinstance(value, int) or isinstance(value, bool):
                         error = f'Expected {key} data as int'
-                    elif key == M_DIFFICULTY:
-                        if not MIN_DIFFICULTY <= question[M_DIFFICULTY] <= MAX_DIFFICULTY:
+                    if error is None and key == M_DIFFICULTY:
+                        if not MIN_DIFFICULTY <= int(value) <= MAX_DIFFICULTY:
                             error = f'Out of range value for difficulty'
 
             if error is not None:
@@ -160,6 +274,17 @@ def create_question(question: dict) -> int:
     else:
         error = f'Invalid data'
 
+    return error
+
+
+def create_question(question: dict) -> int:
+    """
+    Create a question.
+    :param question:    question to create
+    :return: number of affected entities
+    """
+    # validate input
+    error = validate_question(question)
     if error is not None:
         abort(HTTPStatus.BAD_REQUEST.value, detailed_message=error)
 
@@ -167,10 +292,20 @@ def create_question(question: dict) -> int:
     if category is None:
         abort(HTTPStatus.BAD_REQUEST.value, detailed_message="Unknown category")
 
-    return create_entity(
-        Question(question=question[M_QUESTION].strip(), answer=question[M_ANSWER].strip(),
-                 difficulty=question[M_DIFFICULTY], category=int(question[M_CATEGORY]))
-    )
+    new_question = Question(question=question[M_QUESTION].strip(), answer=question[M_ANSWER].strip(),
+                            difficulty=question[M_DIFFICULTY], category=int(question[M_CATEGORY]))
+    question_text, answer_text = new_question.question, new_question.answer
+    result = create_entity(new_question)
+
+    # the new question is detached once committed, but its identity is retained
+    question_id = inspect(new_question).identity[0]
+    get_question_index().add(question_id, int(question[M_CATEGORY]), int(question[M_DIFFICULTY]))
+    search_index = get_question_search_index(load=False)
+    if search_index.is_loaded():
+        search_index.add(question_id, question_text, answer_text)
+    invalidate_responses()
+
+    return result
 
 
 def delete_question(question_id: int = None, question: Question = None):
@@ -184,4 +319,13 @@ def delete_question(question_id: int = None, question: Question = None):
         question = get_by_id(Question, question_id)
     elif question is None:
         raise ValueError()
-    return delete_entity(question)
+    question_id = question.id
+
+    result = delete_entity(question)
+
+    get_question_index().discard(question_id)
+    get_question_search_index(load=False).discard(question_id)
+    get_question_cache().discard(question_id)
+    invalidate_responses()
+
+    return result
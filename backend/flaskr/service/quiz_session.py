@@ -0,0 +1,176 @@
+import secrets
+import time
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, List
+
+from backend.flaskr.model import Question
+from backend.flaskr.util import get_config, is_configured
+
+from .question_index import get_question_index
+from .question_service import get_questions_in_order
+
+
+class QuizSession(object):
+    """
+    Quiz session, holding a pre-shuffled queue of the ids of the questions remaining in a quiz.
+    :param token:       session token
+    :param category:    id of quiz category, or None for all categories
+    :param ids:         ids of quiz questions, in the order they are to be asked
+    """
+
+    def __init__(self, token: str, category: Optional[int], ids: List[int]):
+        self.token = token
+        self.category = category
+        self.total = len(ids)
+        self._queue = array('l', reversed(ids))     # next question at the end
+        self._lock = Lock()
+        self.last_access = time.monotonic()
+
+    def remaining(self) -> int:
+        return len(self._queue)
+
+    def take(self, num: int) -> List[int]:
+        """
+        Take ids from the front of the queue.
+        :param num: max number of ids to take
+        :return: list of ids
+        """
+        with self._lock:
+            return [self._queue.pop() for _ in range(min(num, len(self._queue)))]
+
+    def touch(self):
+        self.last_access = time.monotonic()
+
+
+class QuizSessionStore(object):
+    """
+    In-process quiz session store, with sessions evicted after a period of inactivity.
+    :param ttl:             seconds of inactivity after which a session expires
+    :param max_sessions:    max number of sessions; the least recently used session is evicted when exceeded
+    """
+
+    def __init__(self, ttl: float = 3600, max_sessions: int = 10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = Lock()
+        self._sessions = OrderedDict()      # least recently used first
+
+    def _is_expired(self, session: QuizSession, now: float) -> bool:
+        return self.ttl is not None and now - session.last_access > self.ttl
+
+    def _evict(self, now: float):
+        # least recently used are first, so stop at the first unexpired session
+        while len(self._sessions) > 0:
+            token, session = next(iter(self._sessions.items()))
+            if self._is_expired(session, now) or len(self._sessions) > self.max_sessions:
+                del self._sessions[token]
+            else:
+                break
+
+    def create(self, category: Optional[int], ids: List[int]) -> QuizSession:
+        """
+        Create a session.
+        :param category:    id of quiz category, or None for all categories
+        :param ids:         ids of quiz questions, in the order they are to be asked
+        :return: new session
+        """
+        session = QuizSession(secrets.token_urlsafe(16), category, ids)
+        with self._lock:
+            self._sessions[session.token] = session
+            self._evict(session.last_access)
+        return session
+
+    def get(self, token: str) -> Optional[QuizSession]:
+        """
+        Get a session.
+        :param token:   session token
+        :return: session or None if the session does not exist or has expired
+        """
+        with self._lock:
+            session = self._sessions.get(token)
+            if session is not None:
+                now = time.monotonic()
+                if self._is_expired(session, now):
+                    del self._sessions[token]
+                    session = None
+                else:
+                    session.touch()
+                    self._sessions.move_to_end(token)
+        return session
+
+    def remove(self, token: str) -> bool:
+        """
+        Remove a session.
+        :param token:   session token
+        :return: True if the session was removed
+        """
+        with self._lock:
+            return self._sessions.pop(token, None) is not None
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+__QUIZ_SESSIONS__: QuizSessionStore = QuizSessionStore()
+
+
+def get_quiz_session_store() -> QuizSessionStore:
+    """
+    Get the quiz session store.
+    :return: quiz session store
+    """
+    if is_configured():
+        __QUIZ_SESSIONS__.ttl = get_config("QUIZ_SESSION_TTL")
+        __QUIZ_SESSIONS__.max_sessions = get_config("QUIZ_SESSION_MAX")
+    return __QUIZ_SESSIONS__
+
+
+def start_quiz_session(category: int = None) -> QuizSession:
+    """
+    Start a quiz session.
+    :param category:    id of quiz category, or None for all categories
+    :return: new session
+    """
+    max_questions = get_config("QUIZ_SESSION_MAX_QUESTIONS") if is_configured() else None
+    index = get_question_index()
+    if max_questions is None:
+        max_questions = index.count(category=category)
+
+    return get_quiz_session_store().create(category, index.pick(category=category, pick=max_questions))
+
+
+def get_quiz_session(token: str) -> Optional[QuizSession]:
+    """
+    Get a quiz session.
+    :param token:   session token
+    :return: session or None if the session does not exist or has expired
+    """
+    return get_quiz_session_store().get(token)
+
+
+def end_quiz_session(token: str) -> bool:
+    """
+    End a quiz session.
+    :param token:   session token
+    :return: True if the session was ended
+    """
+    return get_quiz_session_store().remove(token)
+
+
+def next_session_questions(session: QuizSession, num: int = 1) -> List[Question]:
+    """
+    Get the next questions in a quiz session.
+    :param session: quiz session
+    :param num:     number of questions to get
+    :return: list of questions, which may be shorter than requested if the quiz is complete
+    """
+    index = get_question_index()
+    result = []
+    while len(result) < num and session.remaining() > 0:
+        # questions deleted since the session started are skipped
+        result.extend(
+            get_questions_in_order(session.take(num - len(result)), index=index)
+        )
+    return result
@@ -0,0 +1,259 @@
+import abc
+import inspect
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock, local
+from typing import Optional, Callable, Dict, NamedTuple
+
+from backend.flaskr.util import get_config, is_configured, print_exc_info
+
+LRU_BACKEND = 'lru'
+SQLITE_BACKEND = 'sqlite'
+
+
+class CachedResponse(NamedTuple):
+    """ Cached response body. """
+    body: bytes
+    mimetype: str
+
+
+class ResponseCache(abc.ABC):
+    """
+    Response cache interface.
+    Entries are stored with the data version they were generated at, and the data version is incremented whenever
+    the cached data changes, so entries for a previous version are never returned.
+    Entries also expire after a max age, so changes which don't increment the data version, e.g. made by other
+    processes, are eventually seen.
+    :param max_entries: max number of entries
+    :param ttl:         seconds after which an entry expires, or None to never expire
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.config = None      # configuration the cache was created from
+        self._stats_lock = Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'not_modified': 0}
+
+    @abc.abstractmethod
+    def version(self) -> int:
+        """
+        Get the current data version.
+        :return: version
+        """
+
+    @abc.abstractmethod
+    def invalidate(self):
+        """ Increment the data version, so all entries are stale. """
+
+    @abc.abstractmethod
+    def get(self, key: str, version: int) -> Optional[CachedResponse]:
+        """
+        Get an entry.
+        :param key:     cache key
+        :param version: data version
+        :return: cached response, or None if not cached for the version or expired
+        """
+
+    @abc.abstractmethod
+    def set(self, key: str, version: int, response: CachedResponse):
+        """
+        Add an entry.
+        :param key:         cache key
+        :param version:     data version the response was generated at
+        :param response:    response to cache
+        """
+
+    @abc.abstractmethod
+    def clear(self):
+        """ Remove all entries. """
+
+    def count(self, stat: str):
+        with self._stats_lock:
+            self._stats[stat] = self._stats[stat] + 1
+
+    def stats(self) -> dict:
+        """
+        Get the cache statistics for this process.
+        :return: dict of hits, misses and not modified responses
+        """
+        with self._stats_lock:
+            return dict(self._stats, backend=type(self).__name__, version=self.version())
+
+
+class LruResponseCache(ResponseCache):
+    """
+    In-process least recently used response cache.
+    Note: each process has its own data version, so with multiple worker processes changes made by other workers are
+          only seen once the entries expire.
+    :param max_entries: max number of entries; the least recently used entry is evicted when exceeded
+    :param ttl:         seconds after which an entry expires, or None to never expire
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: Optional[float] = 60):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self._lock = Lock()
+        self._version = 1
+        self._entries = OrderedDict()   # key -> (version, time added, response)
+
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._version = self._version + 1
+            self._entries.clear()
+
+    def get(self, key: str, version: int) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            if self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key: str, version: int, response: CachedResponse):
+        with self._lock:
+            if version != self._version:
+                return      # generated before an invalidation
+            self._entries[key] = (version, time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SqliteResponseCache(ResponseCache):
+    """
+    Response cache in a local sqlite database, shared by all the worker processes on a host.
+    The data version is also stored in the database, so an invalidation by any worker applies to all workers.
+    Errors accessing the cache are reported and treated as a miss.
+    :param path:        path of database file
+    :param max_entries: max number of entries; the oldest entries are evicted when exceeded
+    :param ttl:         seconds after which an entry expires, or None to never expire
+    """
+
+    def __init__(self, path: str, max_entries: int = 1000, ttl: Optional[float] = 60):
+        super().__init__(max_entries=max_entries, ttl=ttl)
+        self.path = path
+        self._local = local()
+
+    def _connection(self) -> sqlite3.Connection:
+        # a connection per thread and process, as connections can't be shared across a fork
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS version (id INTEGER PRIMARY KEY, value INTEGER NOT NULL)')
+            conn.execute('INSERT OR IGNORE INTO version (id, value) VALUES (1, 1)')
+            conn.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, version INTEGER NOT NULL, '
+                         'body BLOB NOT NULL, mimetype TEXT NOT NULL, stored REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_stored ON entries (stored)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def version(self) -> int:
+        try:
+            return self._connection().execute('SELECT value FROM version WHERE id = 1').fetchone()[0]
+        except sqlite3.Error:
+            print_exc_info()
+            return 0    # entries are never stored for version 0
+
+    def invalidate(self):
+        try:
+            conn = self._connection()
+            conn.execute('UPDATE version SET value = value + 1 WHERE id = 1')
+            conn.execute('DELETE FROM entries')
+        except sqlite3.Error:
+            print_exc_info()
+
+    def get(self, key: str, version: int) -> Optional[CachedResponse]:
+        oldest = time.time() - self.ttl if self.ttl is not None else 0
+        try:
+            row = self._connection().execute('SELECT body, mimetype FROM entries WHERE key = ? AND version = ? '
+                                             'AND stored >= ?', (key, version, oldest)).fetchone()
+        except sqlite3.Error:
+            print_exc_info()
+            row = None
+        return CachedResponse(*row) if row is not None else None
+
+    def set(self, key: str, version: int, response: CachedResponse):
+        if version == 0:
+            return
+        try:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO entries (key, version, body, mimetype, stored) '
+                         'SELECT ?, ?, ?, ?, ? FROM version WHERE id = 1 AND value = ?',
+                         (key, version, response.body, response.mimetype, time.time(), version))
+            conn.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY stored DESC LIMIT -1 '
+                         'OFFSET ?)', (self.max_entries,))
+        except sqlite3.Error:
+            print_exc_info()
+
+    def clear(self):
+        try:
+            self._connection().execute('DELETE FROM entries')
+        except sqlite3.Error:
+            print_exc_info()
+
+
+# Response cache backends by name; the factories take the configured max entries and path.
+__RESPONSE_CACHE_BACKENDS__: Dict[str, Callable[[int, str], ResponseCache]] = {
+    LRU_BACKEND: lambda max_entries, path: LruResponseCache(max_entries=max_entries),
+    SQLITE_BACKEND: lambda max_entries, path: SqliteResponseCache(path, max_entries=max_entries),
+}
+
+
+def register_response_cache_backend(name: str, factory: Callable[[int, str], ResponseCache]):
+    """
+    Register a response cache backend.
+    :param name:    name of backend
+    :param factory: function taking the max number of entries and path, and returning a cache
+    """
+    if inspect.isclass(factory) and inspect.isabstract(factory):
+        raise TypeError(f'Response cache backend {factory.__name__} does not implement {ResponseCache.__name__}')
+    __RESPONSE_CACHE_BACKENDS__[name] = factory
+
+
+__RESPONSE_CACHE__: Optional[ResponseCache] = None
+__RESPONSE_CACHE_LOCK__ = Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    Get the response cache, creating it from the application configuration if required.
+    :return: response cache, or None if response caching is disabled
+    """
+    global __RESPONSE_CACHE__
+
+    if not is_configured() or get_config("RESPONSE_CACHE") is None:
+        return None
+
+    config = (get_config("RESPONSE_CACHE"), get_config("RESPONSE_CACHE_MAX_ENTRIES"), get_config("RESPONSE_CACHE_PATH"))
+    with __RESPONSE_CACHE_LOCK__:
+        if __RESPONSE_CACHE__ is None or __RESPONSE_CACHE__.config != config:
+            name, max_entries, path = config
+            if name not in __RESPONSE_CACHE_BACKENDS__:
+                raise ValueError(f'Unknown response cache backend: {name}')
+            __RESPONSE_CACHE__ = __RESPONSE_CACHE_BACKENDS__[name](max_entries, path)
+            __RESPONSE_CACHE__.config = config
+        __RESPONSE_CACHE__.ttl = get_config("RESPONSE_CACHE_TTL")
+        cache = __RESPONSE_CACHE__
+
+    return cache
+
+
+def invalidate_responses():
+    """ Invalidate all cached responses, e.g. after the questions or categories change. """
+    cache = get_response_cache()
+    if cache is not None:
+        cache.invalidate()
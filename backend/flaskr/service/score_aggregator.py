@@ -0,0 +1,206 @@
+import atexit
+import time
+from threading import Lock, Event, Thread
+from typing import Optional, Tuple, Callable
+
+from flask import Flask, current_app
+from werkzeug.exceptions import HTTPException
+from sqlalchemy.exc import SQLAlchemyError
+
+from backend.flaskr.model import User, M_ID, M_NUM_CORRECT, M_NUM_QUESTIONS
+from backend.flaskr.util import get_config, is_configured, print_exc_info
+
+from .base_service import increment_entities
+
+# Max number of attempts to read a consistent total, while flushes are in progress.
+TOTAL_READ_ATTEMPTS = 5
+
+
+class ScoreAggregator(object):
+    """
+    Write-behind aggregator of user scores.
+    Score deltas are coalesced per user in memory, and a background thread applies them to the database in a batch
+    at regular intervals. Pending deltas are flushed when the aggregator is stopped, including at interpreter exit.
+    :param app:         flask application
+    :param interval:    seconds between flushes
+    :param max_pending: max number of users with pending deltas; a flush is triggered when exceeded
+    """
+
+    def __init__(self, app: Flask, interval: float = 1.0, max_pending: int = 1000):
+        self.app = app
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self._pending = {}      # user id -> [num_correct, num_questions]
+        self._in_flight = {}    # user id -> [num_correct, num_questions] being flushed
+        self._sequence = 0      # odd while a flush is being committed
+        self._wake = Event()
+        self._stopped = Event()
+        self._thread = None
+
+    def start(self):
+        """ Start the background flusher. """
+        with self._lock:
+            if self._thread is None:
+                self._stopped.clear()
+                self._thread = Thread(target=self._run, name='score-flusher', daemon=True)
+                self._thread.start()
+                atexit.register(self.stop)
+
+    def stop(self):
+        """ Stop the background flusher, and flush any pending deltas. """
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._stopped.set()
+            self._wake.set()
+            thread.join()
+            atexit.unregister(self.stop)
+        self.flush()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            self.flush()
+
+    def add(self, user_id: int, num_correct: int, num_questions: int):
+        """
+        Add a score delta for a user.
+        :param user_id:         id of user
+        :param num_correct:     number of questions answered correctly
+        :param num_questions:   number of questions answered
+        """
+        with self._lock:
+            if user_id not in self._pending:
+                self._pending[user_id] = [0, 0]
+            deltas = self._pending[user_id]
+            deltas[0] = deltas[0] + num_correct
+            deltas[1] = deltas[1] + num_questions
+            full = len(self._pending) >= self.max_pending
+        if full:
+            self._wake.set()
+
+    def _deltas(self, user_id: int) -> Tuple[int, int]:
+        # caller holds lock
+        num_correct = num_questions = 0
+        for deltas in [self._pending.get(user_id), self._in_flight.get(user_id)]:
+            if deltas is not None:
+                num_correct = num_correct + deltas[0]
+                num_questions = num_questions + deltas[1]
+        return num_correct, num_questions
+
+    def read_total(self, user_id: int, read_user: Callable[[], Optional[dict]]) -> Optional[dict]:
+        """
+        Read a user, including any deltas not yet applied to the database.
+        :param user_id:     id of user
+        :param read_user:   function to read the user from the database as a dict
+        :return: user dict, or None if the user does not exist
+        """
+        user = None
+        for attempt in range(TOTAL_READ_ATTEMPTS):
+            with self._lock:
+                sequence = self._sequence
+                num_correct, num_questions = self._deltas(user_id)
+            if sequence % 2 == 1 and attempt < TOTAL_READ_ATTEMPTS - 1:
+                # a flush is being committed, so the database may or may not include the in-flight deltas
+                time.sleep(0.001 * (attempt + 1))
+                continue
+
+            # on the last attempt, settle for a possibly inconsistent total
+            user = read_user()
+            with self._lock:
+                consistent = self._sequence == sequence
+            if user is None or consistent:
+                break
+        if user is not None:
+            user = {**user,
+                    M_NUM_CORRECT: user[M_NUM_CORRECT] + num_correct,
+                    M_NUM_QUESTIONS: user[M_NUM_QUESTIONS] + num_questions}
+        return user
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Apply pending deltas to the database.
+        :return: number of users updated
+        """
+        with self._flush_lock:
+            with self._lock:
+                if len(self._pending) == 0:
+                    return 0
+                self._in_flight = self._pending
+                self._pending = {}
+                self._sequence = self._sequence + 1
+
+            increments = [
+                {M_ID: user_id, M_NUM_CORRECT: deltas[0], M_NUM_QUESTIONS: deltas[1]}
+                for user_id, deltas in self._in_flight.items()
+            ]
+            try:
+                with self.app.app_context():
+                    count = increment_entities(User, increments)
+            except (SQLAlchemyError, HTTPException):
+                print_exc_info()
+                count = 0
+                # keep the deltas for the next flush
+                with self._lock:
+                    for user_id, deltas in self._in_flight.items():
+                        if user_id not in self._pending:
+                            self._pending[user_id] = [0, 0]
+                        self._pending[user_id][0] = self._pending[user_id][0] + deltas[0]
+                        self._pending[user_id][1] = self._pending[user_id][1] + deltas[1]
+
+            with self._lock:
+                self._in_flight = {}
+                self._sequence = self._sequence + 1
+
+        return count
+
+
+# Application extension holding the app's score aggregator.
+SCORE_AGGREGATOR_EXTENSION = 'score_aggregator'
+
+__SCORE_AGGREGATOR_LOCK__ = Lock()
+
+
+def get_score_aggregator() -> Optional[ScoreAggregator]:
+    """
+    Get the score aggregator of the current application, starting it if required.
+    Each application has its own aggregator, so deltas are flushed to the database of the application they were
+    added through.
+    Note: requires an application context.
+    :return: score aggregator, or None if scores are written synchronously
+    """
+    interval = get_config("SCORE_FLUSH_INTERVAL") if is_configured() else None
+    if interval is None:
+        return None
+
+    app = current_app._get_current_object()
+    with __SCORE_AGGREGATOR_LOCK__:
+        aggregator = app.extensions.get(SCORE_AGGREGATOR_EXTENSION)
+        if aggregator is None:
+            aggregator = ScoreAggregator(app, interval=interval, max_pending=get_config("SCORE_FLUSH_MAX_PENDING"))
+            aggregator.start()
+            app.extensions[SCORE_AGGREGATOR_EXTENSION] = aggregator
+    aggregator.interval = interval
+
+    return aggregator
+
+
+def shutdown_score_aggregator(app: Flask = None):
+    """
+    Stop the score aggregator of an application, flushing any pending deltas.
+    :param app: flask application; default is the current application
+    """
+    if app is None:
+        app = current_app._get_current_object()
+
+    with __SCORE_AGGREGATOR_LOCK__:
+        aggregator = app.extensions.pop(SCORE_AGGREGATOR_EXTENSION, None)
+    if aggregator is not None:
+        aggregator.stop()
@@ -4,8 +4,10 @@ from typing import Optional
 from flask_restful import abort
 
 from backend.flaskr.model import User, M_USERNAME, M_PASSWORD, M_NUM_QUESTIONS, M_NUM_CORRECT, M_ID, USER_FIELDS
-from .base_service import get_by_id, get_entity, get_entities, create_entity, update_entity
+from .base_service import get_by_id, get_entity, get_entities, create_entity, update_entity, increment_entity
 from .misc import QueryParam
+from .password_hasher import get_password_service
+from .score_aggregator import get_score_aggregator
 from .session_scope import SessionScope, SessionScopeArgs
 
 
@@ -86,7 +88,7 @@ def update_user_by_id(user_id: int, updates: dict, op: QueryParam = QueryParam.U
     :param user_id: id of category
     :param updates: updates to apply
     :param op:      operation to perform on numeric data field in user model
-    :return: number of affected entities
+    :return: updated user
     """
     # validate input
     error = None
@@ -107,30 +109,86 @@ def update_user_by_id(user_id: int, updates: dict, op: QueryParam = QueryParam.U
     if error is not None:
         abort(HTTPStatus.BAD_REQUEST.value, detailed_message=error)
 
-    # Use same session for all sub operations.
-    session_scope = SessionScope(use=SessionScopeArgs.MULTI_USE)
-    with session_scope.scope() as session:
-        user = get_user_by_id(user_id, session_scope=session_scope)
-        if user is None:
+    if op == QueryParam.UPDATE_ADD:
+        increments = {key: value for key, value in updates.items() if key in [M_NUM_CORRECT, M_NUM_QUESTIONS]}
+        for key, value in increments.items():
+            if not isinstance(value, int) or isinstance(value, bool):
+                abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f'Expected {key} data as int')
+
+        # single atomic statement, so concurrent updates for the same user are not lost
+        users = increment_entity(User, increments, criteria=User.id == user_id,
+                                 updates={key: value for key, value in updates.items() if key not in increments})
+        if len(users) == 0:
             abort(HTTPStatus.NOT_FOUND.value)
+        formatted_user = users[0]
+    else:
+        # Use same session for all sub operations.
+        session_scope = SessionScope(use=SessionScopeArgs.MULTI_USE)
+        with session_scope.scope() as session:
+            user = get_user_by_id(user_id, session_scope=session_scope)
+            if user is None:
+                abort(HTTPStatus.NOT_FOUND.value)
+
+            result = update_entity(
+                        User, updates, criteria=User.id == user_id, session_scope=session_scope
+                    )
+            formatted_user = get_user_by_id(user_id, session_scope=session_scope).format()
 
-        if op == QueryParam.UPDATE_ADD:
-            update_values = {**updates}
-            user_dict = user.format()
-            for key in [M_NUM_CORRECT, M_NUM_QUESTIONS]:
-                if key in update_values.keys():
-                    update_values[key] = user_dict[key] + update_values[key]
-        else:
-            update_values = updates
+    return {k: v for k, v in formatted_user.items() if k != M_PASSWORD}
 
-        result = update_entity(
-                    User, update_values, criteria=User.id == user_id, session_scope=session_scope
-                )
-        formatted_user = get_user_by_id(user_id, session_scope=session_scope).format()
+
+def add_user_score(user_id: int, num_correct: int, num_questions: int) -> dict:
+    """
+    Add a quiz result to a user's score.
+    If write-behind is configured the result is buffered and applied to the database later, otherwise it is applied
+    immediately.
+    :param user_id:         id of user
+    :param num_correct:     number of questions answered correctly
+    :param num_questions:   number of questions answered
+    :return: updated user
+    """
+    aggregator = get_score_aggregator()
+    if aggregator is None:
+        return update_user_by_id(user_id, {
+            M_NUM_CORRECT: num_correct,
+            M_NUM_QUESTIONS: num_questions
+        }, op=QueryParam.UPDATE_ADD)
+
+    for key, value in [(M_NUM_CORRECT, num_correct), (M_NUM_QUESTIONS, num_questions)]:
+        if not isinstance(value, int) or isinstance(value, bool):
+            abort(HTTPStatus.BAD_REQUEST.value, detailed_message=f'Expected {key} data as int')
+
+    def read_user():
+        user = get_user_by_id(user_id)
+        return user.format() if user is not None else None
+
+    # one read, which is also the existence check; the new result is then added to the total read
+    formatted_user = aggregator.read_total(user_id, read_user)
+    if formatted_user is None:
+        abort(HTTPStatus.NOT_FOUND.value)
+    aggregator.add(user_id, num_correct, num_questions)
+    formatted_user[M_NUM_CORRECT] = formatted_user[M_NUM_CORRECT] + num_correct
+    formatted_user[M_NUM_QUESTIONS] = formatted_user[M_NUM_QUESTIONS] + num_questions
 
     return {k: v for k, v in formatted_user.items() if k != M_PASSWORD}
 
 
+def get_user_score(user_id: int) -> Optional[dict]:
+    """
+    Get a user's score, including any buffered quiz results.
+    :param user_id: id of user
+    :return: user, or None if user does not exist
+    """
+    def read_user():
+        user = get_user_by_id(user_id)
+        return user.format() if user is not None else None
+
+    aggregator = get_score_aggregator()
+    formatted_user = read_user() if aggregator is None else aggregator.read_total(user_id, read_user)
+
+    return {k: v for k, v in formatted_user.items() if k != M_PASSWORD} if formatted_user is not None else None
+
+
 def login_or_register_user(username: str, password: str) -> dict:
     """
     Login or register a user.
@@ -144,15 +202,22 @@ def login_or_register_user(username: str, password: str) -> dict:
     if password is None or len(password.strip()) == 0:
         abort(HTTPStatus.BAD_REQUEST.value, detailed_message="Password required")
 
+    password_service = get_password_service()
     user = get_user_by_username(username)
 
     if user is None:
         create_user({
-            M_USERNAME: username, M_PASSWORD: password
+            M_USERNAME: username, M_PASSWORD: password_service.hash(password)
         })
         user = get_user_by_username(username)
 
-    if user.password != password:
+    elif not password_service.verify(username, password, user.password):
         abort(HTTPStatus.UNAUTHORIZED.value, detailed_message="Invalid username or password")
 
-    return {k: v for k, v in user.format().items() if k != M_PASSWORD}
+    result = {k: v for k, v in user.format().items() if k != M_PASSWORD}
+
+    if password_service.needs_rehash(user.password):
+        # plaintext from before passwords were hashed, or hashed with outdated parameters
+        update_user_by_id(result[M_ID], {M_PASSWORD: password_service.hash(password)}, op=QueryParam.UPDATE_SET)
+
+    return result
@@ -1,8 +1,12 @@
 from .app_cfg import set_config, get_config, is_configured, categories_per_page, questions_per_page, max_items_per_page
 from .misc import (get_request_arg, get_request_page, get_request_per_page, get_request_pagination, get_request_type,
-                   pagination, success_result, error_result, http_error_result,
-                   print_exc_info, paginated_success_result, key_or_alias
+                   get_request_cursor, encode_cursor, decode_cursor,
+                   page_offset, pagination, success_result, error_result, http_error_result,
+                   print_exc_info, paginated_success_result, cursor_success_result, key_or_alias
                    )
+from .json_encoder import (JsonFragment, JsonEncoder, register_json_encoder, get_json_encoder, dumps_result,
+                           json_response
+                           )
 from .constants import *
 
 __all__ = [
@@ -18,27 +22,48 @@ __all__ = [
     'get_request_per_page',
     'get_request_pagination',
     'get_request_type',
+    'get_request_cursor',
+    'encode_cursor',
+    'decode_cursor',
     'success_result',
+    'page_offset',
     'pagination',
     'error_result',
     'http_error_result',
     'print_exc_info',
     'paginated_success_result',
+    'cursor_success_result',
     'key_or_alias',
 
+    'JsonFragment',
+    'JsonEncoder',
+    'register_json_encoder',
+    'get_json_encoder',
+    'dumps_result',
+    'json_response',
+
     'CATEGORIES_URL',
     'CATEGORY_BY_ID_URL',
     'QUESTIONS_BY_CATEGORY_ID_URL',
     'QUESTIONS_URL',
     'QUESTION_BY_ID_URL',
     'QUESTION_SEARCH_URL',
+    'QUESTION_IMPORT_URL',
+    'QUESTION_EXPORT_URL',
+    'QUESTION_BATCH_URL',
     'QUIZZES_URL',
     'QUIZ_RESULTS_URL',
+    'QUIZ_SESSIONS_URL',
+    'QUIZ_SESSION_URL',
     'LOGIN_URL',
+    'METRICS_URL',
     'REQ_ARG_PAGE',
     'REQ_ARG_PER_PAGE',
     'REQ_ARG_PAGINATION',
     'REQ_ARG_TYPE',
+    'REQ_ARG_CURSOR',
+    'REQ_ARG_FORMAT',
+    'REQ_ARG_CATEGORY',
     'USERNAME',
     'PASSWORD',
     'USER_ID',
@@ -49,9 +74,19 @@ __all__ = [
     'ENTITY_TYPE',
     'MAP_TYPE',
     'QUESTION_SEARCH_TERM',
+    'QUESTION_SEARCH_ANSWER',
+    'QUESTION_SEARCH_RANKED',
+    'QUESTION_IDS',
     'MIN_DIFFICULTY',
     'MAX_DIFFICULTY',
+    'NDJSON_MIMETYPES',
+    'CSV_MIMETYPES',
     'PREVIOUS_QUESTIONS',
     'QUIZ_CATEGORY',
     'REQ_ARG_NUM',
+    'QUIZ_FULL_FORMAT',
+    'QUIZ_COMPACT_FORMAT',
+    'QUIZ_FORMATS',
+    'QUIZ_ADAPTIVE',
+    'QUIZ_SEED',
 ]
@@ -10,27 +10,51 @@ QUESTION_ID = 'question_id'
 QUESTIONS_URL = '/api/questions'
 QUESTION_BY_ID_URL = f'{QUESTIONS_URL}/<int:{QUESTION_ID}>'
 QUESTION_SEARCH_URL = f'{QUESTIONS_URL}/search'
+QUESTION_IMPORT_URL = f'{QUESTIONS_URL}/import'
+QUESTION_EXPORT_URL = f'{QUESTIONS_URL}/export'
+QUESTION_BATCH_URL = f'{QUESTIONS_URL}/batch'
 
 QUIZZES_URL = '/api/quizzes'
 QUIZ_RESULTS_URL = F'{QUIZZES_URL}/results'
 
+QUIZ_SESSION_TOKEN = 'token'
+
+QUIZ_SESSIONS_URL = f'{QUIZZES_URL}/sessions'
+QUIZ_SESSION_URL = f'{QUIZ_SESSIONS_URL}/<string:{QUIZ_SESSION_TOKEN}>'
+
 LOGIN_URL = '/api/login'
 
+METRICS_URL = '/api/_metrics'
+
 # Request related.
 REQ_ARG_PAGE = 'page'  # Request page argument.
 REQ_ARG_PER_PAGE = 'per_page'  # Request per page argument.
 REQ_ARG_PAGINATION = 'pagination'  # Request pagination flag argument.
 REQ_ARG_TYPE = 'type'  # Request response type argument.
+REQ_ARG_CURSOR = 'cursor'  # Request cursor argument; empty for first page.
+REQ_ARG_FORMAT = 'format'  # Request export format argument.
+REQ_ARG_CATEGORY = 'category'  # Request category id argument.
 
 ENTITY_TYPE = 'entity'  # Request response type entity; {id, ..}.
 MAP_TYPE = 'map'  # Request response type map; id, xxx or id, {..} if more than one property other than id.
 
 QUESTION_SEARCH_TERM = 'searchTerm'
+QUESTION_SEARCH_ANSWER = 'searchAnswer'  # Search answers flag.
+QUESTION_SEARCH_RANKED = 'ranked'  # Rank search results flag.
+QUESTION_IDS = 'ids'  # Question batch ids.
+
+NDJSON_MIMETYPES = ['application/x-ndjson', 'application/jsonl']  # Question import/export content types.
+CSV_MIMETYPES = ['text/csv']
 
 PREVIOUS_QUESTIONS = 'previous_questions'
 QUIZ_CATEGORY = 'quiz_category'
 
 REQ_ARG_NUM = 'num'  # Request number argument.
+QUIZ_FULL_FORMAT = 'full'  # Quiz questions response format; question entities.
+QUIZ_COMPACT_FORMAT = 'compact'  # Quiz questions response format; lists of the fields required to play.
+QUIZ_FORMATS = [QUIZ_FULL_FORMAT, QUIZ_COMPACT_FORMAT]
+QUIZ_ADAPTIVE = 'adaptive'  # Adaptive quiz difficulty flag.
+QUIZ_SEED = 'seed'  # Quiz random seed, for a repeatable selection.
 
 USERNAME = 'username'
 PASSWORD = 'password'
@@ -0,0 +1,155 @@
+import abc
+import inspect
+import json
+from threading import Lock
+from typing import Any, Callable, Dict, Optional
+
+from flask import current_app, Response
+
+from .app_cfg import get_config, is_configured
+
+STDLIB_ENCODER = 'stdlib'
+ORJSON_ENCODER = 'orjson'
+
+
+class JsonFragment(object):
+    """
+    Pre-serialized json value, which is included in a result as is rather than being serialized again.
+    Note: only supported as a top-level entry of a result.
+    :param data: json bytes
+    """
+    __slots__ = ['data']
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+class JsonEncoder(abc.ABC):
+    """
+    Json encoder interface.
+    """
+
+    @abc.abstractmethod
+    def dumps(self, obj: Any, sort_keys: bool = False, default: Callable[[Any], Any] = None) -> bytes:
+        """
+        Serialize an object to compact json.
+        :param obj:         object to serialize
+        :param sort_keys:   sort dict keys
+        :param default:     function to convert objects which are not natively serializable
+        :return: utf-8 encoded json
+        """
+
+
+class StdlibJsonEncoder(JsonEncoder):
+    """
+    Json encoder using the standard library json module.
+    """
+
+    def dumps(self, obj: Any, sort_keys: bool = False, default: Callable[[Any], Any] = None) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False, sort_keys=sort_keys,
+                          default=default).encode('utf-8')
+
+
+class OrjsonEncoder(JsonEncoder):
+    """
+    Json encoder using orjson, which serializes directly to bytes several times faster than the standard library.
+    """
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj: Any, sort_keys: bool = False, default: Callable[[Any], Any] = None) -> bytes:
+        option = self._orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option = option | self._orjson.OPT_SORT_KEYS
+        return self._orjson.dumps(obj, default=default, option=option)
+
+
+# Json encoders by name.
+__JSON_ENCODERS__: Dict[str, Callable[[], JsonEncoder]] = {
+    STDLIB_ENCODER: StdlibJsonEncoder,
+    ORJSON_ENCODER: OrjsonEncoder,
+}
+
+
+def register_json_encoder(name: str, factory: Callable[[], JsonEncoder]):
+    """
+    Register a json encoder.
+    :param name:    name of encoder
+    :param factory: function returning an encoder
+    """
+    if inspect.isclass(factory) and inspect.isabstract(factory):
+        raise TypeError(f'Json encoder {factory.__name__} does not implement {JsonEncoder.__name__}')
+    __JSON_ENCODERS__[name] = factory
+
+
+__JSON_ENCODER__: Optional[JsonEncoder] = None
+__JSON_ENCODER_NAME__: Optional[str] = None
+__JSON_ENCODER_LOCK__ = Lock()
+
+
+def _default_encoder_name() -> str:
+    try:
+        import orjson   # noqa: F401
+        name = ORJSON_ENCODER
+    except ImportError:
+        name = STDLIB_ENCODER
+    return name
+
+
+def get_json_encoder() -> JsonEncoder:
+    """
+    Get the json encoder, as per the JSON_ENCODER configuration; the fastest available encoder if not configured.
+    :return: json encoder
+    """
+    global __JSON_ENCODER__, __JSON_ENCODER_NAME__
+
+    name = get_config("JSON_ENCODER") if is_configured() else None
+    if name is None:
+        name = _default_encoder_name()
+    if name != __JSON_ENCODER_NAME__:
+        with __JSON_ENCODER_LOCK__:
+            if name not in __JSON_ENCODERS__:
+                raise ValueError(f'Unknown json encoder: {name}')
+            __JSON_ENCODER__ = __JSON_ENCODERS__[name]()
+            __JSON_ENCODER_NAME__ = name
+    return __JSON_ENCODER__
+
+
+def dumps_result(result: dict, encoder: JsonEncoder = None, sort_keys: bool = False,
+                 default: Callable[[Any], Any] = None) -> bytes:
+    """
+    Serialize a result, including any top-level json fragments as is.
+    :param result:      result to serialize
+    :param encoder:     json encoder; default is the configured encoder
+    :param sort_keys:   sort dict keys; fragments follow the other entries
+    :param default:     function to convert objects which are not natively serializable
+    :return: utf-8 encoded json
+    """
+    if encoder is None:
+        encoder = get_json_encoder()
+
+    fragments = [(key, value) for key, value in result.items() if isinstance(value, JsonFragment)]
+    if len(fragments) == 0:
+        return encoder.dumps(result, sort_keys=sort_keys, default=default)
+
+    entries = {key: value for key, value in result.items() if not isinstance(value, JsonFragment)}
+    parts = [encoder.dumps(entries, sort_keys=sort_keys, default=default)[:-1]]     # without the closing brace
+    for key, value in fragments:
+        parts.extend([b',' if len(parts) > 1 or len(entries) > 0 else b'', encoder.dumps(key), b':', value.data])
+    parts.append(b'}')
+    return b''.join(parts)
+
+
+def json_response(result: dict) -> Response:
+    """
+    Make a json response.
+    Unlike jsonify, the json is always compact, and keys are only sorted if JSON_SORT_KEYS is set.
+    :param result:  result to serialize
+    :return: response
+    """
+    body = dumps_result(result, sort_keys=current_app.config.get("JSON_SORT_KEYS", False),
+                        default=current_app.json_encoder().default)
+    return current_app.response_class(body + b'\n', mimetype=current_app.config["JSONIFY_MIMETYPE"])
@@ -1,10 +1,16 @@
+import base64
+import binascii
 import traceback
 from http import HTTPStatus
+from typing import Optional
 
-from flask import request, abort, jsonify
+from flask import request, abort
 
-from .constants import REQ_ARG_PAGE, REQ_ARG_PER_PAGE, REQ_ARG_PAGINATION, REQ_ARG_TYPE, ENTITY_TYPE
+from .constants import (REQ_ARG_PAGE, REQ_ARG_PER_PAGE, REQ_ARG_PAGINATION, REQ_ARG_TYPE, REQ_ARG_CURSOR,
+                        ENTITY_TYPE
+                        )
 from .app_cfg import max_items_per_page
+from .json_encoder import json_response
 
 
 def get_request_arg(arg: str, default: int) -> int:
@@ -59,6 +65,56 @@ def get_request_type() -> str:
     return req_type.lower()
 
 
+def encode_cursor(last_id: int) -> str:
+    """
+    Encode an opaque pagination cursor.
+    :param last_id: id of the last item returned
+    :return: cursor
+    """
+    return base64.urlsafe_b64encode(f'id:{last_id}'.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Optional[int]:
+    """
+    Decode an opaque pagination cursor.
+    :param cursor:  cursor
+    :return: id of the last item returned, or None if cursor is invalid
+    """
+    try:
+        prefix, last_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':')
+        last_id = int(last_id) if prefix == 'id' else None
+    except (binascii.Error, UnicodeError, ValueError):
+        last_id = None
+    return last_id if last_id is None or last_id >= 0 else None
+
+
+def get_request_cursor() -> Optional[int]:
+    """
+    Get the pagination cursor from the request arguments.
+    :return: id of the last item returned, 0 to start from the beginning, or None if cursor mode is not requested
+    """
+    cursor = request.args.get(REQ_ARG_CURSOR, None, type=str)
+    if cursor is None:
+        last_id = None
+    elif len(cursor) == 0:
+        last_id = 0
+    else:
+        last_id = decode_cursor(cursor)
+        if last_id is None:
+            abort(HTTPStatus.BAD_REQUEST.value)
+    return last_id
+
+
+def page_offset(page: int, num_per_page: int) -> int:
+    """
+    Get the offset of the start of a page.
+    :param page:            requested page
+    :param num_per_page:    items per page
+    :return: offset
+    """
+    return num_per_page * (page - 1)
+
+
 def pagination(page: int, num_per_page: int, total: int) -> (int, int, int, str):
     """
     Get pagination data.
@@ -69,7 +125,7 @@ def pagination(page: int, num_per_page: int, total: int) -> (int, int, int, str)
     """
     code = HTTPStatus.OK.value
     msg = None
-    offset = num_per_page * (page - 1)
+    offset = page_offset(page, num_per_page)
     limit = num_per_page * page
 
     if offset > total:
@@ -81,12 +137,13 @@ def pagination(page: int, num_per_page: int, total: int) -> (int, int, int, str)
     return offset, limit, code, msg
 
 
-def _make_result(success: bool, error: int = None, message: str = None, **kwargs):
+def _make_result(success: bool, error: int = None, message: str = None, entries: dict = None, **kwargs):
     """
     Make a json result.
     :param success: True or False
     :param error:   if success == False, HTTP error code
     :param message: if success == False, HTTP error message
+    :param entries: result data as a dict
     :param kwargs:  result data as key/value pairs
     :return:
     """
@@ -97,9 +154,12 @@ def _make_result(success: bool, error: int = None, message: str = None, **kwargs
         result["error"] = error
         result["message"] = message if message is not None else ''
 
-    result = {**result, **kwargs}
+    # the result is built in place, rather than merging copies
+    if entries is not None:
+        result.update(entries)
+    result.update(kwargs)
 
-    return jsonify(result)
+    return json_response(result)
 
 
 def success_result(**kwargs):
@@ -145,9 +205,28 @@ def paginated_success_result(data: list, page: int, per_page: int, total: int, o
         key_or_alias("offset", aliases): offset,
         key_or_alias("limit", aliases): limit
     }
-    return success_result(**{
-        **result, **kwargs
-    })
+    return _make_result(True, entries=result, **kwargs)
+
+
+def cursor_success_result(data: list, per_page: int, cursor: Optional[str], next_cursor: Optional[str],
+                          aliases: dict = None, **kwargs):
+    """
+    Make a cursor paginated json result
+    :param data:        result data
+    :param per_page:    items per page
+    :param cursor:      requested cursor
+    :param next_cursor: cursor for the next page, or None if there are no more items
+    :param aliases:     dict of aliases for standard body fields
+    :param kwargs:      optional additional entries to include
+    :return:
+    """
+    result = {
+        key_or_alias("data", aliases): data,
+        key_or_alias("per_page", aliases): per_page,
+        key_or_alias("cursor", aliases): cursor,
+        key_or_alias("next_cursor", aliases): next_cursor
+    }
+    return _make_result(True, entries=result, **kwargs)
 
 
 def error_result(error: int, message: str, **kwargs):
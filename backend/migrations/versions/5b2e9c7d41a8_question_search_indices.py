@@ -0,0 +1,44 @@
+"""question search indices
+
+Revision ID: 5b2e9c7d41a8
+Revises: 3cbfb3ae2f14
+Create Date: 2026-10-18 09:12:31.402117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2e9c7d41a8'
+down_revision = '3cbfb3ae2f14'
+branch_labels = None
+depends_on = None
+
+# trigram GIN indices support ILIKE '%term%' searches without a sequential scan
+QUESTION_TRGM_INDEX = 'ix_questions_question_trgm'
+ANSWER_TRGM_INDEX = 'ix_questions_answer_trgm'
+
+
+def _is_postgresql():
+    return op.get_bind().dialect.name == 'postgresql'
+
+
+def upgrade():
+    if not _is_postgresql():
+        # other engines use the in-process search index
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(QUESTION_TRGM_INDEX, 'questions', ['question'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'question': 'gin_trgm_ops'})
+    op.create_index(ANSWER_TRGM_INDEX, 'questions', ['answer'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'answer': 'gin_trgm_ops'})
+
+
+def downgrade():
+    if not _is_postgresql():
+        return
+
+    op.drop_index(ANSWER_TRGM_INDEX, table_name='questions')
+    op.drop_index(QUESTION_TRGM_INDEX, table_name='questions')
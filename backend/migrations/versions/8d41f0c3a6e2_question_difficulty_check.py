@@ -0,0 +1,30 @@
+"""question difficulty check
+
+Revision ID: 8d41f0c3a6e2
+Revises: 5b2e9c7d41a8
+Create Date: 2026-10-18 14:05:12.517304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41f0c3a6e2'
+down_revision = '5b2e9c7d41a8'
+branch_labels = None
+depends_on = None
+
+DIFFICULTY_CONSTRAINT = 'ck_questions_difficulty'
+DIFFICULTY_CHECK = 'difficulty>=1 AND difficulty<=5'
+
+
+def upgrade():
+    # batch mode, as sqlite can only add a constraint by recreating the table
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.create_check_constraint(DIFFICULTY_CONSTRAINT, DIFFICULTY_CHECK)
+
+
+def downgrade():
+    with op.batch_alter_table('questions') as batch_op:
+        batch_op.drop_constraint(DIFFICULTY_CONSTRAINT, type_='check')
@@ -1,30 +1,61 @@
 #!/usr/bin/env python3
+"""
+Load the sample data, and optionally external data files and/or a synthetic bank of questions.
+
+Categories are created as required, and questions are inserted in chunks; on PostgreSQL using COPY from an
+in-memory buffer, otherwise using a bulk insert. Match lists are generated in a batch per chunk, so each distinct
+answer is only processed once. Questions which already exist are skipped, so the script may be rerun.
+
+Data files are newline-delimited json (.ndjson/.jsonl) or csv (.csv) with question, answer, category and, optionally,
+difficulty fields, i.e. the same format as the question import and export endpoints. The category may be a category
+type, which is created if it does not exist, or an existing category id.
+
+Usage:
+$ cd /path/to/project/backend/setup
+$ export PYTHONPATH=/path/to/project
+$ python -m load_initial_data
+$ python -m load_initial_data --no-sample --data questions.ndjson more_questions.csv
+$ python -m load_initial_data --synthetic 100000 --categories 50
+"""
 # ---------------------------------------------------------------------------- #
 # Imports
 # ---------------------------------------------------------------------------- #
+import argparse
+import csv
+import io
+import os
 import random
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Tuple, Union
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import nltk
-from backend.config import SQLALCHEMY_DATABASE_URI, NLTK_DATA_PATH
+from sqlalchemy import create_engine, insert, select, text, func
+from sqlalchemy.engine import Engine, Connection
+from sqlalchemy.exc import SQLAlchemyError
 
 # ---------------------------------------------------------------------------- #
-# App Config.
+# Models.
 # ---------------------------------------------------------------------------- #
 from backend.flaskr import print_exc_info
+from backend.flaskr.model import (Category, Question, generate_matches, sqlite_engine_options, M_QUESTION, M_ANSWER,
+                                  M_MATCH, M_CATEGORY, M_DIFFICULTY
+                                  )
+from backend.flaskr.model.match import configure_match
+from backend.flaskr.service.question_import import parse_ndjson, parse_csv
+from backend.flaskr.service.question_service import validate_question
+from backend.flaskr.util import MIN_DIFFICULTY, MAX_DIFFICULTY
 
-engine = create_engine(SQLALCHEMY_DATABASE_URI)
+COPY_METHOD = 'copy'        # postgresql COPY from an in-memory buffer
+INSERT_METHOD = 'insert'    # bulk insert
+METHODS = [COPY_METHOD, INSERT_METHOD]
 
-Session = sessionmaker(bind=engine)
-session = Session()
+# Default number of questions inserted per transaction.
+CHUNK_SIZE = 10000
 
-nltk.data.path.append(NLTK_DATA_PATH)
-
-# ---------------------------------------------------------------------------- #
-# Models.
-# ---------------------------------------------------------------------------- #
-from backend.flaskr.model import Category, Question
+# Questions are dicts of question, answer, category type or id, and optionally difficulty and match.
+QuestionRow = Dict[str, object]
+# Question, or error message for an invalid question.
+LoadRow = Union[QuestionRow, str]
 
 # script ids for categories
 SID_SCIENCE = 1
@@ -34,290 +65,578 @@ SID_HISTORY = 4
 SID_ENTERTAINMENT = 5
 SID_SPORTS = 6
 
+CATEGORY_TYPES = [
+    # script id, category
+    (SID_SCIENCE, "Science"),
+    (SID_ART, "Art"),
+    (SID_GEOGRAPHY, "Geography"),
+    (SID_HISTORY, "History"),
+    (SID_ENTERTAINMENT, "Entertainment"),
+    (SID_SPORTS, "Sports"),
+]
+
+WORDS = ['river', 'mountain', 'planet', 'painter', 'novel', 'empire', 'ocean', 'violin', 'desert', 'island', 'castle',
+         'comet', 'glacier', 'pharaoh', 'orbit', 'symphony', 'volcano', 'forest', 'emperor', 'galaxy', 'harbor', 'poet',
+         'temple', 'canyon', 'meteor', 'opera', 'sculptor', 'tundra', 'monsoon', 'lagoon', 'dynasty', 'nebula']
+
+QUESTION_DATA = [
+    # question, answer, difficulty, category script id
+    ("Whose autobiography is entitled 'I Know Why the Caged Bird Sings'?", "Maya Angelou", 2, 4),
+    ("What boxer's original name is Cassius Clay?", "Muhammad Ali", 1, 4),
+    ("What movie earned Tom Hanks his third straight Oscar nomination, in 1996?", "Apollo 13", 4, 5),
+    ("What actor did author Anne Rice first denounce, then praise in the role of her beloved Lestat?", "Tom Cruise",
+     4, 5),
+    ("What was the title of the 1990 fantasy directed by Tim Burton about a young man with multi-bladed appendages?",
+     "Edward Scissorhands", 3, 5),
+    ("Which is the only team to play in every soccer World Cup tournament?", "Brazil", 3, 6),
+    ("Which country won the first ever soccer World Cup in 1930?", "Uruguay", 4, 6),
+    ("Who invented Peanut Butter?", "George Washington Carver", 2, 4),
+    ("What is the largest lake in Africa?", "Lake Victoria", 2, 3),
+    ("In which royal palace would you find the Hall of Mirrors?", "The Palace of Versailles", 3, 3),
+    ("The Taj Mahal is located in which Indian city?", "Agra", 2, 3),
+    ("Which Dutch graphic artist–initials M C was a creator of optical illusions?", "Escher", 1, 2),
+    ("La Giaconda is better known as what?", "Mona Lisa", 3, 2),
+    ("How many paintings did Van Gogh sell in his lifetime?", "One", 4, 2),
+    ("Which American artist was a pioneer of Abstract Expressionism, and a leading exponent of action painting?",
+     "Jackson Pollock", 2, 2),
+    ("What is the heaviest organ in the human body?", "The Liver", 4, 1),
+    ("Who discovered penicillin?", "Alexander Fleming", 3, 1),
+    ("Hematology is a branch of medicine involving the study of what?", "Blood", 4, 1),
+    ("Which dung beetle was worshipped by the ancient Egyptians?", "Scarab", 4, 4),
+]
+
+GEOGRAPHY_DATA = [
+    # question, answer
+    ("What is the capital of Chile?", "Santiago"),
+    ("What is the highest mountain in Britain?", "Ben Nevis"),
+    ("What is the smallest country in the world?", "Vatican City"),
+    ("Alberta is a province of which country?", "Canada"),
+    ("How many countries still have the shilling as currency?", "Four"),
+    # ("How many countries still have the shilling as currency?", "Four – Kenya, Uganda, Tanzania and Somalia"),
+    ("Which is the only vowel not used as the first letter in a US State?", "E"),
+    ("What is the largest country in the world?", "Russia"),
+    ("Where would you find the River Thames?", "London, UK"),
+    ("What is the hottest continent on Earth?", "Africa"),
+    ("What is the longest river in the world?", "River Nile"),
+]
+HISTORY_DATA = [
+    # question, answer
+    ("What did the Romans call Scotland?", "Caledonia"),
+    ("Who was made Lord Mayor of London in 1397, 1398, 1406 and 1419?", "Dick Whittington"),
+    # ("Who was made Lord Mayor of London in 1397, 1398, 1406 and 1419?", "Richard (Dick) Whittington"),
+    ("Who was Henry VIIIs last wife?", "Catherine Parr"),
+    ("Who was the youngest British Prime Minister?", "William Pitt"),
+    # ("Who was the youngest British Prime Minister?", "William Pitt (The Younger)"),
+    ("In which year was Joan of Arc burned at the stake?", "1431"),
+    ("Which nationality was the polar explorer Roald Amundsen?", "Norwegian"),
+    ("Who was the first female Prime Minister of Australia?", "Julia Gillard"),
+    # ("Who was the first female Prime Minister of Australia?", "Julia Gillard (2010-2013)"),
+    ("Which English explorer was executed in 1618, fifteen year after being found guilty of conspiracy against "
+     "King James I of England and VI of Scotland?", "Sir Walter Raleigh"),
+    ("Which English city was once known as Duroliponte?", "Cambridge"),
+    ("The first successful vaccine was introduced by Edward Jenner in 1796. Which disease did it guard against?",
+     "Smallpox"),
+]
+SPORT_DATA = [
+    # question, answer
+    ("What are the five colours of the Olympic rings?", "Blue, yellow, black, green and red"),
+    ("In football, which team has won the Champions League (formerly the European Cup) the most?", "Real Madrid"),
+    ("How many players are there in a rugby league team?", "13"),
+    ("Which horse is the only three-time winner of the Grand National?", "Red Rum"),
+    ("Since 1977, where has snooker's World Championship taken place?", "Crucible Theatre"),
+    ("In tennis, what piece of fruit is found at the top of the men's Wimbledon trophy?", "Pineapple"),
+    ("Who won the FIFA Women's World Cup in 2019?", "USA"),
+    ("In bowling, what is the term given for three consecutive strikes?", "A turkey"),
+    ("How many world titles has Phil Talyor won in darts?", "16"),
+    ("In golf, where does the Masters take place?", "Augusta National"),
+    ("What is Usain Bolt’s 100m world record time?", "9.58 seconds"),
+    ("Which England footballer was famously never given a yellow card?", "Gary Lineker"),
+    ("Who is the only player to have scored in the Premier League, Championship, League 1, League 2, Conference, "
+     "FA Cup, League Cup, Football League Trophy, FA Trophy, Champions League, Europa League, Scottish Premier "
+     "League, Scottish Cup and Scottish League Cup?", "Gary Hooper"),
+    ("The LA Lakers and New York Knicks play which sport?", "Basketball"),
+    ("Katarina Johnson-Thompson is world champion in which sport?", "Heptathlon"),
+    ("Which country did F1 legend Ayrton Senna come from?", "Brazil"),
+    ("A penalty in football is taken how many yards away from the goal?", "12 yards"),
+    ("Who holds the women's record for the 100m sprint?", "Florence Griffith-Joyner"),
+    # ("Who holds the women's record for the 100m sprint?", "Florence Griffith-Joyner (10.49s)"),
+    ("What club were West Ham United founded as?", "Thames Ironworks"),
+    ("Who has scored the most Premier League hat-tricks?", "Sergio Aguero"),
+    ("Who were Man Utd playing when Eric Cantona leaped into the crowd and kicked a fan?", "Crystal Palace"),
+    ("In which sport do you wear a plastron?", "Fencing"),
+    ("Which sport involves tucks and pikes?", "Diving"),
+    ("Who is the Premier League’s all-time top scorer?", "Alan Shearer"),
+    # ("Who is the Premier League’s all-time top scorer?", "Alan Shearer (260 goals)"),
+    ("Jessica Ennis-Hill competed for Great Britain in which sport?", "Heptathlon"),
+    ("England won the 2003 Rugby World Cup thanks to an iconic, last-gasp drop goal from Jonny Wilkinson. How "
+     "many points did England score in that famous match?", "20"),
+    ("Which famous football manager once said: “I wouldn’t say I was the best manager in the business. But I was "
+     "in the top one”?", "Bryan Clough"),
+    ("How many F1 championships has Lewis Hamilton won?", "Six"),
+    ("Chris Wilder helped guide Sheffield United from League One to the Premier League. In the Blades' League One "
+     "title-winning season, how many points did they accumulate?", "100"),
+    ("What colours are the five Olympic rings?", "Blue, yellow, black, green and red"),
+    ("How many Olympic gold medals did rower Steve Redgrave win?", "Five"),
+    ("In what year did Andy Murray win Wimbledon for the first time?", "2013"),
+    ("At which course is The Masters golf tournament held?", "Augusta"),
+    ("Who did Cristiano Ronaldo make his Premier League debut against in 2003?", "Bolton Wanderers"),
+    ("Who has won more Grand Slams, Roger Federer or Serena Williams?", "Serena Williams"),
+    ("The Pittsburgh Penguins play which sport?", "Ice hockey"),
+    ("Which WWE superstar did Tyson Fury wrestle in 2019?", "Braun Strowman"),
+    ("Who did England beat in the 2019 cricket World Cup final?", "New Zealand"),
+    ("Who is the top-ranked female golfer in the world?", "Jin Young Ko"),
+    ("Which rugby team play their home games at The Stoop?", "Harlequins"),
+    ("Who was the first woman to train the winner of the Grand National?", "Jennifer Susan Pitman"),
+    # ("Who was the first woman to train the winner of the Grand National?", "Jennifer Susan Pitman OBE"),
+    ("Who did Manchester City beat to win the Premier League on the final day of the 2011/12 season?", "QPR"),
+    ("The term ‘albatross’ in golf means what?", "Three under par"),
+    ("Which snooker player is nicknamed The Rocket?", "Ronnie O'Sullivan"),
+    ("Who are the owners of Liverpool FC?", "Fenway Sports Group"),
+    ("Wayne Rooney scored his Premier League first goal against which team?", "Arsenal"),
+    ("What was Wladimir Klitschko's boxing nickname?", "Dr. Steelhammer"),
+    ("Name the four Grand Slam events in tennis", "Australian Open, French Open, Wimbledon, US Open"),
+    ("At which Olympics did Dame Kelly Holmes win two gold medals?", "2004"),
+    ("Who is the current manager of Crystal Palace?", "Roy Hodgson"),
+    ("Name the only two positions who can score in netball.", "Goal shooter and goal attack"),
+    ("Where were the Olympics held in 1980?", "Russia"),
+    ("How many Super Bowls has American Football star Tom Brady won?", "Six"),
+    ("How many clubs did David Beckham play for during his career?", "Six"),
+    # ("How many clubs did David Beckham play for during his career?", "Six (Manchester United, Preston North
+    # End, Real Madrid, LA Galaxy, AC Milan, Paris Saint-Germain)"),
+    ("In which sport do competitors refer to ‘catching a crab’?", "Rowing"),
+    ("Which Scottish footballer was the first to command a six-figure transfer fee when he moved from Torino to "
+     "Manchester United?", "Denis Law"),
+    ("What colour medal did diver Tom Daley win at London 2012?", "Bronze"),
+]
+SCIENCE_DATA = [
+    # question, answer
+    ("At what temperature are Fahrenheit and Celsius equal to each other?", "-40"),
+    ("Which planet has the most moons?", "Jupiter"),
+    ("In the periodic table, what's the symbol for zinc?", "Zn"),
+    ("What type of animal is a barramundi", "A fish"),
+    ("What is a pomelo? Is it a) A hat b) A fruit c) A musical instrument?",
+     "b) A fruit - a pomelo is the largest fruit in the citrus family%%%b"),
+    ("What's the material called that won't carry an electric charge?", "An insulator"),
+    ("Where on the human body would you find the papillae?", "The tongue"),
+    ("Who was the ancient Greek god of medicine?", "Ascepius"),
+    ("What  kitchen appliance that saves us time did Percy Spencer invent?", "The Microwave cooker"),
+    ("Umami is the name of one of the five basic what?", "Tastes"),
+    ("If you get scurvy, what vitamin are you deficient in?", "Vitamin C"),
+    ("What is equal to mass times acceleration?", "Force"),
+    ("Who wrote A Brief History of Time?", "Stephen Hawking"),
+    ("Which frozen gas forms dry ice?", "Carbon Dioxide"),
+    ("What does a chronometer measure", "Time"),
+    ("What is the part of the eye called that's coloured and surrounds the pupil?", "The iris"),
+    ("For which animal is the Latin word lupine used?", "Wolf"),
+    ("What is the lightest metal?", "Lithium"),
+    ("What type of sugar does the brain need for energy?", "Glucose"),
+    ("Alopecia causes what to be lost from the body?", "Hair"),
+    ("Who discovered radio waves?", "Heinrich Hertz"),
+    ("What disease can you get from ticks?", "Lyme disease"),
+    ("Out of the seven colours of the rainbow, which one is in the middle?", "Green"),
+    ("What makes up between 0.5 per cent and three per cent of the dry weight of tobacco?", "Nicotine"),
+    ("In computer science, what does USB stand for?", "Universal Serial Bus"),
+]
+ART_DATA = [
+    # question, answer
+    ("Which two cities provide the setting for Charles Dickens’ ‘A Tale of Two Cities’?", "London and Paris"),
+    ("The Mona Lisa by Leonardo da Vinci is on display in which Paris museum?", "Louvre"),
+    ("Which artist painted the Poppy Field in 1873?", "Claude Monet"),
+    ("What is the name of the fourth book in the Harry Potter series?", "Harry Potter and the Goblet of Fire"),
+    ("The Creation of Adam is one of nine scenes featured on the ceiling of which Rome landmark?",
+     "The Sistine Chapel"),
+    ("Which Shakespeare play is the following quote from? \"The course of true love never did run smooth\"",
+     "A Midsummer Night's Dream"),
+    ("Who wrote the Curious Incident of the Dog in the Night Time?", "Mark Haddon"),
+    ("In which century did Leonardo da Vinci paint The Last Supper?", "Fifteenth century"),
+    ("The Tate is a network of four art museums; two are based in London, give the other two English locations?",
+     "Liverpool, and St. Ives, Cornwall"),
+    ("What are the names of the three ‘Darling’ children in J.M. Barrie’s ‘Peter Pan’?", "Wendy, John and Michael"),
+    ("Who created the famous sculpture 'The Thinker'?", "Auguste Rodin"),
+    ("Which Emily Brontë novel is the inspiration for a Kate Bush song?", "Wuthering Heights"),
+    ("Sir Quentin Saxby Blake is an English cartoonist, illustrator and children's writer best known for "
+     "illustrating books by which author?", "Roald Dahl"),
+    ("Which Shakespearean play features the characters of Goneril, Regan and Cordelia?", "King Lear"),
+    ("In which city would you find The Van Gogh Museum?", "Amsterdam"),
+    ("Which two primary colours could you mix together to make purple when painting?", "Red and blue"),
+    ("The Hunger Games young adult series was written by which author?", "Suzanne Collins"),
+    ("Who created the Angel of the North?", "Antony Gormley"),
+    ("Which famous work of literature opens with these lines? “Two households, both alike in dignity, "
+     "in fair Verona, where we lay our scene…”", "Romeo and Juliet"),
+    ("‘Guernica’, ‘The Weeping Woman’ and ‘Le Rêve’ are all works by the same artist. Can you name them?",
+     "Pablo Picasso"),
+    ("What is the name of the pig in E.B. White’s Charlotte’s Web?", "Wilbur"),
+    ("Which book has the following opening line been taken from? “These two very old people are the father and "
+     "mother of Mr. Bucket.”", "Charlie and the Chocolate Factory"),
+    ("Which artist cut off the lobe of his own ear and later shot himself?", "Vincent van Gogh"),
+    ("How many lines are there in a sonnet?", "14"),
+    ("What artist sold a balloon dog for $58.4 million?", "Jeff Koons"),
+]
+ENTERTAINMENT_DATA = [
+    # question, answer
+    ("John Singleton is the youngest person to be nominated for Best Director at the Oscars. For which film was "
+     "he nominated?", "Boyz n the Hood"),
+    ("What is the name of the opening number from 2016 musical La La Land", "Another Day of Sun"),
+    ("What was the highest grossing film of 2019?", "Avengers: Endgame"),
+    ("Which three films did James Dean star in?", "East of Eden, Rebel Without a Cause and Giant"),
+    ("Who wrote the score for 1994 Disney film The Lion King?", "Hans Zimmer"),
+    ("When was the National Television Awards’ Most Popular Entertainment/TV Presenter category won by someone "
+     "other than Ant and Dec?", "2000"),
+    ("What is the name of the Christmas hit written by Will Brewis’ (Hugh Grant) father in comedy About a Boy?",
+     "Santa’s Super Sleigh"),
+    ("Which American comedy series has won a record 37 Emmy Awards?", "Frasier"),
+    ("What is the title of the first ever Game of Throne episode?", "Winter is Coming"),
+    ("What is the name of the pub featured in UK soap Emmerdale", "The Woolpack"),
+    ("What are the names of the two winners of Love Island series 1", "Jess and Max"),
+    ("What was the most watched Netflix original TV series of 2019?", "Stranger Things"),
+    ("The Wire is set in which US city?", "Baltimore"),
+    ("What is the population of David Lynch’s idiosyncratic town Twin Peaks?", "52,101"),
+    ("Which key Breaking Bad character was famously meant to die in series one?", "Jesse Pinkman"),
+    ("What are the dying words of Charles Foster Kane in Citizen Kane?", "Rosebud"),
+    ("In The Matrix, does Neo take the blue pill or the red pill?", "Red"),
+    ("For what movie did Steven Spielberg win his first Oscar for Best Director?", "Schindler’s List"),
+    ("Which is the only foreign film to wine Best Picture at the Oscars?", "Parasite"),
+    ("Which veteran actors starred in the lead roles of True Detective, season one.",
+     "Matthew McConaughey and Woody Harrelson"),
+    ("What is the first name of Zoolander’s title character?", "Derek"),
+    ("Mary Poppins is nanny to which family?", "The Banks family"),
+    ("Which actor chipped a tooth making Fight Club?", "Brad Pitt"),
+    ("What is the name of Batman’s butler?", "Alfred Pennyworth"),
+    ("\"After all, tomorrow is another day!\" was the last line in which Oscar-winning Best Picture?",
+     "Gone With The Wind"),
+]
+
+
+def sample_questions(rng: random.Random) -> Iterator[QuestionRow]:
+    """
+    Get the sample questions.
+    :param rng: random number generator, used for the difficulty of questions without one
+    :return: iterator of questions
+    """
+    category_types = dict(CATEGORY_TYPES)
+
+    for question, answer, difficulty, sid in QUESTION_DATA:
+        yield {M_QUESTION: question, M_ANSWER: answer, M_CATEGORY: category_types[sid], M_DIFFICULTY: difficulty}
+
+    for sid, array in [
+        (SID_SCIENCE, SCIENCE_DATA),
+        (SID_ART, ART_DATA),
+        (SID_GEOGRAPHY, GEOGRAPHY_DATA),
+        (SID_HISTORY, HISTORY_DATA),
+        (SID_ENTERTAINMENT, ENTERTAINMENT_DATA),
+        (SID_SPORTS, SPORT_DATA),
+    ]:
+        for question, answer in array:
+            yield {M_QUESTION: question, M_ANSWER: answer, M_CATEGORY: category_types[sid],
+                   M_DIFFICULTY: rng.randint(MIN_DIFFICULTY, MAX_DIFFICULTY)}
+
+
+def synthetic_text(rng: random.Random, num_words: int) -> str:
+    return " ".join(rng.choices(WORDS, k=num_words))
+
+
+def synthetic_questions(num_questions: int, category_types: List[str], rng: random.Random,
+                        start: int = 0) -> Iterator[QuestionRow]:
+    """
+    Generate synthetic questions.
+    The answers are lowercase words without stopwords, so the match lists are generated directly.
+    :param num_questions:   number of questions
+    :param category_types:  category types to distribute the questions across
+    :param rng:             random number generator
+    :param start:           number of the first question, to keep question text unique across runs
+    :return: iterator of questions
+    """
+    for n in range(start, start + num_questions):
+        answer = synthetic_text(rng, rng.randint(1, 3))
+        yield {
+            M_QUESTION: f'Question {n}: which {synthetic_text(rng, rng.randint(3, 8))}?',
+            M_ANSWER: answer.title(),
+            M_MATCH: answer,
+            M_CATEGORY: rng.choice(category_types),
+            M_DIFFICULTY: rng.randint(MIN_DIFFICULTY, MAX_DIFFICULTY),
+        }
+
+
+def validate_row(row) -> str:
+    """
+    Validate a question from a data file.
+    :param row: question
+    :return: error message, or None if valid
+    """
+    if not isinstance(row, dict):
+        return validate_question(row)
+
+    # unlike the api, the category may be a category type, and the difficulty is optional
+    question = dict(row)
+    category = question.get(M_CATEGORY)
+    if isinstance(category, str) and len(category.strip()) > 0 and not category.isnumeric():
+        question[M_CATEGORY] = 0
+    if question.get(M_DIFFICULTY) in [None, '']:
+        question[M_DIFFICULTY] = MIN_DIFFICULTY
+    return validate_question(question)
+
+
+def file_questions(path: str) -> Iterator[LoadRow]:
+    """
+    Read questions from a newline-delimited json or csv file.
+    :param path: path of file
+    :return: iterator of questions, or error messages for invalid rows
+    """
+    is_csv = os.path.splitext(path)[1].lower() == '.csv'
+    with open(path, encoding='utf-8', newline='' if is_csv else None) as stream:
+        for row_num, row in (parse_csv if is_csv else parse_ndjson)(stream):
+            error = row if isinstance(row, str) else validate_row(row)
+            if error is None:
+                difficulty = row.get(M_DIFFICULTY)
+                row[M_DIFFICULTY] = None if difficulty is None or difficulty == '' else int(difficulty)
+                yield row
+            else:
+                yield f'{path}:{row_num}: {error}'
+
+
+def ensure_categories(conn: Connection, category_types: List[str]) -> Dict[str, int]:
+    """
+    Get the ids of categories, creating any which don't exist.
+    :param conn:            database connection
+    :param category_types:  category types
+    :return: map of lowercase category type to id
+    """
+    categories = Category.__table__
+    if len(category_types) == 0:
+        return {}
+    wanted = {category_type.strip().lower(): category_type.strip() for category_type in category_types}
+
+    def lookup() -> Dict[str, int]:
+        rows = conn.execute(select(categories.c.type, categories.c.id)
+                            .where(func.lower(categories.c.type).in_(list(wanted.keys()))))
+        return {category_type.lower(): category_id for category_type, category_id in rows}
+
+    ids = lookup()
+    missing = [{'type': category_type} for key, category_type in wanted.items() if key not in ids]
+    if len(missing) > 0:
+        if conn.dialect.full_returning:
+            # one multi-row insert, which returns the new ids
+            ids.update({category_type.lower(): category_id for category_id, category_type in conn.execute(
+                insert(categories).values(missing).returning(categories.c.id, categories.c.type))})
+        else:
+            conn.execute(insert(categories), missing)
+            ids = lookup()
+    return ids
+
+
+def _copy_questions(conn: Connection, rows: List[dict]):
+    """
+    Insert questions using COPY from an in-memory csv buffer.
+    :param conn:    database connection
+    :param rows:    question field values
+    """
+    columns = [M_QUESTION, M_ANSWER, M_MATCH, M_CATEGORY, M_DIFFICULTY]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # an unquoted empty field is null
+        writer.writerow(['' if row[column] is None else row[column] for column in columns])
+    buffer.seek(0)
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {Question.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                           buffer)
+
+
+def _category_key(category) -> str:
+    # category id, or lowercase category type
+    return str(category).strip().lower()
+
+
+def _load_chunk(engine: Engine, chunk: List[QuestionRow], categories: Dict[str, int], method: str) -> int:
+    """
+    Insert a chunk of questions in a transaction, skipping questions which already exist.
+    :param engine:      database engine
+    :param chunk:       questions
+    :param categories:  map of category id and lowercase category type to id; updated as categories are resolved
+    :param method:      insert method
+    :return: number of questions inserted
+    """
+    questions = Question.__table__
+
+    with engine.begin() as conn:
+        # in order of first use, so new categories are created in a consistent order
+        unresolved = [row[M_CATEGORY] for row in chunk if _category_key(row[M_CATEGORY]) not in categories]
+        new_types = list(dict.fromkeys([category for category in unresolved
+                                        if not _category_key(category).isnumeric()]))
+        if len(new_types) > 0:
+            categories.update(ensure_categories(conn, new_types))
+        new_ids = set([int(category) for category in unresolved if _category_key(category).isnumeric()])
+        if len(new_ids) > 0:
+            categories.update({str(category_id): category_id for category_id in conn.execute(
+                select(Category.__table__.c.id).where(Category.__table__.c.id.in_(list(new_ids)))).scalars()})
+
+        texts = [row[M_QUESTION] for row in chunk]
+        existing = set(conn.execute(select(questions.c.question).where(questions.c.question.in_(texts))).scalars())
+
+        rows = []
+        for row in chunk:
+            category = categories.get(_category_key(row[M_CATEGORY]))
+            if category is None:
+                print(f'\nUnknown category {row[M_CATEGORY]}: {row[M_QUESTION]}', file=sys.stderr)
+                continue
+            if row[M_QUESTION] in existing:
+                continue
+            rows.append({
+                M_QUESTION: row[M_QUESTION],
+                M_ANSWER: row[M_ANSWER],
+                M_MATCH: row.get(M_MATCH),
+                M_CATEGORY: category,
+                M_DIFFICULTY: row.get(M_DIFFICULTY),
+            })
+
+        # generate the matches in a batch, so repeated answers are only processed once
+        pending = [row for row in rows if row[M_MATCH] is None]
+        for row, (answer, match) in zip(pending, generate_matches([row[M_ANSWER] for row in pending])):
+            row[M_ANSWER] = answer
+            row[M_MATCH] = match
+
+        if len(rows) > 0:
+            if method == COPY_METHOD and engine.dialect.name == 'postgresql':
+                _copy_questions(conn, rows)
+            else:
+                conn.execute(insert(questions), rows)
+
+    return len(rows)
+
+
+def load_questions(engine: Engine, rows: Iterable[LoadRow], chunk_size: int = CHUNK_SIZE,
+                   method: str = COPY_METHOD) -> Tuple[int, int]:
+    """
+    Load questions, one transaction per chunk; invalid questions are reported and skipped.
+    :param engine:      database engine
+    :param rows:        questions, or error messages for invalid questions
+    :param chunk_size:  number of questions inserted per transaction
+    :param method:      insert method; COPY is only used on postgresql
+    :return: tuple of number of questions loaded and skipped
+    """
+    categories = {}
+    seen = set()
+    loaded = skipped = 0
+    chunk = []
+
+    def flush():
+        nonlocal loaded, skipped
+        inserted = _load_chunk(engine, chunk, categories, method)
+        loaded = loaded + inserted
+        skipped = skipped + len(chunk) - inserted
+        chunk.clear()
+        print(f'\rloaded {loaded} questions', end='', file=sys.stderr)
+
+    for row in rows:
+        if isinstance(row, str):
+            print(f'\n{row}', file=sys.stderr)
+            skipped = skipped + 1
+            continue
+        row[M_QUESTION] = row[M_QUESTION].strip()
+        if row[M_QUESTION] in seen:
+            skipped = skipped + 1
+            continue
+        seen.add(row[M_QUESTION])
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            flush()
+
+    if len(chunk) > 0:
+        flush()
+    print(file=sys.stderr)
+
+    return loaded, skipped
+
+
+def analyze(engine: Engine):
+    """
+    Update the planner statistics after a bulk load.
+    :param engine:  database engine
+    """
+    if engine.dialect.name == 'postgresql':
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text(f'VACUUM ANALYZE {Question.__tablename__}'))
+            conn.execute(text(f'VACUUM ANALYZE {Category.__tablename__}'))
+    elif engine.dialect.name == 'sqlite':
+        with engine.begin() as conn:
+            conn.execute(text(f'ANALYZE {Question.__tablename__}'))
+            conn.execute(text(f'ANALYZE {Category.__tablename__}'))
+
+
+def populate(engine: Engine, sample: bool = True, data_files: List[str] = None, synthetic: int = 0,
+             num_categories: int = None, chunk_size: int = CHUNK_SIZE, method: str = COPY_METHOD,
+             seed_value: int = None) -> Tuple[int, int]:
+    """
+    Load the sample data, data files and synthetic questions.
+    :param engine:          database engine
+    :param sample:          load the sample data
+    :param data_files:      paths of newline-delimited json or csv data files
+    :param synthetic:       number of synthetic questions
+    :param num_categories:  number of synthetic categories; default is the sample categories
+    :param chunk_size:      number of questions inserted per transaction
+    :param method:          insert method
+    :param seed_value:      random seed
+    :return: tuple of number of questions loaded and skipped
+    """
+    rng = random.Random(seed_value)
+    sample_types = [category_type for _, category_type in CATEGORY_TYPES]
+    synthetic_types = sample_types if num_categories is None else \
+        [f'Category {n}' for n in range(1, num_categories + 1)]
+
+    def rows() -> Iterator[LoadRow]:
+        if sample:
+            yield from sample_questions(rng)
+        for path in data_files or []:
+            yield from file_questions(path)
+        if synthetic > 0:
+            with engine.connect() as conn:
+                start = conn.execute(select(func.count()).select_from(Question.__table__)).scalar()
+            yield from synthetic_questions(synthetic, synthetic_types, rng, start=start)
+
+    # create the categories up front, so they have consecutive ids in order, e.g. the script ids in an empty database
+    with engine.begin() as conn:
+        ensure_categories(conn, (sample_types if sample else []) + (synthetic_types if synthetic > 0 else []))
+
+    result = load_questions(engine, rows(), chunk_size=chunk_size, method=method)
+    analyze(engine)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load the sample data, data files and/or synthetic questions')
+    parser.add_argument('--no-sample', action='store_true', help="don't load the sample data")
+    parser.add_argument('--data', nargs='+', default=[], metavar='FILE',
+                        help='newline-delimited json (.ndjson/.jsonl) or csv (.csv) question files to load')
+    parser.add_argument('--synthetic', type=int, default=0, metavar='N', help='number of synthetic questions to load')
+    parser.add_argument('--categories', type=int, metavar='N',
+                        help='number of synthetic categories; default is the sample categories')
+    parser.add_argument('--method', choices=METHODS, default=COPY_METHOD,
+                        help='insert method; copy is only available on postgresql')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='number of questions per transaction')
+    parser.add_argument('--random-seed', type=int, help='random seed')
+    args = parser.parse_args()
+
+    # ---------------------------------------------------------------------------- #
+    # App Config.
+    # ---------------------------------------------------------------------------- #
+    from backend.config import SQLALCHEMY_DATABASE_URI, NLTK_DATA_PATH, MATCH_TOKENIZER
 
-def populate():
-    # categories
-    category_types = [
-        # script id, category
-        (SID_SCIENCE, "Science"),
-        (SID_ART, "Art"),
-        (SID_GEOGRAPHY, "Geography"),
-        (SID_HISTORY, "History"),
-        (SID_ENTERTAINMENT, "Entertainment"),
-        (SID_SPORTS, "Sports"),
-    ]
-    categories = [Category(category_type=category_type[1]) for category_type in category_types]
-
-    question_data = [
-        # question, answer, difficulty, category_types[0]
-        ("Whose autobiography is entitled 'I Know Why the Caged Bird Sings'?", "Maya Angelou", 2, 4),
-        ("What boxer's original name is Cassius Clay?", "Muhammad Ali", 1, 4),
-        ("What movie earned Tom Hanks his third straight Oscar nomination, in 1996?", "Apollo 13", 4, 5),
-        ("What actor did author Anne Rice first denounce, then praise in the role of her beloved Lestat?", "Tom Cruise",
-         4, 5),
-        (
-        "What was the title of the 1990 fantasy directed by Tim Burton about a young man with multi-bladed appendages?",
-        "Edward Scissorhands", 3, 5),
-        ("Which is the only team to play in every soccer World Cup tournament?", "Brazil", 3, 6),
-        ("Which country won the first ever soccer World Cup in 1930?", "Uruguay", 4, 6),
-        ("Who invented Peanut Butter?", "George Washington Carver", 2, 4),
-        ("What is the largest lake in Africa?", "Lake Victoria", 2, 3),
-        ("In which royal palace would you find the Hall of Mirrors?", "The Palace of Versailles", 3, 3),
-        ("The Taj Mahal is located in which Indian city?", "Agra", 2, 3),
-        ("Which Dutch graphic artist–initials M C was a creator of optical illusions?", "Escher", 1, 2),
-        ("La Giaconda is better known as what?", "Mona Lisa", 3, 2),
-        ("How many paintings did Van Gogh sell in his lifetime?", "One", 4, 2),
-        ("Which American artist was a pioneer of Abstract Expressionism, and a leading exponent of action painting?",
-         "Jackson Pollock", 2, 2),
-        ("What is the heaviest organ in the human body?", "The Liver", 4, 1),
-        ("Who discovered penicillin?", "Alexander Fleming", 3, 1),
-        ("Hematology is a branch of medicine involving the study of what?", "Blood", 4, 1),
-        ("Which dung beetle was worshipped by the ancient Egyptians?", "Scarab", 4, 4),
-    ]
-
-    geography_data = [
-        # question, answer
-        ("What is the capital of Chile?", "Santiago"),
-        ("What is the highest mountain in Britain?", "Ben Nevis"),
-        ("What is the smallest country in the world?", "Vatican City"),
-        ("Alberta is a province of which country?", "Canada"),
-        ("How many countries still have the shilling as currency?", "Four"),
-        # ("How many countries still have the shilling as currency?", "Four – Kenya, Uganda, Tanzania and Somalia"),
-        ("Which is the only vowel not used as the first letter in a US State?", "E"),
-        ("What is the largest country in the world?", "Russia"),
-        ("Where would you find the River Thames?", "London, UK"),
-        ("What is the hottest continent on Earth?", "Africa"),
-        ("What is the longest river in the world?", "River Nile"),
-    ]
-    history_data = [
-        # question, answer
-        ("What did the Romans call Scotland?", "Caledonia"),
-        ("Who was made Lord Mayor of London in 1397, 1398, 1406 and 1419?", "Dick Whittington"),
-        # ("Who was made Lord Mayor of London in 1397, 1398, 1406 and 1419?", "Richard (Dick) Whittington"),
-        ("Who was Henry VIIIs last wife?", "Catherine Parr"),
-        ("Who was the youngest British Prime Minister?", "William Pitt"),
-        # ("Who was the youngest British Prime Minister?", "William Pitt (The Younger)"),
-        ("In which year was Joan of Arc burned at the stake?", "1431"),
-        ("Which nationality was the polar explorer Roald Amundsen?", "Norwegian"),
-        ("Who was the first female Prime Minister of Australia?", "Julia Gillard"),
-        # ("Who was the first female Prime Minister of Australia?", "Julia Gillard (2010-2013)"),
-        ("Which English explorer was executed in 1618, fifteen year after being found guilty of conspiracy against "
-         "King James I of England and VI of Scotland?", "Sir Walter Raleigh"),
-        ("Which English city was once known as Duroliponte?", "Cambridge"),
-        ("The first successful vaccine was introduced by Edward Jenner in 1796. Which disease did it guard against?",
-         "Smallpox"),
-    ]
-    sport_data = [
-        # question, answer
-        ("What are the five colours of the Olympic rings?", "Blue, yellow, black, green and red"),
-        ("In football, which team has won the Champions League (formerly the European Cup) the most?", "Real Madrid"),
-        ("How many players are there in a rugby league team?", "13"),
-        ("Which horse is the only three-time winner of the Grand National?", "Red Rum"),
-        ("Since 1977, where has snooker's World Championship taken place?", "Crucible Theatre"),
-        ("In tennis, what piece of fruit is found at the top of the men's Wimbledon trophy?", "Pineapple"),
-        ("Who won the FIFA Women's World Cup in 2019?", "USA"),
-        ("In bowling, what is the term given for three consecutive strikes?", "A turkey"),
-        ("How many world titles has Phil Talyor won in darts?", "16"),
-        ("In golf, where does the Masters take place?", "Augusta National"),
-        ("What is Usain Bolt’s 100m world record time?", "9.58 seconds"),
-        ("Which England footballer was famously never given a yellow card?", "Gary Lineker"),
-        ("Who is the only player to have scored in the Premier League, Championship, League 1, League 2, Conference, "
-         "FA Cup, League Cup, Football League Trophy, FA Trophy, Champions League, Europa League, Scottish Premier "
-         "League, Scottish Cup and Scottish League Cup?", "Gary Hooper"),
-        ("The LA Lakers and New York Knicks play which sport?", "Basketball"),
-        ("Katarina Johnson-Thompson is world champion in which sport?", "Heptathlon"),
-        ("Which country did F1 legend Ayrton Senna come from?", "Brazil"),
-        ("A penalty in football is taken how many yards away from the goal?", "12 yards"),
-        ("Who holds the women's record for the 100m sprint?", "Florence Griffith-Joyner"),
-        # ("Who holds the women's record for the 100m sprint?", "Florence Griffith-Joyner (10.49s)"),
-        ("What club were West Ham United founded as?", "Thames Ironworks"),
-        ("Who has scored the most Premier League hat-tricks?", "Sergio Aguero"),
-        ("Who were Man Utd playing when Eric Cantona leaped into the crowd and kicked a fan?", "Crystal Palace"),
-        ("In which sport do you wear a plastron?", "Fencing"),
-        ("Which sport involves tucks and pikes?", "Diving"),
-        ("Who is the Premier League’s all-time top scorer?", "Alan Shearer"),
-        # ("Who is the Premier League’s all-time top scorer?", "Alan Shearer (260 goals)"),
-        ("Jessica Ennis-Hill competed for Great Britain in which sport?", "Heptathlon"),
-        ("England won the 2003 Rugby World Cup thanks to an iconic, last-gasp drop goal from Jonny Wilkinson. How "
-         "many points did England score in that famous match?", "20"),
-        ("Which famous football manager once said: “I wouldn’t say I was the best manager in the business. But I was "
-         "in the top one”?", "Bryan Clough"),
-        ("How many F1 championships has Lewis Hamilton won?", "Six"),
-        ("Chris Wilder helped guide Sheffield United from League One to the Premier League. In the Blades' League One "
-         "title-winning season, how many points did they accumulate?", "100"),
-        ("What colours are the five Olympic rings?", "Blue, yellow, black, green and red"),
-        ("How many Olympic gold medals did rower Steve Redgrave win?", "Five"),
-        ("In what year did Andy Murray win Wimbledon for the first time?", "2013"),
-        ("At which course is The Masters golf tournament held?", "Augusta"),
-        ("Who did Cristiano Ronaldo make his Premier League debut against in 2003?", "Bolton Wanderers"),
-        ("Who has won more Grand Slams, Roger Federer or Serena Williams?", "Serena Williams"),
-        ("The Pittsburgh Penguins play which sport?", "Ice hockey"),
-        ("Which WWE superstar did Tyson Fury wrestle in 2019?", "Braun Strowman"),
-        ("Who did England beat in the 2019 cricket World Cup final?", "New Zealand"),
-        ("Who is the top-ranked female golfer in the world?", "Jin Young Ko"),
-        ("Which rugby team play their home games at The Stoop?", "Harlequins"),
-        ("Who was the first woman to train the winner of the Grand National?", "Jennifer Susan Pitman"),
-        # ("Who was the first woman to train the winner of the Grand National?", "Jennifer Susan Pitman OBE"),
-        ("Who did Manchester City beat to win the Premier League on the final day of the 2011/12 season?", "QPR"),
-        ("The term ‘albatross’ in golf means what?", "Three under par"),
-        ("Which snooker player is nicknamed The Rocket?", "Ronnie O'Sullivan"),
-        ("Who are the owners of Liverpool FC?", "Fenway Sports Group"),
-        ("Wayne Rooney scored his Premier League first goal against which team?", "Arsenal"),
-        ("What was Wladimir Klitschko's boxing nickname?", "Dr. Steelhammer"),
-        ("Name the four Grand Slam events in tennis", "Australian Open, French Open, Wimbledon, US Open"),
-        ("At which Olympics did Dame Kelly Holmes win two gold medals?", "2004"),
-        ("Who is the current manager of Crystal Palace?", "Roy Hodgson"),
-        ("Name the only two positions who can score in netball.", "Goal shooter and goal attack"),
-        ("Where were the Olympics held in 1980?", "Russia"),
-        ("How many Super Bowls has American Football star Tom Brady won?", "Six"),
-        ("How many clubs did David Beckham play for during his career?", "Six"),
-        # ("How many clubs did David Beckham play for during his career?", "Six (Manchester United, Preston North
-        # End, Real Madrid, LA Galaxy, AC Milan, Paris Saint-Germain)"),
-        ("In which sport do competitors refer to ‘catching a crab’?", "Rowing"),
-        ("Which Scottish footballer was the first to command a six-figure transfer fee when he moved from Torino to "
-         "Manchester United?", "Denis Law"),
-        ("What colour medal did diver Tom Daley win at London 2012?", "Bronze"),
-    ]
-    science_data = [
-        # question, answer
-        ("At what temperature are Fahrenheit and Celsius equal to each other?", "-40"),
-        ("Which planet has the most moons?", "Jupiter"),
-        ("In the periodic table, what's the symbol for zinc?", "Zn"),
-        ("What type of animal is a barramundi", "A fish"),
-        ("What is a pomelo? Is it a) A hat b) A fruit c) A musical instrument?",
-         "b) A fruit - a pomelo is the largest fruit in the citrus family%%%b"),
-        ("What's the material called that won't carry an electric charge?", "An insulator"),
-        ("Where on the human body would you find the papillae?", "The tongue"),
-        ("Who was the ancient Greek god of medicine?", "Ascepius"),
-        ("What  kitchen appliance that saves us time did Percy Spencer invent?", "The Microwave cooker"),
-        ("Umami is the name of one of the five basic what?", "Tastes"),
-        ("If you get scurvy, what vitamin are you deficient in?", "Vitamin C"),
-        ("What is equal to mass times acceleration?", "Force"),
-        ("Who wrote A Brief History of Time?", "Stephen Hawking"),
-        ("Which frozen gas forms dry ice?", "Carbon Dioxide"),
-        ("What does a chronometer measure", "Time"),
-        ("What is the part of the eye called that's coloured and surrounds the pupil?", "The iris"),
-        ("For which animal is the Latin word lupine used?", "Wolf"),
-        ("What is the lightest metal?", "Lithium"),
-        ("What type of sugar does the brain need for energy?", "Glucose"),
-        ("Alopecia causes what to be lost from the body?", "Hair"),
-        ("Who discovered radio waves?", "Heinrich Hertz"),
-        ("What disease can you get from ticks?", "Lyme disease"),
-        ("Out of the seven colours of the rainbow, which one is in the middle?", "Green"),
-        ("What makes up between 0.5 per cent and three per cent of the dry weight of tobacco?", "Nicotine"),
-        ("In computer science, what does USB stand for?", "Universal Serial Bus"),
-    ]
-    art_data = [
-        # question, answer
-        ("Which two cities provide the setting for Charles Dickens’ ‘A Tale of Two Cities’?", "London and Paris"),
-        ("The Mona Lisa by Leonardo da Vinci is on display in which Paris museum?", "Louvre"),
-        ("Which artist painted the Poppy Field in 1873?", "Claude Monet"),
-        ("What is the name of the fourth book in the Harry Potter series?", "Harry Potter and the Goblet of Fire"),
-        ("The Creation of Adam is one of nine scenes featured on the ceiling of which Rome landmark?",
-         "The Sistine Chapel"),
-        ("Which Shakespeare play is the following quote from? \"The course of true love never did run smooth\"",
-         "A Midsummer Night's Dream"),
-        ("Who wrote the Curious Incident of the Dog in the Night Time?", "Mark Haddon"),
-        ("In which century did Leonardo da Vinci paint The Last Supper?", "Fifteenth century"),
-        ("The Tate is a network of four art museums; two are based in London, give the other two English locations?",
-         "Liverpool, and St. Ives, Cornwall"),
-        ("What are the names of the three ‘Darling’ children in J.M. Barrie’s ‘Peter Pan’?", "Wendy, John and Michael"),
-        ("Who created the famous sculpture 'The Thinker'?", "Auguste Rodin"),
-        ("Which Emily Brontë novel is the inspiration for a Kate Bush song?", "Wuthering Heights"),
-        ("Sir Quentin Saxby Blake is an English cartoonist, illustrator and children's writer best known for "
-         "illustrating books by which author?", "Roald Dahl"),
-        ("Which Shakespearean play features the characters of Goneril, Regan and Cordelia?", "King Lear"),
-        ("In which city would you find The Van Gogh Museum?", "Amsterdam"),
-        ("Which two primary colours could you mix together to make purple when painting?", "Red and blue"),
-        ("The Hunger Games young adult series was written by which author?", "Suzanne Collins"),
-        ("Who created the Angel of the North?", "Antony Gormley"),
-        ("Which famous work of literature opens with these lines? “Two households, both alike in dignity, "
-         "in fair Verona, where we lay our scene…”", "Romeo and Juliet"),
-        ("‘Guernica’, ‘The Weeping Woman’ and ‘Le Rêve’ are all works by the same artist. Can you name them?",
-         "Pablo Picasso"),
-        ("What is the name of the pig in E.B. White’s Charlotte’s Web?", "Wilbur"),
-        ("Which book has the following opening line been taken from? “These two very old people are the father and "
-         "mother of Mr. Bucket.”", "Charlie and the Chocolate Factory"),
-        ("Which artist cut off the lobe of his own ear and later shot himself?", "Vincent van Gogh"),
-        ("How many lines are there in a sonnet?", "14"),
-        ("What artist sold a balloon dog for $58.4 million?", "Jeff Koons"),
-    ]
-    entertainment_data = [
-        # question, answer
-        ("John Singleton is the youngest person to be nominated for Best Director at the Oscars. For which film was "
-         "he nominated?", "Boyz n the Hood"),
-        ("What is the name of the opening number from 2016 musical La La Land", "Another Day of Sun"),
-        ("What was the highest grossing film of 2019?", "Avengers: Endgame"),
-        ("Which three films did James Dean star in?", "East of Eden, Rebel Without a Cause and Giant"),
-        ("Who wrote the score for 1994 Disney film The Lion King?", "Hans Zimmer"),
-        ("When was the National Television Awards’ Most Popular Entertainment/TV Presenter category won by someone "
-         "other than Ant and Dec?", "2000"),
-        ("What is the name of the Christmas hit written by Will Brewis’ (Hugh Grant) father in comedy About a Boy?",
-         "Santa’s Super Sleigh"),
-        ("Which American comedy series has won a record 37 Emmy Awards?", "Frasier"),
-        ("What is the title of the first ever Game of Throne episode?", "Winter is Coming"),
-        ("What is the name of the pub featured in UK soap Emmerdale", "The Woolpack"),
-        ("What are the names of the two winners of Love Island series 1", "Jess and Max"),
-        ("What was the most watched Netflix original TV series of 2019?", "Stranger Things"),
-        ("The Wire is set in which US city?", "Baltimore"),
-        ("What is the population of David Lynch’s idiosyncratic town Twin Peaks?", "52,101"),
-        ("Which key Breaking Bad character was famously meant to die in series one?", "Jesse Pinkman"),
-        ("What are the dying words of Charles Foster Kane in Citizen Kane?", "Rosebud"),
-        ("In The Matrix, does Neo take the blue pill or the red pill?", "Red"),
-        ("For what movie did Steven Spielberg win his first Oscar for Best Director?", "Schindler’s List"),
-        ("Which is the only foreign film to wine Best Picture at the Oscars?", "Parasite"),
-        ("Which veteran actors starred in the lead roles of True Detective, season one.",
-         "Matthew McConaughey and Woody Harrelson"),
-        ("What is the first name of Zoolander’s title character?", "Derek"),
-        ("Mary Poppins is nanny to which family?", "The Banks family"),
-        ("Which actor chipped a tooth making Fight Club?", "Brad Pitt"),
-        ("What is the name of Batman’s butler?", "Alfred Pennyworth"),
-        ("\"After all, tomorrow is another day!\" was the last line in which Oscar-winning Best Picture?",
-         "Gone With The Wind"),
-    ]
+    configure_match(tokenizer=MATCH_TOKENIZER, nltk_data_path=NLTK_DATA_PATH)
+    engine = create_engine(SQLALCHEMY_DATABASE_URI, **sqlite_engine_options(SQLALCHEMY_DATABASE_URI))
 
+    start = time.perf_counter()
     try:
-        # add categories
-        session.add_all(categories)
-        session.commit()
-
-        # retrieve categories
-        categories = [
-            (category_type[0], session.query(Category).filter(Category.type == category_type[1]).first())
-            for category_type in category_types
-        ]
-
-        # populate questions
-        questions = [
-            Question(question=q[0], answer=q[1], difficulty=q[2],
-                     category=next(x[1].id for x in categories if q[3] == x[0]))
-            for q in question_data
-        ]
-        session.add_all(questions)
-
-        # populate geography_data
-        for sid, array in [
-            (SID_SCIENCE, science_data),
-            (SID_ART, art_data),
-            (SID_GEOGRAPHY, geography_data),
-            (SID_HISTORY, history_data),
-            (SID_ENTERTAINMENT, entertainment_data),
-            (SID_SPORTS, sport_data),
-        ]:
-            category = next(x[1].id for x in categories if sid == x[0])
-            questions = [
-                Question(question=q[0], answer=q[1], difficulty=random.randint(1, 5), category=category)
-                for q in array
-            ]
-            session.add_all(questions)
-
-        session.commit()
-    except:
+        loaded, skipped = populate(engine, sample=not args.no_sample, data_files=args.data, synthetic=args.synthetic,
+                                   num_categories=args.categories, chunk_size=args.chunk_size, method=args.method,
+                                   seed_value=args.random_seed)
+    except (SQLAlchemyError, OSError):
         print_exc_info()
-        session.rollback()
+        sys.exit(1)
     finally:
-        session.close()
+        engine.dispose()
+    print(f'loaded {loaded} questions, skipped {skipped} existing, duplicate or invalid questions in '
+          f'{time.perf_counter() - start:.1f}s', file=sys.stderr)
 
 
 if __name__ == '__main__':
-    populate()
+    main()
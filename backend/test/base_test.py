@@ -1,41 +1,155 @@
 import json
+import sqlite3
 import unittest
 from http import HTTPStatus
 from typing import Union, Any
 
 from flask import Response
-from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, insert, text, event
 
 from backend import test_config
 from backend.flaskr import create_app, key_or_alias
-from backend.flaskr.model import setup_db
-from backend.test.test_data import EqualDataMixin
-
-from .misc import MatchParam
+from backend.flaskr.model import is_sqlite, sqlite_engine_options, Question, Category
+from backend.flaskr.model.models import db
+from backend.flaskr.service import (get_response_cache, init_question_index, invalidate_categories,
+                                   get_categories_version, get_question_cache)
+from backend.flaskr.service.question_search import get_question_search_index
+from backend.test.test_data import EqualDataMixin, ALL_CATEGORY_DATA, ALL_QUESTION_DATA
+
+from .misc import MatchParam, make_url
+
+
+__TEST_DATA_LOADED__ = False
+
+
+def load_test_data():
+    """
+    Create the test database with the test data, once per process, i.e. once per parallel test worker.
+    A SQLite database is recreated, as is a parallel test worker's PostgreSQL schema.
+    Note: when not running in parallel, a PostgreSQL test database is loaded from backend/setup/trivia.psql.
+    """
+    global __TEST_DATA_LOADED__
+
+    uri = test_config.SQLALCHEMY_DATABASE_URI
+    sqlite = is_sqlite(uri)
+    if __TEST_DATA_LOADED__ or (not sqlite and test_config.TEST_SCHEMA is None):
+        return
+
+    engine = create_engine(uri, **sqlite_engine_options(uri), **test_config.SQLALCHEMY_ENGINE_OPTIONS)
+    try:
+        if sqlite:
+            db.metadata.drop_all(engine)
+        else:
+            with engine.begin() as conn:
+                conn.execute(text(f'DROP SCHEMA IF EXISTS {test_config.TEST_SCHEMA} CASCADE'))
+                conn.execute(text(f'CREATE SCHEMA {test_config.TEST_SCHEMA}'))
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(insert(Category.__table__), [category.to_dict() for category in ALL_CATEGORY_DATA])
+            conn.execute(insert(Question.__table__), [question.to_dict() for question in ALL_QUESTION_DATA])
+            if not sqlite:
+                # the test data ids are explicit, so move the sequences on
+                for table in [Category.__table__, Question.__table__]:
+                    conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), max(id)) "
+                                      f"FROM {table.name}"))
+    finally:
+        engine.dispose()
+    __TEST_DATA_LOADED__ = True
+
+
+def non_transactional(test):
+    """
+    Decorator for a test which can't run in a rolled back transaction, e.g. a test making requests from multiple
+    threads, which require their own database connections. Changes made by the test are committed.
+    :param test: test method
+    :return: test method
+    """
+    test.non_transactional = True
+    return test
 
 
 class TriviaTestCase(unittest.TestCase):
     """This class represents the trivia test case"""
 
-    def setUp(self):
-        """Define test variables and initialize app."""
-        self.app = create_app(test_config=test_config)
-        self.app.testing = True
-        self.client = self.app.test_client()
-        setup_db(self.app)
+    @classmethod
+    def setUpClass(cls):
+        """Initialize the app, once per test case class."""
+        # load before creating the app, so the app loads its indices from the test data
+        load_test_data()
 
-        # binds the app to the current context
-        with self.app.app_context():
-            self.db = SQLAlchemy()
-            self.db.init_app(self.app)
-            # create all tables
-            self.db.create_all()
+        cls.app = create_app(test_config=test_config)
+        cls.app.testing = True
+        cls.db = db
 
+    def setUp(self):
+        """Define test variables and start the test transaction."""
+        self.client = self.app.test_client()
         self.max_items_per_page = test_config.MAX_ITEMS_PER_PAGE
+        # tests may change the config, which is restored in place as the application holds a reference to it
+        self._config = dict(self.app.config)
+
+        self._connection = None
+        test = getattr(self, self._testMethodName)
+        if not getattr(test, 'non_transactional', False):
+            self._begin_transaction()
 
     def tearDown(self):
         """Executed after reach test"""
-        pass
+        if self._connection is not None:
+            self._rollback_transaction()
+
+        self.app.config.clear()
+        self.app.config.update(self._config)
+
+        # the in-process caches and indices may hold data which was rolled back, or changed directly by the test
+        with self.app.app_context():
+            get_question_search_index(load=False).reset()
+            init_question_index()
+            get_question_cache().clear()
+            invalidate_categories()
+            get_categories_version()    # reload, so tests start with the categories cached
+            cache = get_response_cache()
+            if cache is not None:
+                cache.clear()
+
+    def _begin_transaction(self):
+        """
+        Run the test in a transaction which is rolled back by tearDown. The application's session is bound to a
+        savepoint within the transaction, so commits and rollbacks by the application are contained; the savepoint is
+        restarted whenever the session's transaction ends.
+        """
+        with self.app.app_context():
+            self._connection = db.engine.connect()
+        self._transaction = self._connection.begin()
+
+        self._sqlite_isolation = None
+        dbapi_connection = self._connection.connection.connection
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            # pysqlite's transaction handling doesn't support savepoints, so disable it and begin explicitly
+            self._sqlite_isolation = dbapi_connection.isolation_level
+            dbapi_connection.isolation_level = None
+            dbapi_connection.execute('BEGIN')
+
+        self._nested = self._connection.begin_nested()
+
+        self._session = db.session
+        db.session = db.create_scoped_session(options={'bind': self._connection, 'binds': {}})
+
+        @event.listens_for(db.session, 'after_transaction_end')
+        def restart_savepoint(session, transaction):
+            if not self._nested.is_active:
+                self._nested = self._connection.begin_nested()
+
+    def _rollback_transaction(self):
+        """ Rollback the test transaction, and restore the application's session. """
+        db.session.remove()
+        db.session = self._session
+
+        self._transaction.rollback()
+        if self._sqlite_isolation is not None:
+            self._connection.connection.connection.isolation_level = self._sqlite_isolation
+        self._connection.close()
+        self._connection = None
 
     def assert_ok(self, status_code: int, msg=None):
         self.assertEqual(HTTPStatus.OK.value, status_code, msg=msg)
@@ -208,3 +322,33 @@ class TriviaTestCase(unittest.TestCase):
             self.assertEqual(val, resp_body[key], f'value for {key} not correct')
 
         return page + 1, accum_total + len(resp_body[data_key])
+
+    def assert_cursor_pages(self, url: str, per_page: int, all_expected: list[EqualDataMixin], aliases: dict = None,
+                            **kwargs):
+        """
+        Request and verify all pages of data using cursor pagination
+        :param url:         url to request
+        :param per_page:    per page to request
+        :param all_expected: all expected results, in id order
+        :param aliases:     dict of aliases for standard body fields
+        :param kwargs:      additional url arguments
+        """
+        data_key = key_or_alias("data", aliases)
+        cursor = ''
+        received = []
+        with self.client as client:
+            while cursor is not None:
+                resp = client.get(make_url(url, cursor=cursor, per_page=per_page, **kwargs))
+                self.assert_ok(resp.status_code)
+
+                resp_body = json.loads(resp.data)
+                self.assert_success_response(resp_body)
+                self.assertEqual(per_page, resp_body["per_page"])
+                self.assertEqual(cursor, resp_body["cursor"])
+                self.assertTrue(data_key in resp_body.keys(), f'key {data_key} not in response')
+                self.assertLessEqual(len(resp_body[data_key]), per_page)
+
+                received.extend(resp_body[data_key])
+                cursor = resp_body["next_cursor"]
+
+        self.assert_data_array(all_expected, received)
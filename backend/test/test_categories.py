@@ -4,7 +4,7 @@ import unittest
 from http import HTTPStatus
 
 from backend.flaskr import (CATEGORIES_URL, CATEGORY_BY_ID_URL, QUESTIONS_BY_CATEGORY_ID_URL, CATEGORY_RESPONSE_ALIASES,
-                            QUESTION_RESPONSE_ALIASES, key_or_alias, Category
+                            QUESTION_RESPONSE_ALIASES, QUESTIONS_URL, key_or_alias, Category
                             )
 from backend.test.base_test import TriviaTestCase
 from backend.test.misc import make_url, MatchParam
@@ -133,6 +133,35 @@ class CategoriesTestCase(TriviaTestCase):
 
         self.assertEqual(len(questions), total, f'actual total != expected total')
 
+    def test_questions_by_category_id_cursor(self):
+        """ Test getting questions by category id with cursor pagination """
+        category = ALL_CATEGORY_DATA[random.randrange(0, len(ALL_CATEGORY_DATA))]
+        # get questions from db as not guaranteed to have pristine test data with just ALL_QUESTION_DATA
+        questions = [QuestionData.from_model(question)
+                     for question in Question.query.filter(Question.category == category.id).order_by(Question.id).all()
+                     ]
+        if len(questions) == 0:
+            self.fail(f'No questions found for category {category.id}')
+
+        self.assert_cursor_pages(QUESTIONS_BY_CATEGORY_ID_URL, 1, questions, aliases=QUESTION_RESPONSE_ALIASES,
+                                 category_id=category.id)
+
+    def test_categories_version(self):
+        """ Test the categories version is consistent across endpoints """
+        category = ALL_CATEGORY_DATA[random.randrange(0, len(ALL_CATEGORY_DATA))]
+        versions = set()
+        with self.client as client:
+            for url in [make_url(CATEGORIES_URL), make_url(CATEGORIES_URL, pagination='n', type='map'),
+                        make_url(QUESTIONS_URL), make_url(QUESTIONS_BY_CATEGORY_ID_URL, category_id=category.id)]:
+                resp = client.get(url)
+                self.assert_ok(resp.status_code)
+
+                resp_body = json.loads(resp.data)
+                self.assertTrue('categories_version' in resp_body.keys(), f'categories_version not in {url} response')
+                versions.add(resp_body['categories_version'])
+
+        self.assertEqual(1, len(versions))
+
 
 # Make the tests conveniently executable
 if __name__ == "__main__":
@@ -4,6 +4,10 @@ from test_categories import CategoriesTestCase
 from test_questions import QuestionsTestCase
 from test_users import UsersTestCase
 from test_quiz import QuizzesTestCase
+from test_metrics import MetricsTestCase
+from test_response_cache import ResponseCacheTestCase
+from test_json_encoder import JsonEncoderTestCase
+from test_load_initial_data import LoadInitialDataTestCase
 
 # Make the tests conveniently executable
 if __name__ == "__main__":
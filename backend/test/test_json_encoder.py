@@ -0,0 +1,52 @@
+import json
+import unittest
+
+from backend.flaskr import JsonFragment, dumps_result
+from backend.flaskr.util.json_encoder import StdlibJsonEncoder, OrjsonEncoder, JsonEncoder, register_json_encoder
+
+
+class JsonEncoderTestCase(unittest.TestCase):
+    """This class represents the test case for the json encoders"""
+
+    def encoders(self) -> list:
+        encoders = [StdlibJsonEncoder()]
+        try:
+            encoders.append(OrjsonEncoder())
+        except ImportError:
+            pass    # optional dependency
+        return encoders
+
+    def test_dumps_result(self):
+        """ Test results serialize to the same json with each encoder, including json fragments """
+        categories = {"1": "Science", "2": "Art", "3": "Géographie"}
+        for encoder in self.encoders():
+            with self.subTest(encoder=type(encoder).__name__):
+                fragment = JsonFragment(encoder.dumps(categories))
+                for result, expected in [
+                    ({'success': True, 'questions': [{'id': 1, 'question': 'Why?'}], 'total': 1},
+                     {'success': True, 'questions': [{'id': 1, 'question': 'Why?'}], 'total': 1}),
+                    ({'success': True, 'categories': fragment, 'total': 3},
+                     {'success': True, 'categories': categories, 'total': 3}),
+                    ({'categories': fragment, 'other': fragment},
+                     {'categories': categories, 'other': categories}),
+                ]:
+                    body = dumps_result(result, encoder=encoder)
+                    self.assertIsInstance(body, bytes)
+                    self.assertEqual(expected, json.loads(body))
+
+                body = dumps_result({'b': 1, 'a': 2}, encoder=encoder, sort_keys=True)
+                self.assertEqual(b'{"a":2,"b":1}', body)
+
+    def test_incomplete_encoder(self):
+        """ Test an encoder which doesn't implement dumps can't be created or registered """
+        class IncompleteEncoder(JsonEncoder):
+            pass
+
+        with self.assertRaises(TypeError):
+            IncompleteEncoder()
+        with self.assertRaises(TypeError):
+            register_json_encoder('incomplete', IncompleteEncoder)
+
+
+if __name__ == '__main__':
+    unittest.main()
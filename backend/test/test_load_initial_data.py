@@ -0,0 +1,83 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import create_engine, select, func
+
+from backend.flaskr.model import Category, Question, M_QUESTION, M_ANSWER, M_CATEGORY, M_DIFFICULTY
+from backend.flaskr.model.match import configure_match
+from backend.flaskr.model.models import db
+from backend.setup.load_initial_data import populate
+from backend import test_config
+
+
+class LoadInitialDataTestCase(unittest.TestCase):
+    """This class represents the test case for the initial data loader"""
+
+    @classmethod
+    def setUpClass(cls):
+        configure_match(tokenizer=test_config.MATCH_TOKENIZER, nltk_data_path=test_config.NLTK_DATA_PATH)
+
+    def setUp(self):
+        # a separate in-memory database, which is discarded when the engine is disposed
+        self.engine = create_engine('sqlite://')
+        db.metadata.create_all(self.engine)
+
+        handle, self.path = tempfile.mkstemp(suffix='.ndjson')
+        os.close(handle)
+
+    def tearDown(self):
+        self.engine.dispose()
+        os.remove(self.path)
+
+    def count(self, table) -> int:
+        with self.engine.connect() as conn:
+            return conn.execute(select(func.count()).select_from(table)).scalar()
+
+    def test_populate(self):
+        """ Test loading synthetic questions and a data file, with invalid rows skipped """
+        valid = [
+            {M_QUESTION: 'Which loader test question is valid?', M_ANSWER: 'This one', M_CATEGORY: 'Science',
+             M_DIFFICULTY: 2},
+            {M_QUESTION: 'Which loader test question has a new category?', M_ANSWER: 'This one',
+             M_CATEGORY: 'Loader Test'},
+        ]
+        invalid = [
+            {M_QUESTION: 'Which loader test question is too difficult?', M_ANSWER: 'This one',
+             M_CATEGORY: 'Science', M_DIFFICULTY: 9},
+            {M_QUESTION: 'Which loader test question has no answer?', M_CATEGORY: 'Science'},
+            {M_QUESTION: 'Which loader test question has an invalid difficulty?', M_ANSWER: 'This one',
+             M_CATEGORY: 'Science', M_DIFFICULTY: 'hard'},
+            [1],
+        ]
+        with open(self.path, 'w', encoding='utf-8') as stream:
+            for row in valid + invalid:
+                stream.write(f'{json.dumps(row)}\n')
+            stream.write('not json\n')
+            # duplicate of a valid question
+            stream.write(f'{json.dumps(valid[0])}\n')
+
+        num_synthetic = 20
+        loaded, skipped = populate(self.engine, sample=False, data_files=[self.path], synthetic=num_synthetic,
+                                   chunk_size=8, seed_value=1)
+
+        self.assertEqual(num_synthetic + len(valid), loaded)
+        self.assertEqual(len(invalid) + 2, skipped)
+        self.assertEqual(loaded, self.count(Question.__table__))
+
+        with self.engine.connect() as conn:
+            difficulty = conn.execute(select(Question.__table__.c.difficulty).where(
+                Question.__table__.c.question == valid[0][M_QUESTION])).scalar()
+            self.assertEqual(valid[0][M_DIFFICULTY], difficulty)
+            category_types = set(conn.execute(select(Category.__table__.c.type)).scalars())
+        self.assertIn('Loader Test', category_types)
+
+        # rerun, skipping the questions which now exist
+        loaded, skipped = populate(self.engine, sample=False, data_files=[self.path], seed_value=1)
+        self.assertEqual(0, loaded)
+        self.assertEqual(len(valid) + len(invalid) + 2, skipped)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import json
+import re
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from backend import test_config
+from backend.flaskr import (METRICS_URL, QUESTIONS_URL, CATEGORIES_URL, QUESTION_SEARCH_URL, QUIZZES_URL,
+                            QUESTION_SEARCH_TERM, PREVIOUS_QUESTIONS, QUIZ_CATEGORY, QUESTION_BATCH_URL, QUESTION_IDS)
+from backend.flaskr.model import is_sqlite, is_memory_sqlite, get_pool_metrics
+from backend.test.base_test import TriviaTestCase
+from backend.test.misc import make_url
+
+
+class MetricsTestCase(TriviaTestCase):
+    """This class represents the test case for application metrics"""
+
+    def test_pool_metrics(self):
+        """ Test connection pool metrics """
+        with self.client as client:
+            resp = client.get(QUESTIONS_URL)
+            self.assert_ok(resp.status_code)
+
+            resp = client.get(METRICS_URL)
+            self.assert_ok(resp.status_code)
+            resp_body = json.loads(resp.data)
+            self.assert_success_response(resp_body)
+
+            pool = resp_body['metrics']['pool']
+            self.assertGreater(pool['checkouts'], 0)
+            self.assertGreater(pool['connects'], 0)
+            self.assertEqual(pool['open_connections'], pool['connects'] - pool['closes'])
+            for histogram in ['wait_time', 'hold_time']:
+                self.assertEqual(pool[histogram]['buckets'][-1]['le'], '+Inf')
+                self.assertEqual(pool[histogram]['buckets'][-1]['count'], pool[histogram]['count'])
+
+            uri = test_config.SQLALCHEMY_DATABASE_URI
+            if is_memory_sqlite(uri):
+                # single connection pool
+                size, max_overflow = 1, 0
+            elif is_sqlite(uri):
+                return  # null pool, so no queue status
+            else:
+                size, max_overflow = test_config.DB_POOL_SIZE, test_config.DB_POOL_MAX_OVERFLOW
+            self.assertGreater(pool['wait_time']['count'], 0)
+            self.assertEqual(pool['status']['size'], size)
+            self.assertEqual(pool['status']['max_overflow'], max_overflow)
+
+    def test_pool_metrics_app_engine(self):
+        """ Test connection pool metrics only include the application's engine """
+        metrics = get_pool_metrics()
+        before = metrics.snapshot()
+        engine = create_engine('sqlite://')
+        try:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        finally:
+            engine.dispose()
+
+        after = metrics.snapshot()
+        for counter in ['checkouts', 'connects']:
+            self.assertEqual(before[counter], after[counter], msg=counter)
+
+    def test_metrics_disabled(self):
+        """ Test metrics are not found when disabled """
+        self.app.config['METRICS_ENABLED'] = False
+        with self.client as client:
+            resp = client.get(METRICS_URL)
+            self.assert_not_found(resp.status_code)
+
+    def get_statements(self, resp) -> int:
+        """
+        Get the number of SQL statements from the Server-Timing header.
+        """
+        server_timing = resp.headers.get('Server-Timing')
+        self.assertIsNotNone(server_timing)
+        match = re.match(r'db;dur=[\d.]+;desc="(\d+) statements"', server_timing)
+        self.assertIsNotNone(match, msg=server_timing)
+        return int(match.group(1))
+
+    def test_query_budgets(self):
+        """ Test the number of SQL statements for endpoints is within budget """
+        budgets = test_config.SQL_QUERY_BUDGETS
+        with self.client as client:
+            for endpoint, resp in [
+                ('all_categories', client.get(CATEGORIES_URL)),
+                ('category_by_id', client.get(make_url(f'{CATEGORIES_URL}/1'))),
+                ('questions_by_category_id', client.get(make_url(f'{CATEGORIES_URL}/1/questions'))),
+                ('all_questions', client.get(QUESTIONS_URL)),
+                ('search_questions', client.post(QUESTION_SEARCH_URL, json={QUESTION_SEARCH_TERM: 'title'})),
+                ('questions_batch', client.post(QUESTION_BATCH_URL, json={QUESTION_IDS: [1, 2, 3]})),
+                ('next_question', client.post(QUIZZES_URL, json={PREVIOUS_QUESTIONS: [], QUIZ_CATEGORY: {'id': 0}})),
+            ]:
+                self.assert_ok(resp.status_code)
+                self.assertLessEqual(self.get_statements(resp), budgets[endpoint], msg=endpoint)
+
+    def test_query_budget_exceeded(self):
+        """ Test a warning is logged when the query budget is exceeded """
+        self.app.config['SQL_QUERY_BUDGETS'] = {}
+        self.app.config['SQL_QUERY_BUDGET'] = 0
+        with self.client as client:
+            with self.assertLogs(self.app.logger, level='WARNING') as logs:
+                resp = client.get(QUESTIONS_URL)
+            self.assert_ok(resp.status_code)
+            self.assertGreater(self.get_statements(resp), 0)
+            self.assertTrue(any(['query budget exceeded' in line and '"all_questions"' in line
+                                 for line in logs.output]), msg=logs.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,14 +1,23 @@
+import csv
+import io
 import json
 import random
 import unittest
 from http import HTTPStatus
 
-from sqlalchemy import and_
+from sqlalchemy import and_, false
+from sqlalchemy.exc import IntegrityError
 
 from backend.flaskr import (QUESTIONS_URL, QUESTION_BY_ID_URL, QUESTION_RESPONSE_ALIASES, QUESTION_SEARCH_URL,
-                            QUESTION_SEARCH_TERM, MIN_DIFFICULTY, MAX_DIFFICULTY, key_or_alias
+                            QUESTION_SEARCH_TERM, QUESTION_SEARCH_ANSWER, QUESTION_SEARCH_RANKED, MIN_DIFFICULTY,
+                            MAX_DIFFICULTY, QUESTION_IMPORT_URL, QUESTION_EXPORT_URL, QUESTION_BATCH_URL, QUESTION_IDS,
+                            key_or_alias, encode_cursor
                             )
-from backend.flaskr.model.models import ANS_MATCH_SEPARATOR
+from backend.flaskr.service import get_question_cache
+from backend.flaskr.service.question_search import DATABASE_SEARCH, INDEX_SEARCH
+from backend.flaskr.model.models import ANS_MATCH_SEPARATOR, db
+from backend.flaskr.model import generate_match, generate_matches
+from backend.flaskr.model.match import configure_match, NLTK_TOKENIZER, SIMPLE_TOKENIZER
 from backend.test.base_test import TriviaTestCase
 from backend.test.misc import Expect
 from backend.test.misc import make_url, MatchParam
@@ -75,6 +84,25 @@ class QuestionsTestCase(TriviaTestCase):
             self.assert_error_response(data, HTTPStatus.BAD_REQUEST.value, HTTPStatus.BAD_REQUEST.phrase,
                                        MatchParam.CASE_INSENSITIVE, MatchParam.IN)
 
+    def test_all_questions_cursor(self):
+        """ Test all questions cursor pagination """
+        # get questions from db as not guaranteed to have pristine test data with just ALL_QUESTION_DATA
+        questions = [QuestionData.from_model(question) for question in Question.query.order_by(Question.id).all()]
+
+        per_page = int(len(questions) / 3) + 1
+        if per_page > self.max_items_per_page:
+            per_page = self.max_items_per_page
+
+        self.assert_cursor_pages(QUESTIONS_URL, per_page, questions, aliases=QUESTION_RESPONSE_ALIASES)
+
+    def test_invalid_question_cursor(self):
+        """ Test an invalid questions cursor """
+        with self.client as client:
+            for cursor in ['not-a-cursor', encode_cursor(-1)]:
+                resp = client.get(
+                    make_url(QUESTIONS_URL, cursor=cursor))
+                self.assert_bad_request(resp.status_code)
+
     def verify_question_by_id(self, expected: QuestionData, ignore: list = None):
         """
         Test getting question by id
@@ -107,30 +135,75 @@ class QuestionsTestCase(TriviaTestCase):
             self.assert_error_response(resp_body, HTTPStatus.NOT_FOUND.value, HTTPStatus.NOT_FOUND.phrase,
                                        MatchParam.CASE_INSENSITIVE, MatchParam.IN)
 
+    def verify_questions_search(self, search_term: str, questions: list[QuestionData], **kwargs):
+        """
+        Request and verify all pages of a questions search
+        :param search_term: search term
+        :param questions:   expected results
+        :param kwargs:      additional request body entries
+        """
+        page = 1
+        per_page = int(len(questions) / 2) + 1
+        if per_page > self.max_items_per_page:
+            per_page = self.max_items_per_page
+        total = 0
+
+        while total < len(questions):
+            with self.client as client:
+                resp = client.post(
+                    make_url(QUESTION_SEARCH_URL, page=page, per_page=per_page),
+                    json={QUESTION_SEARCH_TERM: search_term, **kwargs}
+                )
+
+                page, total = self.assert_data_page(resp, page, per_page, total, questions,
+                                                    aliases=QUESTION_RESPONSE_ALIASES)
+
+        self.assertEqual(len(questions), total, f'actual total != expected total')
+
     def test_questions_search(self):
         """ Test questions search """
-        for search_term in ['title', 'Who']:
-            questions = questions_by(question_text=search_term)
-            if len(questions) == 0:
-                self.fail(f'No questions found for search term {search_term}')
-
-            page = 1
-            per_page = int(len(questions) / 2) + 1
-            if per_page > self.max_items_per_page:
-                per_page = self.max_items_per_page
-            total = 0
-
-            while total < len(questions):
-                with self.client as client:
-                    resp = client.post(
-                        make_url(QUESTION_SEARCH_URL, page=page, per_page=per_page),
-                        json={QUESTION_SEARCH_TERM: search_term}
-                    )
+        for backend in [DATABASE_SEARCH, INDEX_SEARCH]:
+            self.app.config['QUESTION_SEARCH_BACKEND'] = backend
+
+            for search_term in ['title', 'Who']:
+                questions = questions_by(question_text=search_term)
+                if len(questions) == 0:
+                    self.fail(f'No questions found for search term {search_term}')
+
+                self.verify_questions_search(search_term, questions)
 
-                    page, total = self.assert_data_page(resp, page, per_page, total, questions,
-                                                        aliases=QUESTION_RESPONSE_ALIASES)
+    def test_questions_search_answer(self):
+        """ Test questions search including answers """
+        # get questions from db as not guaranteed to have pristine test data with just ALL_QUESTION_DATA
+        all_questions = [QuestionData.from_model(question) for question in Question.query.order_by(Question.id).all()]
+        search_term = 'an'
+        questions = [question for question in all_questions
+                     if search_term in question.question.lower() or search_term in question.answer.lower()]
+        self.assertGreater(len(questions), len(questions_by(question_text=search_term)))
+
+        for backend in [DATABASE_SEARCH, INDEX_SEARCH]:
+            self.app.config['QUESTION_SEARCH_BACKEND'] = backend
+
+            self.verify_questions_search(search_term, questions, **{QUESTION_SEARCH_ANSWER: True})
+
+    def test_questions_search_ranked(self):
+        """ Test ranked questions search """
+        search_term = 'Who'
+        expected = set([question.id for question in questions_by(question_text=search_term)])
 
-            self.assertEqual(len(questions), total, f'actual total != expected total')
+        for backend in [DATABASE_SEARCH, INDEX_SEARCH]:
+            self.app.config['QUESTION_SEARCH_BACKEND'] = backend
+
+            with self.client as client:
+                resp = client.post(
+                    make_url(QUESTION_SEARCH_URL, per_page=self.max_items_per_page),
+                    json={QUESTION_SEARCH_TERM: search_term, QUESTION_SEARCH_RANKED: True}
+                )
+                self.assert_ok(resp.status_code)
+
+                resp_body = json.loads(resp.data)
+                self.assert_success_response(resp_body)
+                self.assertEqual(expected, set([question[M_ID] for question in resp_body['questions']]))
 
     def _create_question(self, expect: Expect, question: str = None, answer: str = None,
                          difficulty: int = None, category: int = None, tag: str = None):
@@ -205,6 +278,23 @@ class QuestionsTestCase(TriviaTestCase):
                                   tag=f'index {index}')
             index = index + 1
 
+    def test_database_constraints(self):
+        """ Test the database rejects an invalid difficulty or category """
+        science = category_by('Science')[0].id
+        max_category = max([category.id for category in ALL_CATEGORY_DATA])
+        with self.app.app_context():
+            for difficulty, category in [
+                (MIN_DIFFICULTY - 1, science),
+                (MAX_DIFFICULTY + 1, science),
+                (MIN_DIFFICULTY, max_category + 1000),
+            ]:
+                with self.subTest(difficulty=difficulty, category=category):
+                    db.session.add(Question('Which database constraint is tested?', 'This one', category,
+                                            difficulty))
+                    with self.assertRaises(IntegrityError):
+                        db.session.commit()
+                    db.session.rollback()
+
     def test_create_question_with_specified_match(self):
         """ Test create question with the match term specified """
         science = category_by('Science')[0].id
@@ -228,6 +318,207 @@ class QuestionsTestCase(TriviaTestCase):
                                 difficulty=MIN_DIFFICULTY, category=science)
         self.verify_question_by_id(expected)
 
+    def _import_questions(self, content_type: str, body: str, expected: dict, error_rows: list):
+        """
+        Import questions
+        :param content_type:    content type of body
+        :param body:            body
+        :param expected:        expected number of questions imported and failed
+        :param error_rows:      expected row numbers with errors
+        """
+        with self.client as client:
+            resp = client.post(QUESTION_IMPORT_URL, data=body.encode(), content_type=content_type)
+            self.assert_ok(resp.status_code)
+            resp_body = json.loads(resp.data)
+            self.assert_success_response(resp_body)
+            for key, value in expected.items():
+                self.assert_body_entry(resp_body, key, MatchParam.EQUAL, value=value)
+            self.assertEqual(error_rows, [error['row'] for error in resp_body['errors']], msg=resp_body['errors'])
+
+    def _delete_imported(self, prefix: str):
+        with self.app.app_context():
+            Question.query.filter(Question.question.like(f'{prefix}%')).delete(synchronize_session=False)
+            db.session.commit()
+
+    def test_import_questions_ndjson(self):
+        """ Test import questions from newline-delimited json """
+        science = category_by('Science')[0].id
+        prefix = 'Import ndjson'
+        lines = [json.dumps({M_QUESTION: f'{prefix} {n}?', M_ANSWER: f'The answer {n}', M_CATEGORY: science,
+                             M_DIFFICULTY: MIN_DIFFICULTY}) for n in range(12)]
+        lines.extend([
+            json.dumps({M_QUESTION: f'{prefix} by name?', M_ANSWER: 'Answer', M_CATEGORY: 'science',
+                        M_DIFFICULTY: MAX_DIFFICULTY}),
+            '',                                                             # blank line, ignored
+            '{"question": "not json"',                                      # row 15, invalid json
+            json.dumps({M_QUESTION: f'{prefix} 3?', M_ANSWER: 'Answer', M_CATEGORY: science,
+                        M_DIFFICULTY: MIN_DIFFICULTY}),                     # row 16, duplicate in import
+            json.dumps({M_QUESTION: f'{prefix} no category?', M_ANSWER: 'Answer', M_CATEGORY: 'Cooking',
+                        M_DIFFICULTY: MIN_DIFFICULTY}),                     # row 17, unknown category
+            json.dumps({M_QUESTION: f'{prefix} no answer?', M_CATEGORY: science,
+                        M_DIFFICULTY: MIN_DIFFICULTY}),                     # row 18, missing answer
+            json.dumps({M_QUESTION: ALL_QUESTION_DATA[0].question, M_ANSWER: 'Answer', M_CATEGORY: science,
+                        M_DIFFICULTY: MIN_DIFFICULTY}),                     # row 19, existing question
+        ])
+        try:
+            self._import_questions('application/x-ndjson', '\n'.join(lines),
+                                   {'imported': 13, 'failed': 5}, [15, 16, 17, 18, 19])
+
+            # verify imported questions, including the generated match
+            with self.client as client:
+                resp = client.post(QUESTION_SEARCH_URL, json={QUESTION_SEARCH_TERM: f'{prefix} 7?'})
+                questions = json.loads(resp.data)[key_or_alias("data", QUESTION_RESPONSE_ALIASES)]
+                self.assertEqual(1, len(questions))
+                self.assertEqual('The answer 7', questions[0][M_ANSWER])
+                self.assertEqual('answer 7', questions[0][M_MATCH])
+                self.assertEqual(science, questions[0][M_CATEGORY])
+
+            # reimport; all conflict with existing entries
+            self._import_questions('application/x-ndjson', '\n'.join(lines[:12]),
+                                   {'imported': 0, 'failed': 12}, list(range(1, 13)))
+        finally:
+            self._delete_imported(prefix)
+
+    def test_import_questions_csv(self):
+        """ Test import questions from csv """
+        prefix = 'Import csv'
+        body = "question,answer,category,difficulty\n" \
+               f'"{prefix} 1, with a comma?",Answer,Art,1\n' \
+               f"{prefix} 2?,Answer,History,Easy\n" \
+               f"{prefix} 3?,Answer,History,5\n"
+        try:
+            self._import_questions('text/csv; charset=utf-8', body, {'imported': 2, 'failed': 1}, [3])
+        finally:
+            self._delete_imported(prefix)
+
+    def test_import_questions_unsupported_type(self):
+        """ Test import questions with an unsupported content type """
+        with self.client as client:
+            resp = client.post(QUESTION_IMPORT_URL, data='[]', content_type='application/json')
+            self.assertEqual(HTTPStatus.UNSUPPORTED_MEDIA_TYPE.value, resp.status_code)
+
+    def _export_questions(self, expected_mimetype: str, **kwargs) -> str:
+        """
+        Export questions
+        :param expected_mimetype:   expected content type
+        :param kwargs:              request arguments
+        :return: exported content
+        """
+        with self.client as client:
+            resp = client.get(make_url(QUESTION_EXPORT_URL, **kwargs))
+            self.assert_ok(resp.status_code)
+            self.assertEqual(expected_mimetype, resp.mimetype)
+            self.assertTrue(resp.is_streamed)
+            return resp.get_data(as_text=True)
+
+    def test_export_questions_ndjson(self):
+        """ Test export all questions as newline-delimited json """
+        exported = [json.loads(line) for line in self._export_questions('application/x-ndjson').splitlines()]
+
+        with self.app.app_context():
+            expected = [question.format() for question in Question.query.order_by(Question.id).all()]
+        self.assertEqual(expected, exported)
+        self.assertTrue(set([q.id for q in ALL_QUESTION_DATA]).issubset([q[M_ID] for q in exported]))
+
+    def test_export_questions_csv(self):
+        """ Test export questions as csv, filtered by category and search term """
+        science = category_by('Science')[0].id
+        for kwargs, criteria in [
+            ({'format': 'csv', 'category': science}, Question.category == science),
+            ({'format': 'csv', QUESTION_SEARCH_TERM: 'title'}, Question.question.ilike('%title%')),
+            ({'format': 'csv', 'category': science, QUESTION_SEARCH_TERM: 'no such question'}, false()),
+        ]:
+            with self.subTest(kwargs=kwargs):
+                reader = csv.DictReader(io.StringIO(self._export_questions('text/csv', **kwargs), newline=''))
+                self.assertEqual([M_ID, M_QUESTION, M_ANSWER, M_MATCH, M_CATEGORY, M_DIFFICULTY], reader.fieldnames)
+                with self.app.app_context():
+                    expected = [q.id for q in Question.query.filter(criteria).order_by(Question.id).all()]
+                self.assertEqual(expected, [int(row[M_ID]) for row in reader])
+
+    def test_export_questions_invalid(self):
+        """ Test export questions with invalid arguments """
+        for kwargs, expected in [
+            ({'format': 'xml'}, HTTPStatus.BAD_REQUEST.value),
+            ({'category': 'science'}, HTTPStatus.BAD_REQUEST.value),
+            ({'category': 1000}, HTTPStatus.NOT_FOUND.value),
+        ]:
+            with self.subTest(kwargs=kwargs):
+                with self.client as client:
+                    resp = client.get(make_url(QUESTION_EXPORT_URL, **kwargs))
+                    self.assertEqual(expected, resp.status_code)
+
+    def _questions_batch(self, ids: list) -> dict:
+        with self.client as client:
+            resp = client.post(QUESTION_BATCH_URL, json={QUESTION_IDS: ids})
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assert_success_response(resp_body)
+            return resp_body
+
+    def test_questions_batch(self):
+        """ Test get questions by id, in the requested order with missing ids reported """
+        with self.app.app_context():
+            questions = {question.id: question.format() for question in Question.query.all()}
+        ids = random.sample(list(questions.keys()), 5)
+        missing_id = max(questions.keys()) + 1000
+
+        resp_body = self._questions_batch(ids + [missing_id, ids[0]])
+        self.assertEqual([questions[question_id] for question_id in ids], resp_body["questions"])
+        self.assertEqual([missing_id], resp_body["missing"])
+
+        # cached questions are served without reading them again
+        hits = get_question_cache().stats()['hits']
+        resp_body = self._questions_batch(ids[2:])
+        self.assertEqual([questions[question_id] for question_id in ids[2:]], resp_body["questions"])
+        self.assertEqual(hits + len(ids[2:]), get_question_cache().stats()['hits'])
+
+        # deleted questions are removed from the cache
+        with self.client as client:
+            self.assert_ok(client.delete(make_url(QUESTION_BY_ID_URL, question_id=ids[0])).status_code)
+        resp_body = self._questions_batch(ids)
+        self.assertEqual([questions[question_id] for question_id in ids[1:]], resp_body["questions"])
+        self.assertEqual([ids[0]], resp_body["missing"])
+
+        self.assertEqual([], self._questions_batch([])["questions"])
+
+    def test_questions_batch_invalid(self):
+        """ Test get questions by id with invalid ids """
+        for body, message in [
+            ({}, f"Expected {QUESTION_IDS} as a list of int"),
+            ({QUESTION_IDS: '1,2'}, f"Expected {QUESTION_IDS} as a list of int"),
+            ({QUESTION_IDS: [1, '2']}, f"Expected {QUESTION_IDS} as a list of int"),
+            ({QUESTION_IDS: [True]}, f"Expected {QUESTION_IDS} as a list of int"),
+            ({QUESTION_IDS: list(range(1, self.app.config['QUESTION_BATCH_MAX_IDS'] + 2))},
+             f"Too many {QUESTION_IDS}, max {self.app.config['QUESTION_BATCH_MAX_IDS']}"),
+        ]:
+            with self.subTest(body=str(body)[:40]):
+                with self.client as client:
+                    resp = client.post(QUESTION_BATCH_URL, json=body)
+                    self.assert_bad_request(resp.status_code)
+                    self.assert_error_response(json.loads(resp.data), HTTPStatus.BAD_REQUEST.value, message)
+
+    def test_generate_matches(self):
+        """ Test batch match generation is the same as individual match generation """
+        answers = [question.answer for question in ALL_QUESTION_DATA] * 2 + [f"answer{ANS_MATCH_SEPARATOR}match"]
+
+        matches = generate_matches(answers)
+        self.assertEqual([generate_match(answer) for answer in answers], matches)
+        self.assertEqual(("answer", "match"), matches[-1])
+        self.assertEqual(("The Palace of Versailles", "palace versailles"),
+                         generate_match("The Palace of Versailles"))
+
+    def test_simple_tokenizer(self):
+        """ Test the simple tokenizer generates the same matches as the nltk tokenizer """
+        answers = [question.answer for question in ALL_QUESTION_DATA] + ["It's a Wonderful Life", "Don't Look Now"]
+
+        expected = generate_matches(answers)
+        try:
+            configure_match(tokenizer=SIMPLE_TOKENIZER)
+            self.assertEqual(expected, generate_matches(answers))
+        finally:
+            configure_match(tokenizer=NLTK_TOKENIZER)
+
     def test_delete_question(self):
         """ Test delete question """
         science = category_by('Science')[0].id
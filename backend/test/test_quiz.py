@@ -1,14 +1,26 @@
 import json
 import random
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 
-from backend.flaskr import QUIZZES_URL, QUIZ_RESULTS_URL, USER_ID, NUM_CORRECT, NUM_QUESTIONS
+from flask import Flask
+
+from backend.flaskr import (QUIZZES_URL, QUIZ_RESULTS_URL, QUIZ_SESSIONS_URL, QUIZ_SESSION_URL, QUESTIONS_URL,
+                            QUESTION_BY_ID_URL, USER_ID, NUM_CORRECT, NUM_QUESTIONS, MIN_DIFFICULTY,
+                            MAX_DIFFICULTY, QUIZ_COMPACT_FORMAT, QUIZ_ADAPTIVE, QUIZ_SEED
+                            )
+from backend.flaskr.service import adaptive_difficulty
+from backend.flaskr.service.question_index import nearest_difficulties
+from backend.flaskr.controller.quiz_controller import COMPACT_FIELDS
 from backend.flaskr.model.models import QUESTION_FIELDS, User, M_USERNAME
+from backend.flaskr.service import shutdown_score_aggregator
+from backend.flaskr.service.score_aggregator import get_score_aggregator
 from backend.flaskr.util import PREVIOUS_QUESTIONS, QUIZ_CATEGORY
-from backend.test.base_test import TriviaTestCase
-from backend.test.misc import make_url, Expect
+from backend.test.base_test import TriviaTestCase, non_transactional
+from backend.test.misc import make_url, Expect, MatchParam
 from backend.test.test_data import *
-from backend.test.test_users import UsersTestCase
+# module import, so the users test case isn't also collected as part of this module when run using pytest
+from backend.test import test_users
 
 ALL_CATEGORY_TYPE = 'All'
 
@@ -138,12 +150,346 @@ class QuizzesTestCase(TriviaTestCase):
 
         self.assertEqual(expecting, received)
 
+    def test_all_category_questions_at_once(self):
+        """
+        Test all questions in a category, requesting more than are available
+        """
+        category, questions, expecting = self.setup_quiz_test()
+
+        with self.client as client:
+            resp = client.post(
+                make_url(QUIZZES_URL, num=len(questions) + 10), json={
+                    PREVIOUS_QUESTIONS: [],
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assert_success_response(resp_body)
+
+            self.assertTrue('questions' in resp_body.keys())
+            received = set()
+            count = 0
+            for recv_ques in resp_body['questions']:
+                count = self.verify_question(recv_ques[M_ID], recv_ques, count, received)
+
+        self.assertEqual(len(questions), count)
+        self.assertEqual(expecting, received)
+
+    def test_quiz_round_compact(self):
+        """
+        Test prefetching a quiz round in the compact format
+        """
+        category, questions, expecting = self.setup_quiz_test(ALL_CATEGORY_TYPE)
+        num = len(questions) - 2
+        excluded = questions[0].id
+
+        with self.client as client:
+            resp = client.post(
+                make_url(QUIZZES_URL, num=num, format=QUIZ_COMPACT_FORMAT), json={
+                    PREVIOUS_QUESTIONS: [excluded],
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assert_success_response(resp_body)
+            self.assertFalse('questions' in resp_body.keys())
+
+            quiz_round = resp_body['round']
+            self.assertEqual(set(COMPACT_FIELDS), set(quiz_round.keys()))
+            ids = quiz_round[M_ID]
+            self.assertEqual(num, len(ids))
+            self.assertEqual(num, len(set(ids)))
+            self.assertNotIn(excluded, ids)
+            self.assertTrue(set(ids).issubset(expecting))
+            for field in COMPACT_FIELDS:
+                self.assertEqual(num, len(quiz_round[field]))
+
+            for index, question_id in enumerate(ids):
+                expected = [question for question in questions if question.id == question_id][0]
+                self.assertEqual(expected.question, quiz_round[M_QUESTION][index])
+                self.assertEqual(expected.answer, quiz_round[M_ANSWER][index])
+                self.assertEqual(expected.match, quiz_round[M_MATCH][index])
+
+            # no more questions is an empty round
+            resp = client.post(
+                make_url(QUIZZES_URL, num=num, format=QUIZ_COMPACT_FORMAT), json={
+                    PREVIOUS_QUESTIONS: list(expecting),
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_ok(resp.status_code)
+            self.assertEqual({field: [] for field in COMPACT_FIELDS}, json.loads(resp.data)['round'])
+
+    def test_quiz_round_limits(self):
+        """
+        Test the number of quiz questions is limited, and an invalid format is rejected
+        """
+        category, questions, expecting = self.setup_quiz_test(ALL_CATEGORY_TYPE)
+        self.app.config['QUIZ_MAX_QUESTIONS'] = 3
+
+        with self.client as client:
+            resp = client.post(make_url(QUIZZES_URL, num=len(questions)), json={PREVIOUS_QUESTIONS: []})
+            self.assert_ok(resp.status_code)
+            self.assertEqual(3, len(json.loads(resp.data)['questions']))
+
+            resp = client.post(make_url(QUIZZES_URL, num=2, format='xml'), json={PREVIOUS_QUESTIONS: []})
+            self.assert_bad_request(resp.status_code)
+
+    def test_adaptive_difficulty(self):
+        """
+        Test the adaptive difficulty follows the player's accuracy, and the nearest difficulties are used when there
+        are insufficient questions
+        """
+        for num_correct, num_questions, expected in [(0, 0, 3), (0, 10, 1), (3, 10, 2), (5, 10, 3), (8, 10, 4),
+                                                     (10, 10, 5)]:
+            self.assertEqual(expected, adaptive_difficulty(num_correct, num_questions))
+        self.assertEqual([3, 2, 4, 1, 5], nearest_difficulties(3))
+        self.assertEqual([5, 4, 3, 2, 1], nearest_difficulties(5))
+
+        # the questions expected for a perfect score, in order of difficulty; there may be no questions of the
+        # hardest difficulty
+        category, questions, expecting = self.setup_quiz_test(ALL_CATEGORY_TYPE)
+        expected = [question.difficulty for difficulty in nearest_difficulties(MAX_DIFFICULTY)
+                    for question in questions if question.difficulty == difficulty]
+        num = len([difficulty for difficulty in expected if difficulty >= expected[0] - 1])
+
+        with self.client as client:
+            resp = client.post(
+                make_url(QUIZZES_URL, num=num), json={
+                    PREVIOUS_QUESTIONS: [], QUIZ_ADAPTIVE: True, NUM_CORRECT: 10, NUM_QUESTIONS: 10
+                })
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assertEqual(MAX_DIFFICULTY, resp_body['difficulty'])
+            self.assertEqual(expected[:num], [question[M_DIFFICULTY] for question in resp_body['questions']])
+
+    def test_adaptive_user_difficulty(self):
+        """
+        Test the adaptive difficulty follows a user's score
+        """
+        username = test_users.UsersTestCase.timestamped_username('adaptive_quiz_user')
+        test_users.UsersTestCase.register_user(self, username, 'secret')
+        user_id = User.query.filter(User.username == username).first().id
+
+        with self.client as client:
+            resp = client.post(QUIZ_RESULTS_URL, json={USER_ID: user_id, NUM_CORRECT: 1, NUM_QUESTIONS: 4})
+            self.assert_ok(resp.status_code)
+
+            resp = client.post(QUIZZES_URL, json={PREVIOUS_QUESTIONS: [], QUIZ_ADAPTIVE: True, USER_ID: user_id})
+            self.assert_ok(resp.status_code)
+            resp_body = json.loads(resp.data)
+            self.assertEqual(adaptive_difficulty(1, 4), resp_body['difficulty'])
+            self.assertEqual(resp_body['difficulty'], resp_body['question'][M_DIFFICULTY])
+
+            resp = client.post(QUIZZES_URL, json={PREVIOUS_QUESTIONS: [], QUIZ_ADAPTIVE: True, USER_ID: 100000})
+            self.assert_not_found(resp.status_code)
+
+    def test_seeded_quiz(self):
+        """
+        Test a seeded quiz selects the same questions when replayed
+        """
+        def play(seed: int, adaptive: bool) -> list:
+            previous = []
+            with self.client as client:
+                for turn in range(5):
+                    resp = client.post(QUIZZES_URL, json={
+                        PREVIOUS_QUESTIONS: previous, QUIZ_SEED: seed, QUIZ_ADAPTIVE: adaptive,
+                        NUM_CORRECT: turn, NUM_QUESTIONS: turn
+                    })
+                    self.assert_ok(resp.status_code)
+                    previous.append(json.loads(resp.data)['question'][M_ID])
+            return previous
+
+        for adaptive in [False, True]:
+            with self.subTest(adaptive=adaptive):
+                played = play(1, adaptive)
+                self.assertEqual(len(played), len(set(played)))
+                self.assertEqual(played, play(1, adaptive))
+
+    def test_adaptive_quiz_invalid(self):
+        """
+        Test an adaptive quiz with an invalid score or seed
+        """
+        for body in [
+            {NUM_CORRECT: 5, NUM_QUESTIONS: 4},
+            {NUM_CORRECT: -1, NUM_QUESTIONS: 4},
+            {NUM_CORRECT: 1},
+            {NUM_CORRECT: '1', NUM_QUESTIONS: 4},
+            {QUIZ_SEED: 'seed'},
+        ]:
+            with self.subTest(body=body):
+                with self.client as client:
+                    resp = client.post(QUIZZES_URL, json={PREVIOUS_QUESTIONS: [], QUIZ_ADAPTIVE: True, **body})
+                    self.assert_bad_request(resp.status_code)
+
+    def test_invalid_previous_questions(self):
+        """
+        Test requesting a question with invalid previous questions
+        """
+        for previous_questions in [['abc'], [1, None], [True], 1, 'abc']:
+            with self.subTest(previous_questions=previous_questions):
+                with self.client as client:
+                    resp = client.post(QUIZZES_URL, json={PREVIOUS_QUESTIONS: previous_questions})
+                    self.assert_bad_request(resp.status_code)
+
+    def test_no_more_questions(self):
+        """
+        Test requesting a question when all questions in a category have been answered
+        """
+        category, questions, expecting = self.setup_quiz_test()
+
+        with self.client as client:
+            resp = client.post(
+                QUIZZES_URL, json={
+                    PREVIOUS_QUESTIONS: list(expecting),
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assert_success_response(resp_body)
+
+            self.assertFalse('question' in resp_body.keys())
+
+    def test_new_question_available(self):
+        """
+        Test a newly created question is available for quizzes, and a deleted one is not
+        """
+        category, questions, expecting = self.setup_quiz_test('Science')
+        question = test_users.UsersTestCase.timestamped_username('Quiz question')
+
+        with self.client as client:
+            resp = client.post(QUESTIONS_URL, json={
+                M_QUESTION: question, M_ANSWER: 'Quiz answer', M_DIFFICULTY: MIN_DIFFICULTY,
+                M_CATEGORY: category.id
+            })
+            self.assert_created(resp.status_code)
+
+            resp = client.post(
+                QUIZZES_URL, json={
+                    PREVIOUS_QUESTIONS: list(expecting),
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assertTrue('question' in resp_body.keys())
+            self.assertEqual(question, resp_body['question'][M_QUESTION])
+
+            resp = client.delete(
+                make_url(QUESTION_BY_ID_URL, question_id=resp_body['question'][M_ID]))
+            self.assert_ok(resp.status_code)
+
+            resp = client.post(
+                QUIZZES_URL, json={
+                    PREVIOUS_QUESTIONS: list(expecting),
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assertFalse('question' in resp_body.keys())
+
+    def test_quiz_session(self):
+        """
+        Test all questions in a category using a quiz session, two at a time
+        """
+        category, questions, expecting = self.setup_quiz_test()
+        received = set()
+        count = 0
+
+        with self.client as client:
+            resp = client.post(
+                QUIZ_SESSIONS_URL, json={
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_created(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assert_success_response(resp_body)
+            self.assert_body_entry(resp_body, 'total', MatchParam.EQUAL, value=len(questions))
+            token = resp_body['session']
+
+            remaining = len(questions)
+            while remaining > 0:
+                resp = client.post(make_url(QUIZ_SESSION_URL, token=token, num=2))
+                self.assert_ok(resp.status_code)
+
+                resp_body = json.loads(resp.data)
+                self.assert_success_response(resp_body)
+
+                self.assertTrue('questions' in resp_body.keys())
+                for recv_ques in resp_body['questions']:
+                    self.assertFalse(recv_ques[M_ID] in received)
+                    count = self.verify_question(recv_ques[M_ID], recv_ques, count, received)
+
+                self.assertEqual(remaining - len(resp_body['questions']), resp_body['remaining'])
+                remaining = resp_body['remaining']
+
+            # quiz complete
+            resp = client.post(make_url(QUIZ_SESSION_URL, token=token))
+            self.assert_ok(resp.status_code)
+
+            resp_body = json.loads(resp.data)
+            self.assertFalse('question' in resp_body.keys())
+
+            # end session
+            resp = client.delete(make_url(QUIZ_SESSION_URL, token=token))
+            self.assert_ok(resp.status_code)
+
+            resp = client.post(make_url(QUIZ_SESSION_URL, token=token))
+            self.assert_not_found(resp.status_code)
+
+        self.assertEqual(expecting, received)
+
+    @non_transactional
+    def test_concurrent_quiz_session(self):
+        """
+        Test concurrent requests for the same quiz session each get different questions
+        """
+        # get questions from db in an app context, so the connection is released before the concurrent requests
+        with self.app.app_context():
+            category, questions, expecting = self.setup_quiz_test(ALL_CATEGORY_TYPE)
+
+        with self.client as client:
+            resp = client.post(
+                QUIZ_SESSIONS_URL, json={
+                    QUIZ_CATEGORY: category.to_dict()
+                })
+            self.assert_created(resp.status_code)
+            token = json.loads(resp.data)['session']
+
+        def next_questions(_):
+            with self.app.test_client() as thread_client:
+                thread_resp = thread_client.post(make_url(QUIZ_SESSION_URL, token=token, num=3))
+                return thread_resp.status_code, json.loads(thread_resp.data).get('questions', [])
+
+        received = []
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for status_code, resp_questions in executor.map(next_questions, range(len(questions))):
+                self.assert_ok(status_code)
+                received.extend([question[M_ID] for question in resp_questions])
+
+        # each question asked exactly once
+        self.assertEqual(len(received), len(set(received)))
+        self.assertEqual(expecting, set(received))
+
+    def test_quiz_session_not_found(self):
+        """
+        Test an invalid quiz session
+        """
+        with self.client as client:
+            resp = client.post(make_url(QUIZ_SESSION_URL, token='not-a-session'))
+            self.assert_not_found(resp.status_code)
+
     def test_save_quiz_result(self):
         """
         Test saving a quiz result
         """
-        username = UsersTestCase.timestamped_username('quiz_user')
-        UsersTestCase.register_user(self, username, 'secret')
+        username = test_users.UsersTestCase.timestamped_username('quiz_user')
+        test_users.UsersTestCase.register_user(self, username, 'secret')
 
         # get user from db
         user = User.query.filter(User.username == username).first()
@@ -163,17 +509,131 @@ class QuizzesTestCase(TriviaTestCase):
                     NUM_QUESTIONS: new_num_questions - start_num_questions
                 })
 
-            UsersTestCase.assert_user(self, resp,
-                                      user_id=user_id, username=username,
-                                      num_questions=new_num_questions, num_correct=new_num_correct,
-                                      expect=Expect.SUCCESS)
+            test_users.UsersTestCase.assert_user(self, resp,
+                                                 user_id=user_id, username=username,
+                                                 num_questions=new_num_questions, num_correct=new_num_correct,
+                                                 expect=Expect.SUCCESS)
+
+    @non_transactional
+    def test_concurrent_quiz_results(self):
+        """
+        Test concurrent quiz results for the same user are not lost
+        """
+        username = test_users.UsersTestCase.timestamped_username('concurrent_quiz_user')
+        test_users.UsersTestCase.register_user(self, username, 'secret')
+
+        # get user from db; in an app context, so the connection is released before the concurrent requests
+        with self.app.app_context():
+            user = User.query.filter(User.username == username).first()
+            self.assertIsNotNone(user)
+            user_id = user.id
+
+        num_saves = 40
+
+        def save_result(_):
+            with self.app.test_client() as client:
+                return client.post(
+                    QUIZ_RESULTS_URL, json={
+                        USER_ID: user_id,
+                        NUM_CORRECT: 1,
+                        NUM_QUESTIONS: 2
+                    }).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for status_code in executor.map(save_result, range(num_saves)):
+                self.assert_ok(status_code)
+
+        with self.client as client:
+            resp = client.post(
+                QUIZ_RESULTS_URL, json={
+                    USER_ID: user_id,
+                    NUM_CORRECT: 0,
+                    NUM_QUESTIONS: 0
+                })
+
+            test_users.UsersTestCase.assert_user(self, resp,
+                                                 user_id=user_id, username=username,
+                                                 num_questions=2 * num_saves, num_correct=num_saves,
+                                                 expect=Expect.SUCCESS)
+
+    @non_transactional
+    def test_buffered_quiz_results(self):
+        """
+        Test buffered quiz results are included in responses, and written to the database when flushed
+        """
+        username = test_users.UsersTestCase.timestamped_username('buffered_quiz_user')
+        test_users.UsersTestCase.register_user(self, username, 'secret')
+
+        # read the db in an app context, so the connection is released before the scores are flushed
+        def db_scores():
+            with self.app.app_context():
+                return tuple(User.query.with_entities(User.num_correct, User.num_questions)
+                             .filter(User.username == username).first())
+
+        with self.app.app_context():
+            user_id = User.query.filter(User.username == username).first().id
+        start_scores = db_scores()
+
+        self.app.config['SCORE_FLUSH_INTERVAL'] = 60
+        try:
+            with self.client as client:
+                for count in range(1, 4):
+                    resp = client.post(
+                        QUIZ_RESULTS_URL, json={
+                            USER_ID: user_id,
+                            NUM_CORRECT: 1,
+                            NUM_QUESTIONS: 2
+                        })
+                    # a single read of the user
+                    self.assertIn('desc="1 statements"', resp.headers.get('Server-Timing', ''))
+
+                    test_users.UsersTestCase.assert_user(self, resp,
+                                                         user_id=user_id, username=username,
+                                                         num_correct=start_scores[0] + count,
+                                                         num_questions=start_scores[1] + (2 * count),
+                                                         expect=Expect.SUCCESS)
+
+                resp = client.post(
+                    QUIZ_RESULTS_URL, json={
+                        USER_ID: 1000, NUM_CORRECT: 4, NUM_QUESTIONS: 5
+                    })
+                self.assert_not_found(resp.status_code)
+
+            # not written until flushed
+            self.assertEqual(start_scores, db_scores())
+        finally:
+            shutdown_score_aggregator(self.app)
+            self.app.config['SCORE_FLUSH_INTERVAL'] = None
+
+        self.assertEqual((start_scores[0] + 3, start_scores[1] + 6), db_scores())
+
+    def test_score_aggregator_per_app(self):
+        """
+        Test each application has its own score aggregator, which flushes through that application
+        """
+        other_app = Flask(__name__)
+        self.app.config['SCORE_FLUSH_INTERVAL'] = 60
+        try:
+            with self.app.app_context():
+                aggregator = get_score_aggregator()
+                self.assertIs(aggregator, get_score_aggregator())
+            with other_app.app_context():
+                other_aggregator = get_score_aggregator()
+
+            self.assertIsNot(aggregator, other_aggregator)
+            self.assertIs(self.app, aggregator.app)
+            self.assertIs(other_app, other_aggregator.app)
+        finally:
+            shutdown_score_aggregator(self.app)
+            shutdown_score_aggregator(other_app)
+            self.app.config['SCORE_FLUSH_INTERVAL'] = None
 
     def test_save_invalid_quiz_result(self):
         """
         Test saving a quiz result
         """
-        username = UsersTestCase.timestamped_username('invalid_quiz_user')
-        UsersTestCase.register_user(self, username, 'secret')
+        username = test_users.UsersTestCase.timestamped_username('invalid_quiz_user')
+        test_users.UsersTestCase.register_user(self, username, 'secret')
 
         # get user from db
         user = User.query.filter(User.username == username).first()
@@ -191,6 +651,15 @@ class QuizzesTestCase(TriviaTestCase):
                     QUIZ_RESULTS_URL, json=updates)
                 self.assert_not_found(resp.status_code)
 
+            for updates in [
+                # invalid values
+                {USER_ID: user_id, NUM_CORRECT: '4', NUM_QUESTIONS: 5},
+                {USER_ID: user_id, NUM_CORRECT: 4, NUM_QUESTIONS: None},
+            ]:
+                resp = client.post(
+                    QUIZ_RESULTS_URL, json=updates)
+                self.assert_bad_request(resp.status_code)
+
 
 # Make the tests conveniently executable
 if __name__ == "__main__":
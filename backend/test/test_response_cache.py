@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import unittest
+from http import HTTPStatus
+
+from backend.flaskr import QUESTIONS_URL, QUESTION_BY_ID_URL, CATEGORIES_URL, QUESTION_RESPONSE_ALIASES, key_or_alias
+from backend.flaskr.service import get_response_cache, register_response_cache_backend, CachedResponse
+from backend.flaskr.service.response_cache import LruResponseCache, SqliteResponseCache, ResponseCache
+from backend.test.base_test import TriviaTestCase
+from backend.test.misc import make_url
+from backend.test.test_data import *
+
+
+class ResponseCacheTestCase(TriviaTestCase):
+    """This class represents the test case for the response cache"""
+
+    def test_not_modified(self):
+        """ Test a conditional request with the current ETag is not modified """
+        cache = get_response_cache()
+        before = cache.stats()
+        with self.client as client:
+            for url in [QUESTIONS_URL, make_url(QUESTIONS_URL, page=2), CATEGORIES_URL,
+                        make_url(QUESTION_BY_ID_URL, question_id=ALL_QUESTION_DATA[0].id)]:
+                with self.subTest(url=url):
+                    resp = client.get(url)
+                    self.assert_ok(resp.status_code)
+                    etag, _ = resp.get_etag()
+                    self.assertIsNotNone(etag)
+                    self.assertEqual('no-cache', resp.headers.get('Cache-Control'))
+
+                    # cached response
+                    cached = client.get(url)
+                    self.assert_ok(cached.status_code)
+                    self.assertEqual(resp.data, cached.data)
+                    self.assertEqual((etag, False), cached.get_etag())
+
+                    resp = client.get(url, headers={'If-None-Match': f'"{etag}"'})
+                    self.assertEqual(HTTPStatus.NOT_MODIFIED.value, resp.status_code)
+                    self.assertEqual(b'', resp.data)
+                    self.assertEqual((etag, False), resp.get_etag())
+
+            # the ETag of another resource doesn't apply to a nonexistent one
+            resp = client.get(make_url(QUESTION_BY_ID_URL, question_id=1000),
+                              headers={'If-None-Match': f'"{etag}"'})
+            self.assert_not_found(resp.status_code)
+
+            stats = cache.stats()
+            for stat, expected in [('misses', 5), ('hits', 8), ('not_modified', 4)]:
+                self.assertEqual(expected, stats[stat] - before[stat], msg=stat)
+
+    def test_invalidated_by_create_delete(self):
+        """ Test cached responses are invalidated when a question is created or deleted """
+        total_key = key_or_alias("total", QUESTION_RESPONSE_ALIASES)
+        with self.client as client:
+            resp = client.get(QUESTIONS_URL)
+            etag, _ = resp.get_etag()
+            total = json.loads(resp.data)[total_key]
+
+            resp = client.post(QUESTIONS_URL, json={
+                M_QUESTION: 'Which response cache test question was just created?', M_ANSWER: 'This one',
+                M_CATEGORY: category_by('Science')[0].id, M_DIFFICULTY: 1})
+            self.assert_created(resp.status_code)
+
+            resp = client.get(QUESTIONS_URL, headers={'If-None-Match': f'"{etag}"'})
+            self.assert_ok(resp.status_code)
+            new_etag, _ = resp.get_etag()
+            self.assertNotEqual(etag, new_etag)
+            resp_body = json.loads(resp.data)
+            self.assertEqual(total + 1, resp_body[total_key])
+
+            with self.app.app_context():
+                question = Question.query.filter(Question.question.like('Which response cache test%')).first()
+                question_id = question.id
+            resp = client.delete(make_url(QUESTION_BY_ID_URL, question_id=question_id))
+            self.assert_ok(resp.status_code)
+
+            resp = client.get(QUESTIONS_URL, headers={'If-None-Match': f'"{new_etag}"'})
+            self.assert_ok(resp.status_code)
+            self.assertEqual(total, json.loads(resp.data)[total_key])
+
+    def test_lru_eviction(self):
+        """ Test the least recently used entry is evicted """
+        cache = LruResponseCache(max_entries=2)
+        version = cache.version()
+        for key in ['a', 'b']:
+            cache.set(key, version, CachedResponse(key.encode(), 'text/plain'))
+        cache.get('a', version)
+        cache.set('c', version, CachedResponse(b'c', 'text/plain'))
+
+        self.assertIsNone(cache.get('b', version))
+        self.assertEqual(b'a', cache.get('a', version).body)
+        self.assertEqual(b'c', cache.get('c', version).body)
+
+        cache.invalidate()
+        self.assertIsNone(cache.get('a', version))
+        self.assertIsNone(cache.get('a', cache.version()))
+
+    def test_expiry(self):
+        """ Test entries expire after the max age """
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        try:
+            for cache in [LruResponseCache(max_entries=2, ttl=60), SqliteResponseCache(path, max_entries=2, ttl=60)]:
+                with self.subTest(cache=type(cache).__name__):
+                    version = cache.version()
+                    cache.set('a', version, CachedResponse(b'a', 'application/json'))
+                    self.assertEqual(b'a', cache.get('a', version).body)
+
+                    cache.ttl = -1
+                    self.assertIsNone(cache.get('a', version))
+                    cache.ttl = None
+                    cache.set('b', version, CachedResponse(b'b', 'application/json'))
+                    self.assertEqual(b'b', cache.get('b', version).body)
+        finally:
+            self.remove_db(path)
+
+    def test_incomplete_backend(self):
+        """ Test a backend which doesn't implement the cache interface can't be created or registered """
+        class IncompleteCache(ResponseCache):
+            def version(self) -> int:
+                return 1
+
+        with self.assertRaises(TypeError):
+            IncompleteCache()
+        with self.assertRaises(TypeError):
+            register_response_cache_backend('incomplete', IncompleteCache)
+
+    def test_sqlite_shared(self):
+        """ Test the sqlite cache is shared, and invalidated, across cache instances """
+        handle, path = tempfile.mkstemp(suffix='.db')
+        os.close(handle)
+        try:
+            worker1 = SqliteResponseCache(path, max_entries=2)
+            worker2 = SqliteResponseCache(path, max_entries=2)
+
+            version = worker1.version()
+            worker1.set('a', version, CachedResponse(b'a', 'application/json'))
+            self.assertEqual(CachedResponse(b'a', 'application/json'), worker2.get('a', version))
+
+            # an entry generated before an invalidation is not stored
+            worker2.invalidate()
+            self.assertEqual(version + 1, worker1.version())
+            self.assertIsNone(worker1.get('a', version))
+            worker1.set('b', version, CachedResponse(b'b', 'application/json'))
+            self.assertIsNone(worker2.get('b', version))
+
+            # oldest entries are evicted
+            version = worker1.version()
+            for key in ['c', 'd', 'e']:
+                worker1.set(key, version, CachedResponse(key.encode(), 'application/json'))
+            self.assertIsNone(worker2.get('c', version))
+            self.assertIsNotNone(worker2.get('e', version))
+        finally:
+            self.remove_db(path)
+
+    @staticmethod
+    def remove_db(path: str):
+        for db_path in [path, path + '-wal', path + '-shm']:
+            if os.path.exists(db_path):
+                os.remove(db_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
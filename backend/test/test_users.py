@@ -4,7 +4,9 @@ import unittest
 from http import HTTPStatus
 
 from backend.flaskr import LOGIN_URL
-from backend.flaskr.model import M_USERNAME, M_PASSWORD, M_NUM_QUESTIONS, M_NUM_CORRECT, M_ID
+from backend.flaskr.model import M_USERNAME, M_PASSWORD, M_NUM_QUESTIONS, M_NUM_CORRECT, M_ID, User
+from backend.flaskr.model.models import db
+from backend.flaskr.service.password_hasher import PasswordHasher, register_password_hasher
 from backend.test.base_test import TriviaTestCase
 from backend.test.misc import MatchParam, Expect
 
@@ -108,6 +110,73 @@ class UsersTestCase(TriviaTestCase):
         UsersTestCase.register_user(self, username, 'secret')
         UsersTestCase.login_user(self, username, 'guess', expect=Expect.FAILURE, error_code=HTTPStatus.UNAUTHORIZED)
 
+    def stored_password(self, username: str) -> str:
+        return User.query.with_entities(User.password).filter(User.username == username).first()[0]
+
+    def test_password_hashed(self):
+        """
+        Test passwords are stored hashed
+        """
+        username = UsersTestCase.timestamped_username('hashed_user')
+        UsersTestCase.register_user(self, username, 'secret')
+
+        stored = self.stored_password(username)
+        self.assertNotEqual('secret', stored)
+        self.assertTrue(stored.startswith(f'pbkdf2:sha256:{self.app.config["PASSWORD_HASH_COST"]}$'))
+
+        # verified, then verified from cache
+        UsersTestCase.login_user(self, username, 'secret')
+        UsersTestCase.login_user(self, username, 'secret')
+        UsersTestCase.login_user(self, username, 'guess', expect=Expect.FAILURE, error_code=HTTPStatus.UNAUTHORIZED)
+
+    def test_plaintext_password_rehashed(self):
+        """
+        Test plaintext passwords from before passwords were hashed are rehashed on login
+        """
+        username = UsersTestCase.timestamped_username('plaintext_user')
+        with self.app.app_context():
+            db.session.add(User(username, 'secret'))
+            db.session.commit()
+
+        UsersTestCase.login_user(self, username, 'guess', expect=Expect.FAILURE, error_code=HTTPStatus.UNAUTHORIZED)
+        self.assertEqual('secret', self.stored_password(username))
+
+        UsersTestCase.login_user(self, username, 'secret')
+        self.assertTrue(self.stored_password(username).startswith('pbkdf2:sha256:'))
+
+        UsersTestCase.login_user(self, username, 'secret')
+
+    def test_password_rehashed_on_cost_change(self):
+        """
+        Test passwords are rehashed on login when the hash cost changes
+        """
+        username = UsersTestCase.timestamped_username('rehash_user')
+        UsersTestCase.register_user(self, username, 'secret')
+
+        cost = self.app.config['PASSWORD_HASH_COST']
+        self.app.config['PASSWORD_HASH_COST'] = cost + 1
+        try:
+            UsersTestCase.login_user(self, username, 'secret')
+            self.assertTrue(self.stored_password(username).startswith(f'pbkdf2:sha256:{cost + 1}$'))
+        finally:
+            self.app.config['PASSWORD_HASH_COST'] = cost
+
+    def test_incomplete_password_hasher(self):
+        """
+        Test a hasher which doesn't implement the hasher interface can't be created or registered
+        """
+        class IncompleteHasher(PasswordHasher):
+            def hash(self, password: str) -> str:
+                return password
+
+            def is_hash(self, value: str) -> bool:
+                return True
+
+        with self.assertRaises(TypeError):
+            IncompleteHasher()
+        with self.assertRaises(TypeError):
+            register_password_hasher('incomplete', IncompleteHasher)
+
 
 # Make the tests conveniently executable
 if __name__ == "__main__":
@@ -22,6 +22,7 @@ function QuizView () {
     const [guessCorrect, setGuessCorrect] = useState(false);
     const [numQuestions, setNumQuestions] = useState(0);
     const [currentQuestion, setCurrentQuestion] = useState({});
+    const [questionQueue, setQuestionQueue] = useState([]);
     const [forceEnd, setForceEnd] = useState(false);
 
 
@@ -44,11 +45,68 @@ function QuizView () {
     function selectCategory({type, id=0}) {
         let category = {type:type, id:id}
         setQuizCategory(category);
-        getNextQuestion(category);
+        getQuizRound(category);
     }
 
 
-    function getNextQuestion(category) {
+    function toQuestionQueue(round) {
+        // compact format has a list per field, e.g. {id: [..], question: [..], answer: [..], match: [..]}
+        return round.id.map((id, index) => {
+            let question = {};
+            Object.keys(round).forEach(field => question[field] = round[field][index]);
+            return question;
+        });
+    }
+
+
+    function getQuizRound(category) {
+        // prefetch all the questions for the quiz in one request
+        let requestData = {previous_questions: []};
+        if (category.id > 0) {
+            requestData.quiz_category = category;
+        }
+
+        $.ajax({
+            url: `/api/quizzes?num=${questionsPerPlay}&format=compact`,
+            type: "POST",
+            dataType: 'json',
+            contentType: 'application/json',
+            data: JSON.stringify(requestData),
+            xhrFields: {
+                withCredentials: true
+            },
+            crossDomain: true,
+            success: (result) => {
+                showNextQuestion(toQuestionQueue(result.round), [], 0);
+                return;
+            },
+            error: (error) => {
+                alert('Unable to load questions. Please try your request again')
+                return;
+            }
+        })
+    }
+
+
+    function showNextQuestion(queue, prevQuestions, count) {
+        setGuessCorrect(false);
+        setShowAnswer(false);
+        setPreviousQuestions(prevQuestions);
+        if (queue.length > 0) {
+            setCurrentQuestion(queue[0]);
+            setQuestionQueue(queue.slice(1));
+            setForceEnd(false);
+            setNumQuestions(count + 1);
+        } else {
+            // no more questions available
+            setCurrentQuestion({});
+            setQuestionQueue([]);
+            setForceEnd(true);
+        }
+    }
+
+
+    function getNextQuestion() {
 
         let end = (numQuestions === questionsPerPlay);
         if (!end) {
@@ -56,42 +114,7 @@ function QuizView () {
             if (currentQuestion.id) {
                 prevQuestions.push(currentQuestion.id)
             }
-            if (!category) {
-                category = quizCategory;
-            }
-            let requestData = {previous_questions: prevQuestions};
-            if (category.id > 0) {
-                requestData.quiz_category = category;
-            }
-            setGuessCorrect(false);
-
-            $.ajax({
-                url: '/api/quizzes',
-                type: "POST",
-                dataType: 'json',
-                contentType: 'application/json',
-                data: JSON.stringify(requestData),
-                xhrFields: {
-                    withCredentials: true
-                },
-                crossDomain: true,
-                success: (result) => {
-                    setShowAnswer(false);
-                    setPreviousQuestions(prevQuestions);
-                    setCurrentQuestion(result.question);
-                    if (result.question) {
-                        setForceEnd(false);
-                        setNumQuestions(numQuestions + 1);
-                    } else {
-                        setForceEnd(true);
-                    }
-                    return;
-                },
-                error: (error) => {
-                    alert('Unable to load question. Please try your request again')
-                    return;
-                }
-            })
+            showNextQuestion(questionQueue, prevQuestions, numQuestions);
         } else {
             setForceEnd(true);
         }
@@ -142,6 +165,7 @@ function QuizView () {
         setNumCorrect(0);
         setNumQuestions(0);
         setCurrentQuestion({});
+        setQuestionQueue([]);
         setForceEnd(false);
     }
 